@@ -6,6 +6,14 @@ import csv
 import os
 import tempfile
 import webbrowser
+
+# Sort options of the inventory table: ORDER BY column and its index in an inventory row
+INVENTORY_SORTS = {
+    "Name": ("p.name", 2),
+    "Category": ("c.name", 3),
+    "Quantity": ("i.quantity", 4),
+    "Price": ("i.price", 5),
+}
 class Database:
     def __init__(self):
         self.conn = sqlite3.connect('DB/device_inventory.db')
@@ -109,7 +117,62 @@ class Database:
             )
         ''')
         
+        # Indexes on the foreign keys the joins follow and on the columns lists are sorted by
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products (category_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventory_product ON inventory (product_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventory_price ON inventory (price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventory_quantity ON inventory (quantity)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_inventory ON sales (inventory_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (sale_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_purchase_orders_supplier ON purchase_orders (supplier_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_po_items_po ON po_items (po_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_po_items_product ON po_items (product_id)")
+        self.has_search_index = self.create_search_index(cursor)
+        
         self.conn.commit()
+    def create_search_index(self, cursor):
+        """Create the full text index of product names and SKUs, kept in sync by triggers
+
+        The trigram tokenizer matches any substring of at least three characters,
+        the same rows as LIKE '%term%'. Returns False when this SQLite has no FTS5
+        or no trigram tokenizer (before 3.34); searches then use LIKE.
+        """
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'inventory_search'").fetchone()
+        if not exists:
+            try:
+                cursor.execute("CREATE VIRTUAL TABLE inventory_search USING fts5(name, sku, tokenize='trigram')")
+            except sqlite3.OperationalError:
+                return False
+            cursor.execute('''
+                INSERT INTO inventory_search (rowid, name, sku)
+                SELECT i.id, p.name, i.sku FROM inventory i LEFT JOIN products p ON i.product_id = p.id
+            ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS inventory_search_insert AFTER INSERT ON inventory BEGIN
+                INSERT INTO inventory_search (rowid, name, sku)
+                VALUES (new.id, (SELECT name FROM products WHERE id = new.product_id), new.sku);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS inventory_search_update AFTER UPDATE OF product_id, sku ON inventory BEGIN
+                UPDATE inventory_search
+                SET name = (SELECT name FROM products WHERE id = new.product_id), sku = new.sku
+                WHERE rowid = new.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS inventory_search_delete AFTER DELETE ON inventory BEGIN
+                DELETE FROM inventory_search WHERE rowid = old.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS inventory_search_product AFTER UPDATE OF name ON products BEGIN
+                UPDATE inventory_search SET name = new.name
+                WHERE rowid IN (SELECT id FROM inventory WHERE product_id = new.id);
+            END
+        ''')
+        return True
     def export(self, export_type, file_path):
         try:
             cursor = self.conn.cursor()
@@ -663,8 +726,13 @@ class Database:
         category_data = cursor.fetchall()
         return total_value, total_products, low_stock, sales_count, sales_value, category_data, sales_data, recent_sales
 
-    def refresh_inventory(self, search_term, category_filter, sort_option):
-        
+    def refresh_inventory(self, search_term, category_filter, sort_option, after=None, limit=None):
+        """Inventory rows matching the filters, in sort order
+
+        Rows are paged by keyset: pass the last row of the previous page as
+        ``after`` and the query continues from its (sort value, id) through
+        the sort column's index, however deep the page is.
+        """
         query = '''
             SELECT i.id, i.sku, p.name, c.name, i.quantity, i.price, i.location
             FROM inventory i
@@ -674,7 +742,11 @@ class Database:
         '''
         params = []
 
-        if search_term:
+        if search_term and self.has_search_index and len(search_term) >= 3:
+            query += " AND i.id IN (SELECT rowid FROM inventory_search WHERE inventory_search MATCH ?)"
+            params.append('"' + search_term.replace('"', '""') + '"')
+        elif search_term:
+            # Trigrams cannot match one or two characters
             query += " AND (p.name LIKE ? OR i.sku LIKE ?)"
             params.extend(['%' + search_term + '%', '%' + search_term + '%'])
 
@@ -682,15 +754,21 @@ class Database:
             query += " AND c.name = ?"
             params.append(category_filter)
 
-        sort_column = "p.name"
-        if sort_option == "Category":
-            sort_column = "c.name"
-        elif sort_option == "Price":
-            sort_column = "i.price"
-        elif sort_option == "Quantity":
-            sort_column = "i.quantity"
+        sort_column, sort_index = INVENTORY_SORTS.get(sort_option, INVENTORY_SORTS["Name"])
+        if after is not None:
+            # NULLs sort first, and a row value comparison with NULL is never true
+            if after[sort_index] is None:
+                query += f" AND (({sort_column} IS NULL AND i.id > ?) OR {sort_column} IS NOT NULL)"
+                params.append(after[0])
+            else:
+                query += f" AND ({sort_column}, i.id) > (?, ?)"
+                params.extend([after[sort_index], after[0]])
 
-        query += f" ORDER BY {sort_column}"
+        # The id breaks ties, so every row has a unique position to continue from
+        query += f" ORDER BY {sort_column}, i.id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
 
         cursor = self.conn.cursor()
         cursor.execute(query, params)
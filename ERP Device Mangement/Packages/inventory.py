@@ -7,6 +7,8 @@ from tkinter import END
 from datetime import datetime
 from Packages.database import Database
 from Packages.products import productsManager
+
+INVENTORY_PAGE_SIZE = 100  # rows fetched per keyset page
 class inventoryManager:
     def __init__(self, main_frame, root):
         self.db = Database()
@@ -165,7 +167,7 @@ class inventoryManager:
         # Add scrollbars
         v_scrollbar = Scrollbar(tree_container, orient="vertical", command=self.inventory_tree.yview)
         v_scrollbar.grid(row=0, column=1, sticky="ns")
-        self.inventory_tree.configure(yscrollcommand=v_scrollbar.set)
+        self.inventory_tree.configure(yscrollcommand=lambda first, last: self.on_tree_scroll(v_scrollbar, first, last))
         
         h_scrollbar = Scrollbar(tree_container, orient="horizontal", command=self.inventory_tree.xview)
         h_scrollbar.grid(row=1, column=0, sticky="ew")
@@ -177,63 +179,120 @@ class inventoryManager:
         # Bind right-click event for context menu
         self.inventory_tree.bind('<Button-3>', self.on_tree_right_click)
         
+        # Rows are loaded a page at a time, see load_more_inventory
+        self.inventory_filters = None
+        self.inventory_shown = {}  # item id -> displayed values, in table order
+        self.inventory_last = None  # last loaded row, where the next page continues
+        self.inventory_complete = True
+        self.loading_inventory = False
+        
         # Load initial data
         self.refresh_inventory_table()
 
     def refresh_inventory_table(self):
-        """Update the Treeview with current data and filters"""
+        """Update the Treeview with current data and filters
+
+        Only the first page is fetched; later pages load as the table scrolls.
+        With unchanged filters (after an edit or a sale) the rows already
+        loaded are fetched again and only changed items are touched, so the
+        scroll position and selection stay.
+        """
         if not hasattr(self, 'inventory_tree'):
             return
         
-        # Clear existing data
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-        
         # Get filter values
         search_term = self.search_entry.get().strip() if hasattr(self, 'search_entry') else ""
         category_filter = self.category_filter.get() if hasattr(self, 'category_filter') else "All"
         sort_option = self.sort_option.get() if hasattr(self, 'sort_option') else "Name"
 
+        filters = (search_term, category_filter, sort_option)
+        limit = INVENTORY_PAGE_SIZE
+        if filters == self.inventory_filters:
+            limit = max(limit, len(self.inventory_shown))
+
+        if self.inventory_tree.exists('message'):
+            self.inventory_tree.delete('message')
         try:
             # Get filtered products from database
-            products = self.db.refresh_inventory(search_term, category_filter, sort_option)
-            
-            if not products:
-                # Show "No data" message
-                self.inventory_tree.insert('', 'end', text='', values=('No data found', '', '', '', '', ''))
-                return
-            
-            # Add products to tree
-            for product in products:
-                try:
-                    inventory_id, sku, product_name, category_name, quantity, price, location = product
-                    
-                    # Format data for display
-                    values = (
-                        str(sku),
-                        str(product_name),
-                        str(category_name),
-                        str(quantity),
-                        f"${price:.2f}",
-                        str(location or "Main Storage")
-                    )
-                    
-                    # Insert item
-                    item = self.inventory_tree.insert('', 'end', text=str(inventory_id), values=values)
-                    
-                    # Apply low stock highlighting
-                    if quantity <= 5:
-                        self.inventory_tree.set(item, 'Quantity', f"{quantity} ⚠️")
-                        # Note: Full row highlighting requires more complex styling in ttk
-                    
-                except Exception as e:
-                    showerror("Error", f"Error processing product row: {str(e)}\n{product}")
-                    continue
-        
+            products = self.db.refresh_inventory(search_term, category_filter, sort_option, limit=limit)
         except Exception as e:
             showerror("Error", f"Error refreshing table: {e}")
+            self.inventory_filters, self.inventory_complete = None, True
+            self.replace_inventory_rows([])
             # Show error in table
-            self.inventory_tree.insert('', 'end', text='Error', values=(f'Failed to load: {str(e)}', '', '', '', '', ''))
+            self.inventory_tree.insert('', 'end', iid='message', text='Error', values=(f'Failed to load: {str(e)}', '', '', '', '', ''))
+            return
+
+        if filters != self.inventory_filters:
+            self.inventory_tree.yview_moveto(0)
+        self.inventory_filters = filters
+        self.inventory_complete = len(products) < limit
+        self.inventory_last = products[-1] if products else None
+        self.replace_inventory_rows(products)
+        if not products:
+            # Show "No data" message
+            self.inventory_tree.insert('', 'end', iid='message', text='', values=('No data found', '', '', '', '', ''))
+
+    def inventory_values(self, product):
+        """Displayed values of an inventory row"""
+        inventory_id, sku, product_name, category_name, quantity, price, location = product
+        return (
+            str(sku),
+            str(product_name),
+            str(category_name),
+            # Low stock highlighting; full row highlighting requires more complex styling in ttk
+            f"{quantity} ⚠️" if quantity is not None and quantity <= 5 else str(quantity),
+            f"${price:.2f}" if price is not None else "",
+            str(location or "Main Storage")
+        )
+
+    def replace_inventory_rows(self, products):
+        """Make the table show products, inserting, moving or updating only the items that differ"""
+        tree = self.inventory_tree
+        shown = {str(product[0]): self.inventory_values(product) for product in products}
+        stale = [item for item in self.inventory_shown if item not in shown]
+        if stale:
+            tree.delete(*stale)
+        for position, (item, values) in enumerate(shown.items()):
+            if item not in self.inventory_shown:
+                tree.insert('', position, iid=item, text=item, values=values)
+            elif self.inventory_shown[item] != values:
+                tree.item(item, values=values)
+        # Items only move when an edit changed their sort value
+        order = list(shown)
+        if list(tree.get_children()) != order:
+            for position, item in enumerate(order):
+                tree.move(item, '', position)
+        self.inventory_shown = shown
+
+    def on_tree_scroll(self, scrollbar, first, last):
+        """Scrollbar callback of the table, which also loads the next page near the end"""
+        scrollbar.set(first, last)
+        if float(last) > 0.9 and not self.inventory_complete and not self.loading_inventory:
+            self.loading_inventory = True
+            self.root.after_idle(self.load_more_inventory)
+
+    def load_more_inventory(self):
+        """Append the next keyset page to the table"""
+        self.loading_inventory = False
+        if self.inventory_complete or not self.inventory_tree.winfo_exists():
+            return
+        try:
+            products = self.db.refresh_inventory(*self.inventory_filters, after=self.inventory_last,
+                                                 limit=INVENTORY_PAGE_SIZE)
+        except Exception as e:
+            showerror("Error", f"Error loading more items: {e}")
+            self.inventory_complete = True
+            return
+        self.inventory_complete = len(products) < INVENTORY_PAGE_SIZE
+        if products:
+            self.inventory_last = products[-1]
+        for product in products:
+            item = str(product[0])
+            # An item edited since the last page may have moved into this one
+            if item not in self.inventory_shown:
+                values = self.inventory_shown[item] = self.inventory_values(product)
+                self.inventory_tree.insert('', 'end', iid=item, text=item, values=values)
 
     def on_tree_double_click(self, event):
         """Handle double-click on tree item"""
@@ -1,3 +1,5 @@
+import multiprocessing
+
 from prostate_modular.welecome_gui import Welecome
 from prostate_modular.main_window import MainWindow
 from prostate_modular.first_gui_data_entry import FirstDataEntryGUI
@@ -7,5 +9,7 @@ from prostate_modular.fourth_gui_data_entry import FourthDataEntryGUI
 
 
 if __name__ == "__main__":
+    # DICOM folders are converted in worker processes, which a frozen build must let start
+    multiprocessing.freeze_support()
     app = Welecome()
     app.mainloop()
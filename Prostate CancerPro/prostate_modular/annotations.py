@@ -0,0 +1,181 @@
+from collections import defaultdict
+from functools import lru_cache
+from math import cos, sin, radians
+
+import numpy as np
+
+OVAL = 0  # Rotated ellipse drawn by dragging, stored as the drag start/end and its angle
+MARK = 1  # Filled circle placed by double click
+
+GRID_CELL = 64
+_STEPS = np.radians(np.arange(0, 360, 5))
+_COS, _SIN = np.cos(_STEPS), np.sin(_STEPS)
+
+
+@lru_cache(maxsize=4096)
+def ellipse_points(center_x, center_y, width, height, angle):
+    """Flat (x0, y0, x1, y1, ...) outline of an ellipse rotated by angle degrees."""
+    x = (width / 2) * _COS
+    y = (height / 2) * _SIN
+    c, s = cos(radians(angle)), sin(radians(angle))
+    points = np.empty(2 * len(_STEPS))
+    points[0::2] = center_x + x * c - y * s
+    points[1::2] = center_y + x * s + y * c
+    return tuple(points.tolist())
+
+
+def oval_points(box, angle):
+    """Outline of an oval given by its drag start/end box, as the marking tool draws it."""
+    x0, y0, x1, y1 = box
+    return ellipse_points((x0 + x1) // 2, (y0 + y1) // 2, abs(x1 - x0), abs(y1 - y0), angle)
+
+
+class AnnotationModel:
+    """Ovals and marks in compact, growable arrays with a uniform grid index.
+
+    Ids are slots that are never reused; removing an annotation only clears
+    its ``alive`` flag, so history entries can restore it under the same id.
+    """
+
+    def __init__(self, capacity=256):
+        self.kind = np.zeros(capacity, np.uint8)
+        self.box = np.zeros((capacity, 4), np.float64)
+        self.angle = np.zeros(capacity, np.float64)
+        self.number = np.zeros(capacity, np.int32)  # running number of marks, -1 for ovals
+        self.color = np.zeros(capacity, np.uint16)  # index into palette
+        self.item = np.zeros(capacity, np.int64)  # canvas item id, 0 when not drawn
+        self.alive = np.zeros(capacity, bool)
+        self.palette = []
+        self.count = 0
+        self.grid = defaultdict(set)
+        self.version = 0  # bumped on every change, so renders can be cached per version
+
+    def grow(self):
+        capacity = 2 * len(self.kind)
+        for name in ("kind", "box", "angle", "number", "color", "item", "alive"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def color_index(self, color):
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
+
+    def add(self, kind, box, color, angle=0.0, number=-1):
+        if self.count == len(self.kind):
+            self.grow()
+        index = self.count
+        self.count += 1
+        self.restore((index, kind, tuple(box), color, angle, number))
+        return index
+
+    def record(self, index):
+        """Everything needed to restore an annotation, as plain picklable values."""
+        return (index, int(self.kind[index]), tuple(self.box[index].tolist()),
+                self.palette[self.color[index]], float(self.angle[index]), int(self.number[index]))
+
+    def restore(self, record):
+        index, kind, box, color, angle, number = record
+        self.kind[index] = kind
+        self.box[index] = box
+        self.color[index] = self.color_index(color)
+        self.angle[index] = angle
+        self.number[index] = number
+        self.item[index] = 0
+        self.alive[index] = True
+        self.add_to_grid(index)
+        self.version += 1
+
+    def remove(self, index):
+        self.remove_from_grid(index)
+        self.alive[index] = False
+        self.item[index] = 0
+        self.version += 1
+
+    def move(self, index, box):
+        self.remove_from_grid(index)
+        self.box[index] = box
+        self.add_to_grid(index)
+        self.version += 1
+
+    def set_color(self, index, color):
+        self.color[index] = self.color_index(color)
+        self.version += 1
+
+    def snapshot(self, size):
+        """(kind, coords, color) of all annotations in coordinates normalized by size.
+
+        Oval outlines are normalized as polygons, so a template of another
+        aspect ratio shows them exactly where they were drawn.
+        """
+        width, height = size
+        scale = np.tile([1 / width, 1 / height], 2)
+        shapes = []
+        for index in self.ids():
+            if self.kind[index] == OVAL:
+                points = np.asarray(oval_points(self.box[index].tolist(), self.angle[index]))
+                coords = points * np.resize(scale[:2], len(points))
+            else:
+                coords = self.box[index] * scale
+            shapes.append((int(self.kind[index]), tuple(coords.tolist()), self.color_of(index)))
+        return shapes
+
+    def ids(self, kind=None):
+        mask = self.alive[:self.count]
+        if kind is not None:
+            mask = mask & (self.kind[:self.count] == kind)
+        return np.flatnonzero(mask).tolist()
+
+    def next_number(self):
+        marks = self.alive[:self.count] & (self.kind[:self.count] == MARK)
+        return int(self.number[:self.count][marks].max()) + 1 if marks.any() else 0
+
+    def color_of(self, index):
+        return self.palette[self.color[index]]
+
+    def bounds(self, index):
+        x0, y0, x1, y1 = self.box[index]
+        if self.kind[index] == MARK:
+            return x0, y0, x1, y1
+        # A rotated oval stays inside the circle of its larger diameter
+        radius = max(abs(x1 - x0), abs(y1 - y0)) / 2
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        return cx - radius, cy - radius, cx + radius, cy + radius
+
+    def cells(self, bounds):
+        x0, y0, x1, y1 = bounds
+        for cell_x in range(int(x0 // GRID_CELL), int(x1 // GRID_CELL) + 1):
+            for cell_y in range(int(y0 // GRID_CELL), int(y1 // GRID_CELL) + 1):
+                yield cell_x, cell_y
+
+    def add_to_grid(self, index):
+        for cell in self.cells(self.bounds(index)):
+            self.grid[cell].add(index)
+
+    def remove_from_grid(self, index):
+        for cell in self.cells(self.bounds(index)):
+            self.grid[cell].discard(index)
+
+    def hit_test(self, x, y, tolerance=1.0):
+        """The topmost annotation at (x, y), or None; only one grid cell is searched."""
+        for index in sorted(self.grid.get((int(x // GRID_CELL), int(y // GRID_CELL)), ()), reverse=True):
+            x0, y0, x1, y1 = self.box[index]
+            if self.kind[index] == MARK:
+                cx, cy, radius = (x0 + x1) / 2, (y0 + y1) / 2, abs(x1 - x0) / 2
+                if (x - cx) ** 2 + (y - cy) ** 2 <= (radius + tolerance) ** 2:
+                    return index
+            elif self.hits_oval(index, x, y, tolerance):
+                return index
+        return None
+
+    def hits_oval(self, index, x, y, tolerance):
+        # Ovals are outlines, so they are hit near their edge, in the oval's rotated frame
+        x0, y0, x1, y1 = self.box[index]
+        a, b = max(abs(x1 - x0) / 2, 1e-6), max(abs(y1 - y0) / 2, 1e-6)
+        c, s = cos(radians(self.angle[index])), sin(radians(self.angle[index]))
+        dx, dy = x - (x0 + x1) // 2, y - (y0 + y1) // 2
+        u, v = dx * c + dy * s, -dx * s + dy * c
+        distance = np.hypot(u / a, v / b)
+        return abs(distance - 1) * min(a, b) <= tolerance + 4
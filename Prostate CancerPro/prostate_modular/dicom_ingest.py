@@ -0,0 +1,327 @@
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+CACHE_DIR = os.path.join("DB", "dicom_cache")
+THUMBNAIL_SIZE = (96, 96)
+FRAMES_PER_TASK = 16  # multi-frame files are split into tasks of this many frames
+AUTO_WINDOW_PERCENTILES = (0.5, 99.5)
+
+
+def read_header(path):
+    """Identifying tags of an image file, or None if it is not a DICOM image; pixel data is not read."""
+    import pydicom
+    from pydicom.errors import InvalidDicomError
+    try:
+        ds = pydicom.dcmread(path, stop_before_pixels=True)
+    except InvalidDicomError:
+        return None
+    if "Rows" not in ds:
+        return None  # DICOMDIR, structured reports and other files without an image
+    return {
+        "study_uid": str(ds.get("StudyInstanceUID", "")),
+        "series_uid": str(ds.get("SeriesInstanceUID", "")) or path,
+        "sop_uid": str(ds.get("SOPInstanceUID", "")) or path,
+        "instance": int(ds.get("InstanceNumber") or 0),
+        "frames": int(ds.get("NumberOfFrames") or 1),
+        "patient": str(ds.get("PatientName", "")),
+        "date": str(ds.get("StudyDate", "")),
+        "modality": str(ds.get("Modality", "")),
+        "description": str(ds.get("SeriesDescription", "")),
+    }
+
+
+def frame_value(ds, frame, sequence, keyword, default=None):
+    """A tag of one frame: from the per-frame or shared functional groups of
+    enhanced multi-frame files, else from the top level of the dataset."""
+    for groups, index in (("PerFrameFunctionalGroupsSequence", frame), ("SharedFunctionalGroupsSequence", 0)):
+        if groups in ds and len(ds[groups].value) > index:
+            group = ds[groups][index]
+            if sequence in group and group[sequence].value and keyword in group[sequence][0]:
+                return group[sequence][0][keyword].value
+    return ds.get(keyword, default)
+
+
+def first_value(value):
+    """WindowCenter and WindowWidth may hold several windows; the first is the default one."""
+    if not isinstance(value, (int, float, str)):
+        value = value[0]
+    return float(value)
+
+
+def window_to_uint8(values, center, width, function="LINEAR"):
+    """Window/level float32 values to 0..255 as in PS3.3 C.11.2.1.2, in place."""
+    if function == "SIGMOID":
+        values -= center
+        values *= -4 / width
+        np.exp(values, out=values)
+        values += 1
+        np.reciprocal(values, out=values)
+    else:
+        values -= center - 0.5
+        values /= max(width - 1, 1.0)
+        values += 0.5
+        np.clip(values, 0, 1, out=values)
+    values *= 255
+    np.rint(values, out=values)
+    return values.astype(np.uint8)
+
+
+def display_pixels(ds, frame, pixels):
+    """8-bit display image of one decoded frame: modality LUT, then VOI LUT or window/level."""
+    photometric = str(ds.get("PhotometricInterpretation", "MONOCHROME2"))
+    if photometric == "PALETTE COLOR":
+        from pydicom.pixels import apply_color_lut
+        pixels = apply_color_lut(pixels, ds)
+    if pixels.ndim == 3:
+        # Colour frames are already RGB (pydicom converts YBR); only deep samples need scaling
+        if pixels.dtype != np.uint8:
+            pixels = pixels.astype(np.float32) * (255 / max(1, int(pixels.max())))
+        return Image.fromarray(pixels.astype(np.uint8), "RGB")
+
+    if "ModalityLUTSequence" in ds:
+        from pydicom.pixels import apply_modality_lut
+        values = apply_modality_lut(pixels, ds).astype(np.float32)
+    else:
+        values = pixels.astype(np.float32)
+        slope = float(frame_value(ds, frame, "PixelValueTransformationSequence", "RescaleSlope", 1) or 1)
+        intercept = float(frame_value(ds, frame, "PixelValueTransformationSequence", "RescaleIntercept", 0) or 0)
+        if slope != 1:
+            values *= slope
+        if intercept:
+            values += intercept
+
+    center = frame_value(ds, frame, "FrameVOILUTSequence", "WindowCenter")
+    width = frame_value(ds, frame, "FrameVOILUTSequence", "WindowWidth")
+    if "VOILUTSequence" in ds:
+        from pydicom.pixels import apply_voi_lut
+        bits = int(ds.VOILUTSequence[0].LUTDescriptor[2])
+        values = apply_voi_lut(values, ds, prefer_lut=True).astype(np.float32)
+        values *= 255 / (2 ** bits - 1)
+        out = np.clip(values, 0, 255, out=values).astype(np.uint8)
+    elif center is not None and width is not None:
+        function = str(frame_value(ds, frame, "FrameVOILUTSequence", "VOILUTFunction", "LINEAR"))
+        out = window_to_uint8(values, first_value(center), first_value(width), function)
+    else:
+        # No window in the file: stretch the bulk of the values, ignoring outliers
+        low, high = np.percentile(values, AUTO_WINDOW_PERCENTILES)
+        out = window_to_uint8(values, (low + high) / 2 + 0.5, max(high - low, 1.0) + 1)
+
+    if photometric == "MONOCHROME1":
+        np.subtract(255, out, out=out)
+    return Image.fromarray(out, "L")
+
+
+def require_pydicom():
+    """Frames are decoded one at a time and the LUTs come from pydicom.pixels, both new in pydicom 3."""
+    import pydicom
+    if int(pydicom.__version__.split(".")[0]) < 3:
+        raise RuntimeError(f"pydicom 3 or later is required to read DICOM images, found {pydicom.__version__}")
+
+
+def decoded_frames(path, first, last):
+    """Decode frames first..last-1 of a file, one at a time."""
+    from pydicom.pixels import iter_pixels
+    yield from zip(range(first, last), iter_pixels(path, indices=range(first, last)))
+
+
+def load_frame(path, frame=0):
+    """Display image of one frame of a DICOM file."""
+    import pydicom
+    require_pydicom()
+    ds = pydicom.dcmread(path, stop_before_pixels=True)
+    for index, pixels in decoded_frames(path, frame, frame + 1):
+        return display_pixels(ds, index, pixels)
+    raise ValueError("The DICOM file contains no image data")
+
+
+def short_name(uid):
+    # UIDs are up to 64 characters; three nested would overflow Windows' 260 character paths
+    return hashlib.sha1(uid.encode()).hexdigest()[:16]
+
+
+def convert_frames(path, first, count, folder):
+    """Window and save frames first..first+count-1 of a file with thumbnails; runs in a worker process.
+
+    Returns (frame, png path, thumbnail path) for each converted frame.
+    """
+    import pydicom
+    ds = pydicom.dcmread(path, stop_before_pixels=True)
+    last = min(first + count, int(ds.get("NumberOfFrames") or 1))
+    name = short_name(str(ds.get("SOPInstanceUID", "")) or path)
+    os.makedirs(os.path.join(folder, "thumbs"), exist_ok=True)
+    converted = []
+    for frame, pixels in decoded_frames(path, first, last):
+        image = display_pixels(ds, frame, pixels)
+        png = os.path.join(folder, f"{name}_{frame:04d}.png")
+        thumbnail = os.path.join(folder, "thumbs", f"{name}_{frame:04d}.png")
+        # Fast compression: a whole series is written at once and read back one slice at a time
+        image.save(png, compress_level=1)
+        image.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS, reducing_gap=2.0)
+        image.save(thumbnail)
+        converted.append((frame, png, thumbnail))
+    return converted
+
+
+def find_files(folder):
+    """(path, size, mtime) of every file under folder."""
+    for root, _, names in os.walk(folder):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime_ns
+
+
+class DicomIndex:
+    """Index of converted series in the cache, keyed by study and series UID.
+
+    A file is recorded with its size and modification time once all of its
+    frames are converted, so a folder that was opened before is listed from
+    here without decoding anything. Files that are not images are recorded
+    too, without a series, so they are not read again either.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(cache_dir, "index.db"))
+        with self.connection:
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS files(
+                path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, series_uid TEXT, sop_uid TEXT)''')
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS series(
+                series_uid TEXT PRIMARY KEY, study_uid TEXT, patient TEXT, date TEXT, modality TEXT,
+                description TEXT)''')
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS frames(
+                sop_uid TEXT, frame INTEGER, series_uid TEXT, instance INTEGER, png TEXT, thumbnail TEXT,
+                PRIMARY KEY (sop_uid, frame))''')
+            self.connection.execute("CREATE INDEX IF NOT EXISTS frames_by_series ON frames(series_uid, instance, frame)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS series_by_study ON series(study_uid)")
+
+    def series_folder(self, study_uid, series_uid):
+        return os.path.join(self.cache_dir, short_name(study_uid), short_name(series_uid))
+
+    def is_current(self, path, size, mtime):
+        row = self.connection.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        return row == (size, mtime)
+
+    def add_series(self, header):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)", (
+                header["series_uid"], header["study_uid"], header["patient"], header["date"],
+                header["modality"], header["description"]))
+
+    def add_file(self, path, size, mtime, header=None, frames=()):
+        with self.connection:
+            if header is not None:
+                self.connection.executemany("INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?)", [
+                    (header["sop_uid"], frame, header["series_uid"], header["instance"], png, thumbnail)
+                    for frame, png, thumbnail in frames])
+            self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (
+                path, size, mtime, header and header["series_uid"], header and header["sop_uid"]))
+
+    def series(self, folder):
+        """(series_uid, study_uid, patient, date, modality, description, frame count) of the files under folder."""
+        prefix = os.path.join(os.path.abspath(folder), "")
+        # A range on the primary key instead of LIKE, so the lookup uses the index
+        return self.connection.execute('''
+            SELECT s.series_uid, s.study_uid, s.patient, s.date, s.modality, s.description, COUNT(*)
+            FROM files f JOIN frames fr ON fr.sop_uid = f.sop_uid JOIN series s ON s.series_uid = f.series_uid
+            WHERE f.path >= ? AND f.path < ?
+            GROUP BY s.series_uid ORDER BY s.study_uid, s.series_uid''',
+            (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))).fetchall()
+
+    def frames(self, series_uid):
+        """(png, thumbnail) of every frame of a series in slice order."""
+        return self.connection.execute(
+            "SELECT png, thumbnail FROM frames WHERE series_uid = ? ORDER BY instance, sop_uid, frame",
+            (series_uid,)).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+class DicomIngest(threading.Thread):
+    """Converts every DICOM image under a folder into the cache on a process pool.
+
+    Headers are read and frames converted in worker processes; multi-frame
+    files are split into chunks of FRAMES_PER_TASK frames, so a single large
+    series also uses every core. Files already in the index are skipped.
+    Events on ``events`` are ('total', frames), ('converted', frames),
+    ('failed', path, message) and finally ('finished', cancelled).
+    """
+
+    def __init__(self, folder, cache_dir=CACHE_DIR, workers=None):
+        super().__init__(daemon=True)
+        self.folder = os.path.abspath(folder)
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        index = DicomIndex(self.cache_dir)
+        try:
+            require_pydicom()
+            stale = [entry for entry in find_files(self.folder) if not index.is_current(*entry)]
+            if stale:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    self.convert(pool, index, stale)
+        except Exception as e:
+            self.events.put(("failed", self.folder, str(e)))
+        finally:
+            index.close()
+            self.events.put(("finished", self.cancel_event.is_set()))
+
+    def convert(self, pool, index, stale):
+        headers = {pool.submit(read_header, path): (path, size, mtime) for path, size, mtime in stale}
+        files, tasks = {}, {}
+        for future in as_completed(headers):
+            path, size, mtime = headers[future]
+            try:
+                header = future.result()
+            except Exception as e:
+                self.events.put(("failed", path, str(e)))
+                continue
+            if header is None:
+                index.add_file(path, size, mtime)
+                continue
+            index.add_series(header)
+            folder = index.series_folder(header["study_uid"], header["series_uid"])
+            files[path] = {"size": size, "mtime": mtime, "header": header, "frames": [],
+                           "pending": 0}
+            for first in range(0, header["frames"], FRAMES_PER_TASK):
+                tasks[pool.submit(convert_frames, path, first, FRAMES_PER_TASK, folder)] = path
+                files[path]["pending"] += 1
+        self.events.put(("total", sum(entry["header"]["frames"] for entry in files.values())))
+
+        for future in as_completed(tasks):
+            path = tasks[future]
+            entry = files[path]
+            try:
+                converted = future.result()
+            except Exception as e:
+                self.events.put(("failed", path, str(e)))
+                entry["pending"] = -1  # never indexed, so the next open tries again
+                continue
+            self.events.put(("converted", len(converted)))
+            if entry["pending"] > 0:
+                entry["frames"] += converted
+                entry["pending"] -= 1
+                if entry["pending"] == 0:
+                    index.add_file(path, entry["size"], entry["mtime"], entry["header"], entry["frames"])
+            if self.cancel_event.is_set():
+                for other in tasks:
+                    other.cancel()
+                break
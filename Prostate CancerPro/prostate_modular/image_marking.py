@@ -1,15 +1,18 @@
-from tkinter import simpledialog, colorchooser, NW, LEFT
-from PIL import Image, ImageTk, ImageDraw
+from tkinter import simpledialog, colorchooser, LEFT
+from PIL import Image, ImageTk
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm
 from docxcompose.composer import Composer
 from docx import Document as Document_compose
 from customtkinter import CTkCanvas, CTkButton, CTkFrame, CTkLabel
 import os
-from math import radians, cos, sin, degrees, atan2
+from math import degrees, atan2
 from tkinter import EventType
 from tkinter.messagebox import askyesno
 from tkinter import colorchooser, filedialog
+from prostate_modular.annotations import AnnotationModel, MARK, OVAL, ellipse_points, oval_points
+from prostate_modular.history import History
+from prostate_modular.mark_renderer import MarkRenderer
 
 class ImageMarkingApp:
     def __init__(self, master, im_name, image, doc_template_name, type, entries_1=None):
@@ -56,6 +59,7 @@ class ImageMarkingApp:
         self.canvas.bind("<ButtonRelease-3>", self.end_draw)
         self.canvas.bind("<Double-Button-1>", self.draw_mark)
         self.canvas.bind("<Key>", self.add_oval)
+        self.bind_history_keys()
         # Button bar
         self.button_frame = CTkFrame(self.container, fg_color="transparent")
         self.button_frame.pack(pady=(10, 5))
@@ -63,12 +67,14 @@ class ImageMarkingApp:
         self.color_button.pack(side=LEFT, padx=8, pady=7)
         self.undo_button = CTkButton(self.button_frame, text="Undo", command=self.undo, fg_color=self.colors['warning'], hover_color="#d97706", corner_radius=8, width=90)
         self.undo_button.pack(side=LEFT, padx=8, pady=7)
+        self.redo_button = CTkButton(self.button_frame, text="Redo", command=self.redo, fg_color=self.colors['warning'], hover_color="#d97706", corner_radius=8, width=90)
+        self.redo_button.pack(side=LEFT, padx=8, pady=7)
         self.render_button = CTkButton(self.button_frame, text="Render to Word", command=self.render_to_word, fg_color=self.colors['primary'], hover_color=self.colors['accent'], corner_radius=8, width=160, text_color=self.colors['white'])
         self.render_button.pack(side=LEFT, padx=8, pady=7)
         self.clear_button = CTkButton(self.button_frame, text="Clear", command=self.clear, fg_color=self.colors['danger'], hover_color="#b91c1c", corner_radius=8, width=90)
         self.clear_button.pack(side=LEFT, padx=8, pady=7)
         # Instructions/legend
-        self.instructions = CTkLabel(self.container, text="Left click: move | Right click: draw oval | Double click: mark | Choose color, Undo, Render, Clear", font=("Arial", 13), text_color=self.colors['dark'], fg_color=self.colors['light'])
+        self.instructions = CTkLabel(self.container, text="Left click: move | Right click: draw oval | Double click: mark | Ctrl+Z: undo | Ctrl+Y: redo", font=("Arial", 13), text_color=self.colors['dark'], fg_color=self.colors['light'])
         self.instructions.pack(pady=(0, 10))
         # Status label
         self.status_label = CTkLabel(self.container, text="Ready", font=("Arial", 12), text_color=self.colors['secondary'], fg_color=self.colors['light'])
@@ -81,13 +87,22 @@ class ImageMarkingApp:
         self.image_name = im_name
         self.last_x, self.last_y, self.x, self.y = None, None, None, None
         self.temp = [0, 0, 0, 0, ""]
-        self.marked_ovals = []
-        self.marked_positions = []
+        # Ovals and marks with their canvas items, indexed for hit-testing
+        self.annotations = AnnotationModel()
         self.mark_radius = 14
         self.current_x, self.current_y = None, None
         self.selected_item = None
         self.button_clicked = False
+        # Edits as deltas of annotation records: ("add", records), ("move", id, before, after), ("clear", records)
+        self.history = History()
+        self.drag_start = None
+        # Print resolution composite, rendered in the background whenever the marks change
+        self.renderer = MarkRenderer(self.image_path, self.image.size)
+        self.renderer.start()
+        self.saved_version = None
         self.master.protocol("WM_DELETE_WINDOW", self.on_window_close)
+        # The window may also go away with its parent, e.g. once the marks are rendered to Word
+        self.master.bind("<Destroy>", self.on_destroy, add="+")
 
     def start_draw(self, event):
         """Start drawing the rotated oval."""
@@ -117,77 +132,51 @@ class ImageMarkingApp:
         else:
             self.angle = degrees(atan2(delta_y, delta_x))
 
-        if self.current_oval:
-            self.canvas.delete(self.current_oval)
-
         points = self.calculate_rotated_oval_points(center_x, center_y, width, height, self.angle)
-        self.current_oval = self.canvas.create_polygon(points, smooth=True, outline=self.colors["warning"], fill="")
+        # Reshape the one preview polygon instead of recreating it on every motion
+        if self.current_oval:
+            self.canvas.coords(self.current_oval, *points)
+        else:
+            self.current_oval = self.canvas.create_polygon(points, smooth=True, outline=self.colors["warning"], fill="", tags="drawn_oval")
 
     def end_draw(self, event):
         """Finalize the drawn rotated oval."""
         if self.current_oval:
-            self.marked_ovals.append((self.start_x, self.start_y, event.x, event.y, self.angle, self.color))
+            index = self.annotations.add(OVAL, (self.start_x, self.start_y, event.x, event.y), self.color, angle=self.angle)
+            self.annotations.item[index] = self.current_oval
+            self.history.push(("add", [self.annotations.record(index)]))
             self.current_oval = None
+            self.marks_changed()
     def calculate_rotated_oval_points(self, center_x, center_y, width, height, angle):
         """Calculate the points for a rotated oval."""
-        points = []
-        for i in range(0, 360, 5):
-            rad = radians(i)
-            x = center_x + (width / 2) * cos(rad)
-            y = center_y + (height / 2) * sin(rad)
-
-            rotated_x = center_x + (x - center_x) * cos(radians(angle)) - (y - center_y) * sin(radians(angle))
-            rotated_y = center_y + (x - center_x) * sin(radians(angle)) + (y - center_y) * cos(radians(angle))
-
-            points.extend([rotated_x, rotated_y])
-        return points
+        return ellipse_points(center_x, center_y, width, height, angle)
     def redraw_all_ovals(self):
-        """Redraw all marked ovals on the canvas."""
-        self.canvas.delete("all")
-        self.canvas.create_image(0, 0, anchor="nw", image=self.photo_img)
-        for oval in self.marked_ovals:
-            start_x, start_y, end_x, end_y, angle, color = oval
-            points = self.calculate_rotated_oval_points((start_x + end_x) // 2, (start_y + end_y) // 2, abs(end_x - start_x), abs(end_y - start_y), angle)
-            self.canvas.create_polygon(points, smooth=True, outline='yellow', fill="")
+        """Redraw all marked ovals and marks on the canvas."""
+        self.canvas.delete("drawn_oval")
+        self.canvas.delete("position")
+        for index in self.annotations.ids():
+            self.draw_annotation(index)
+    def draw_annotation(self, index):
+        """Create the canvas item of one annotation."""
+        box = self.annotations.box[index].tolist()
+        color = self.annotations.color_of(index)
+        if self.annotations.kind[index] == MARK:
+            item = self.canvas.create_oval(*box, width=1, fill=color, tags=("mark", "position"))
+        else:
+            points = oval_points(box, self.annotations.angle[index])
+            item = self.canvas.create_polygon(points, smooth=True, outline=self.colors["warning"], fill="", tags="drawn_oval")
+        self.annotations.item[index] = item
+    def marks_changed(self):
+        """Start compositing the current marks at print resolution in the background."""
+        self.renderer.request(self.annotations.version, self.annotations.snapshot(self.image.size))
     def img(self):
-        # Create a new blank image with RGBA mode
-        marked_image = Image.new("RGBA", (self.canvas.winfo_width(), self.canvas.winfo_height()), (255, 255, 255, 0))
-        draw = ImageDraw.Draw(marked_image)
-    
-        # Open the original image
-        image = Image.open(self.image_path)
-    
-        # Resize the original image to match the canvas size
-        resized_image = image.resize((self.canvas.winfo_width(), self.canvas.winfo_height()))
-    
-        # Paste the resized original image onto the marked image
-        marked_image.paste(resized_image, (0, 0))
-    
-        # Draw rotated ovals for marked ovals
-        if self.marked_ovals:
-            for oval in self.marked_ovals:
-                start_x, start_y, end_x, end_y, angle, color = oval
-                points = self.calculate_rotated_oval_points(
-                    (start_x + end_x) // 2, 
-                    (start_y + end_y) // 2, 
-                    abs(end_x - start_x), 
-                    abs(end_y - start_y), 
-                    angle
-                )
-                draw.polygon(points, outline="yellow", fill=None)
-    
-        # Draw ellipses for marked positions (if applicable)
-        if hasattr(self, "marked_positions") and self.marked_positions:
-            for x0, y0, x1, y1, fill, i, _ in self.marked_positions:
-                draw.ellipse([x0, y0, x1, y1], fill=fill)
-    
-        # Update the image on the canvas
-        self.photo = ImageTk.PhotoImage(marked_image)
-        self.canvas.delete("image")
-        self.canvas.create_image(0, 0, anchor=NW, image=self.photo, tags="image")
-    
-        # Save the marked image to a file
-        marked_image.save(self.image_name)
+        # The marks are composited at the template's native resolution, scaled to print width,
+        # usually already done in the background; unchanged marks are not rendered or saved again
+        version = self.annotations.version
+        if version != self.saved_version or not os.path.exists(self.image_name):
+            marked_image = self.renderer.result(version, self.annotations.snapshot(self.image.size))
+            marked_image.save(self.image_name)
+            self.saved_version = version
     
         # Optionally, update the canvas or perform additional actions
         if hasattr(self, "update_canvas"):
@@ -201,65 +190,71 @@ class ImageMarkingApp:
                 "You have not rendered the image to Word. Are you sure you want to close without saving your marks?"
             )
             if ask:
+                self.renderer.stop()
                 self.master.destroy()
             else:
                 self.master.focus_force()
         else:
+            self.renderer.stop()
             self.master.destroy()
-    def clear(self):
-        # Delete the existing canvas
-        self.canvas.destroy()
-        self.marked_ovals = []
-        self.marked_positions = []
-        # Create a new canvas with the new image
-        self.canvas = CTkCanvas(self.canvas_frame, width=1200, height=350, bg=self.colors['light'], highlightthickness=0)
-        self.canvas.pack()
+    def on_destroy(self, event):
+        if event.widget is self.master:
+            self.renderer.stop()
+    def clear(self, record=True):
+        indexes = self.annotations.ids()
+        if record and indexes:
+            self.history.push(("clear", [self.annotations.record(index) for index in indexes]))
+        # Only the annotation items go; the image and the bindings stay
+        for index in indexes:
+            self.annotations.remove(index)
+        self.canvas.delete("drawn_oval")
+        self.canvas.delete("position")
+        self.canvas.delete("oval")
+        self.selected_item = None
         self.canvas.focus_set()
-        self.canvas.create_image(0, 0, anchor=NW, image=self.photo_img, tags="image")    
-        # Bind the necessary events to the new canvas
-        self.canvas.bind("<ButtonPress-1>", self.on_press)
-        self.canvas.bind("<B1-Motion>", self.on_drag)
-        self.canvas.bind("<Button-3>", self.draw_ellipse)
-        self.canvas.bind("<B3-Motion>", self.draw_ellipse)
-        self.canvas.bind("<Double-Button-1>", self.draw_mark)
-        self.canvas.bind("<Key>", self.add_oval)
+        self.marks_changed()
+    def bind_history_keys(self):
+        # More specific than <Key>, so these do not also add an oval
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Control-z>", lambda event: self.undo())
+        self.canvas.bind("<Control-y>", lambda event: self.redo())
     def on_press(self, event):
         self.current_x, self.current_y = event.x, event.y
-        items = self.canvas.find_overlapping(event.x - 1, event.y - 1, event.x + 1, event.y + 1)
-        if items:
-            self.selected_item = items[-1]  # Select the topmost item
-        else:
-            self.selected_item = None
+        # The grid index finds the topmost annotation under the pointer without scanning them all
+        self.selected_item = self.annotations.hit_test(event.x, event.y)
+        if self.selected_item is not None:
+            self.drag_start = tuple(self.annotations.box[self.selected_item].tolist())
+    def on_release(self, event):
+        """Record a finished drag as one history step."""
+        if self.selected_item is None or self.drag_start is None:
+            return
+        before, self.drag_start = self.drag_start, None
+        after = tuple(self.annotations.box[self.selected_item].tolist())
+        if after != before:
+            self.history.push(("move", self.selected_item, before, after))
+            self.marks_changed()
     def on_drag(self, event):
+        if self.selected_item is None:
+            return
         dx = event.x - self.current_x
         dy = event.y - self.current_y    
-        # Move the selected item (circle) on the canvas
-        self.canvas.move(self.selected_item, dx, dy)    
         # Update the current mouse position
         self.current_x = event.x
         self.current_y = event.y    
-        # Update marked positions
-        if self.marked_positions:
-            for mark in self.marked_positions:
-                # Check if the selected item is the current circle in the list
-                if mark[-1] == self.selected_item:
-                    # Update coordinates for the selected circle
-                    x1, y1, x2, y2, _, _, _ = mark
-                    x1 += dx
-                    y1 += dy
-                    x2 += dx
-                    y2 += dy
-                    mark[0] = x1
-                    mark[1] = y1
-                    mark[2] = x2
-                    mark[3] = y2
-                    # Update the canvas with the new coordinates
-                    self.canvas.coords(self.selected_item, x1, y1, x2, y2)
-                    break  # Exit the loop after updating the selected circle
+        # Only the dragged item changes on the canvas
+        x1, y1, x2, y2 = self.annotations.box[self.selected_item].tolist()
+        self.annotations.move(self.selected_item, (x1 + dx, y1 + dy, x2 + dx, y2 + dy))
+        self.canvas.move(int(self.annotations.item[self.selected_item]), dx, dy)
     def add_oval(self, event):
         see = self.temp
-        self.marked_ovals.append(see)
-        self.temp = []
+        self.temp = [0, 0, 0, 0, ""]
+        # Only an ellipse drawn with draw_ellipse becomes an oval, not any key press
+        if len(see) < 4 or not any(see[:4]):
+            return
+        index = self.annotations.add(OVAL, see[:4], self.color)
+        self.draw_annotation(index)
+        self.history.push(("add", [self.annotations.record(index)]))
+        self.marks_changed()
     def draw_ellipse(self, event):
         x, y = event.x, event.y
         self.canvas.delete('oval')
@@ -277,10 +272,8 @@ class ImageMarkingApp:
         self.draw_mark_circle(event,num)     
         self.update_canvas()
     def draw_mark_circle(self, event, num):
-        t = 0
-        if self.marked_positions:
-            # Find the maximum index in the marked positions
-            t = max(mark[5] for mark in self.marked_positions) + 1
+        t = self.annotations.next_number()
+        added = []
         x, y = event.x, event.y
         color = colorchooser.askcolor(title="Choose Color")[1]
         self.master.focus_force()
@@ -289,19 +282,15 @@ class ImageMarkingApp:
             y1 = y - self.mark_radius
             x2 = x + self.mark_radius
             y2 = y + self.mark_radius
-            # Create the circle on the canvas and store its ID
-            mark_id = self.canvas.create_oval(x1, y1, x2, y2, width=1, fill=color, tags=("mark", "position"))
-            # Store the circle's coordinates and canvas ID in marked_positions
-            self.marked_positions.append([x1, y1, x2, y2, color, t + i, mark_id])
+            # Store the circle and create its canvas item
+            index = self.annotations.add(MARK, (x1, y1, x2, y2), color, number=t + i)
+            self.draw_annotation(index)
+            added.append(self.annotations.record(index))
+        if added:
+            self.history.push(("add", added))
+            self.marks_changed()
     def update_canvas(self):
-        if self.marked_ovals:
-            for oval in self.marked_ovals:
-                self.canvas.coords(oval, *self.get_scaled_coords(oval))
-                self.canvas.itemconfig(oval, outline="white", width=5, tags=("mark", "ellipse"))
-        if self.marked_positions:
-            for mark in self.marked_positions:
-                self.canvas.coords(mark, *self.get_scaled_coords(mark))
-                self.canvas.itemconfig(mark, fill=self.canvas.itemcget(mark, "fill"), tags=("mark", "position"))
+        # Canvas items are kept in sync as annotations change
         self.master.focus_force()
     def get(self):
         remove_list = []
@@ -382,23 +371,59 @@ class ImageMarkingApp:
                 showerror("Error", f"Error exporting: {str(e)}")
                 self.status_label.configure(text="Error exporting")
     def undo(self):
-        if self.marked_positions:
-            self.marked_positions.pop()
-        if self.marked_ovals:
-            self.marked_ovals.pop()
-        self.update_canvas()
+        """Revert the last edit; only the marks it touched change."""
+        entry = self.history.undo()
+        if entry is None:
+            return
+        kind = entry[0]
+        if kind == "add":
+            self.remove_annotations(record[0] for record in entry[1])
+        elif kind == "move":
+            self.move_annotation(entry[1], entry[2])
+        elif kind == "clear":
+            self.restore_annotations(entry[1])
+        self.marks_changed()
+    def redo(self):
+        """Apply the last undone edit again."""
+        entry = self.history.redo()
+        if entry is None:
+            return
+        kind = entry[0]
+        if kind == "add":
+            self.restore_annotations(entry[1])
+        elif kind == "move":
+            self.move_annotation(entry[1], entry[3])
+        elif kind == "clear":
+            self.clear(record=False)
+        self.marks_changed()
+    def remove_annotations(self, indexes):
+        for index in indexes:
+            self.canvas.delete(int(self.annotations.item[index]))
+            self.annotations.remove(index)
+        self.selected_item = None
+    def restore_annotations(self, records):
+        for record in records:
+            self.annotations.restore(record)
+            self.draw_annotation(record[0])
+    def move_annotation(self, index, box):
+        """Move one annotation and only its canvas item."""
+        self.annotations.move(index, box)
+        item = int(self.annotations.item[index])
+        if self.annotations.kind[index] == MARK:
+            self.canvas.coords(item, *box)
+        else:
+            self.canvas.coords(item, *oval_points(box, self.annotations.angle[index]))
     def change_color(self):
         new_color = colorchooser.askcolor(color=self.color)[1]
         if new_color:
             self.color = new_color
-        if self.selected_item:
-            if self.marked_positions:
-                for mark in self.marked_positions:
-                    # Check if the selected item is the current circle in the list
-                    if mark[-1] == self.selected_item:
-                        # Update coordinates for the selected circle
-                        x1, y1, x2, y2, c, _, _ = mark
-                        mark[4] = c
+        if self.selected_item is not None and new_color:
+            # Recolor the selected annotation
+            index = self.selected_item
+            self.annotations.set_color(index, new_color)
+            if self.annotations.kind[index] == MARK:
+                self.canvas.itemconfig(int(self.annotations.item[index]), fill=new_color)
+            self.marks_changed()
     def resize_image(self, image_path, new_width, new_height):
         image = Image.open(image_path)
         resized_image = image.resize((new_width, new_height))
@@ -0,0 +1,96 @@
+import threading
+
+from PIL import Image, ImageDraw
+
+from prostate_modular.annotations import OVAL
+
+PRINT_WIDTH = 1606  # 136 mm, the width of the image in the reports, at 300 dpi
+
+
+def export_size(size):
+    """Native size of the template, scaled up to at least print width."""
+    width, height = size
+    scale = max(1.0, PRINT_WIDTH / width)
+    return round(width * scale), round(height * scale)
+
+
+def render_marks(base, snapshot, line_width):
+    """Composite a snapshot of normalized annotations onto a copy of base."""
+    image = base.copy()
+    draw = ImageDraw.Draw(image)
+    width, height = image.size
+    for kind, coords, color in snapshot:
+        scaled = [value * (width if i % 2 == 0 else height) for i, value in enumerate(coords)]
+        if kind == OVAL:
+            draw.polygon(scaled, outline="yellow", width=line_width)
+        else:
+            draw.ellipse(scaled, fill=color)
+    return image
+
+
+class MarkRenderer(threading.Thread):
+    """Composites the marks onto the template at print resolution in the background.
+
+    The template is decoded and scaled once. Every request carries the
+    annotation version, and the finished image is kept until a newer
+    version is rendered, so saving again without edits does no work.
+    """
+
+    def __init__(self, image_path, display_size):
+        super().__init__(daemon=True)
+        self.image_path = image_path
+        self.display_size = display_size
+        self.condition = threading.Condition()
+        self.pending = None
+        self.version = None
+        self.image = None
+        self.error = None
+        self.running = True
+
+    def request(self, version, snapshot):
+        """Start rendering this version unless it is already done or queued."""
+        with self.condition:
+            if version != self.version and (self.pending is None or self.pending[0] != version):
+                self.pending = (version, snapshot)
+                self.condition.notify_all()
+
+    def result(self, version, snapshot):
+        """The composited image of this version, waiting for it if needed."""
+        self.request(version, snapshot)
+        with self.condition:
+            while self.version != version:
+                if not self.running:
+                    raise RuntimeError("The mark renderer has been stopped")
+                self.condition.wait()
+            if self.error is not None:
+                raise self.error
+            return self.image
+
+    def stop(self):
+        """End the thread once the current render, if any, is done."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def run(self):
+        base = None
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                version, snapshot = self.pending
+                self.pending = None
+            try:
+                if base is None:
+                    with Image.open(self.image_path) as template:
+                        base = template.convert("RGBA").resize(export_size(template.size), Image.LANCZOS)
+                # Outlines keep the thickness they have on screen
+                line_width = max(1, round(base.width / self.display_size[0]))
+                image, error = render_marks(base, snapshot, line_width), None
+            except Exception as e:
+                image, error = None, e
+            with self.condition:
+                self.version, self.image, self.error = version, image, error
+                self.condition.notify_all()
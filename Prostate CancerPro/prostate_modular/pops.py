@@ -4,11 +4,12 @@ from tkinter import simpledialog, Toplevel, filedialog
 from customtkinter import CTkLabel, CTkButton, CTkFrame, CTkEntry
 from tkinter.messagebox import showinfo
 from prostate_modular.utils import CustomCTkComboBox
-from customtkinter import CTkImage
+from customtkinter import CTkImage, CTkSlider
 from docxtpl import DocxTemplate, InlineImage
 from tkinter.filedialog import asksaveasfilename
 from tkinter.messagebox import showinfo, showerror
 from prostate_modular.database import DatabaseManager
+from prostate_modular.dicom_ingest import DicomIndex, DicomIngest, load_frame
 from prostate_modular.constant import entries_1, entries_2, entries_3
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm
@@ -1052,7 +1053,7 @@ def open_dicom_popup(parent):
     
     top = Toplevel(parent)
     top.title("DICOM to PNG Converter")
-    top.geometry("600x500")
+    top.geometry("640x800")
     top.config(bg=ACCENT)
     top.resizable(False, False)
 
@@ -1076,29 +1077,12 @@ def open_dicom_popup(parent):
         file_path = filedialog.askopenfilename(filetypes=[("DICOM files", "*.dcm")])
         if file_path:
             try:
-                import pydicom
-                from PIL import Image
-                ds = pydicom.dcmread(file_path)
-                
-                # Check if the DICOM file has pixel data
-                if not hasattr(ds, 'pixel_array'):
-                    showerror("Error", "The selected DICOM file doesn't contain image data")
-                    return
-                    
-                try:
-                    arr = ds.pixel_array
-                    img = Image.fromarray(arr)
-                    img = img.convert("L") if img.mode != "L" else img
-                    dicom_img['img'] = img
-                    show_image(img)
-                    width_entry.delete(0, 'end')
-                    height_entry.delete(0, 'end')
-                    width_entry.insert(0, img.width)
-                    height_entry.insert(0, img.height)
-                except Exception as e:
-                    showerror("Error", f"Failed to process DICOM image: {str(e)}")
+                # Rescaled and windowed like the series of a study folder
+                img = load_frame(file_path)
             except Exception as e:
                 showerror("Error", f"Failed to read DICOM file: {str(e)}")
+                return
+            set_image(img)
     top.state("normal")
     top.focus_force()
     select_btn = CTkButton(card, text="Select DICOM File", font=("Arial Black", 14),
@@ -1177,6 +1161,109 @@ def open_dicom_popup(parent):
                         corner_radius=10, command=save_png, width=120, height=32)
     save_btn.grid(row=3, column=2, columnspan=2, pady=(0, 10), padx=10, sticky="e")
 
+    # Study folders are converted in worker processes into the cache, then browsed by series
+    index = DicomIndex()
+    ingest = {'job': None, 'folder': None, 'failed': 0, 'frames': []}
+
+    def open_folder():
+        folder = filedialog.askdirectory(parent=top)
+        if not folder or ingest['job'] is not None:
+            return
+        ingest.update(folder=folder, failed=0, job=DicomIngest(folder))
+        progress.configure(value=0, maximum=1)
+        status_label.configure(text="Reading folder...")
+        folder_btn.configure(state="disabled")
+        ingest['job'].start()
+        poll_ingest()
+
+    def poll_ingest():
+        job = ingest['job']
+        if job is None or not top.winfo_exists():
+            return
+        while not job.events.empty():
+            event = job.events.get()
+            if event[0] == "total":
+                progress.configure(maximum=max(1, event[1]))
+            elif event[0] == "converted":
+                progress.configure(value=progress['value'] + event[1])
+                status_label.configure(text=f"Converted {int(progress['value'])} of {int(progress['maximum'])} images")
+            elif event[0] == "failed":
+                ingest['failed'] += 1
+            else:
+                ingest['job'] = None
+                folder_btn.configure(state="normal")
+                show_series(ingest['folder'])
+                return
+        top.after(100, poll_ingest)
+
+    def show_series(folder):
+        series_tree.delete(*series_tree.get_children())
+        rows = index.series(folder)
+        for series_uid, _, patient, date, modality, description, frames in rows:
+            series_tree.insert("", "end", iid=series_uid, values=(patient, date, modality, description, frames))
+        failed = f", {ingest['failed']} files failed" if ingest['failed'] else ""
+        status_label.configure(text=f"{len(rows)} series{failed}")
+        if rows:
+            series_tree.selection_set(rows[0][0])
+
+    def select_series(event=None):
+        selection = series_tree.selection()
+        if not selection:
+            return
+        frames = ingest['frames'] = index.frames(selection[0])
+        slider.configure(to=max(1, len(frames) - 1), number_of_steps=max(1, len(frames) - 1))
+        slider.set(len(frames) // 2)
+        show_slice(len(frames) // 2)
+
+    def show_slice(value):
+        frames = ingest['frames']
+        if not frames:
+            return
+        number = min(int(round(float(value))), len(frames) - 1)
+        with Image.open(frames[number][0]) as img:
+            img.load()
+        slice_label.configure(text=f"Slice {number + 1} / {len(frames)}")
+        set_image(img)
+
+    def close():
+        if ingest['job'] is not None:
+            ingest['job'].cancel()
+        index.close()
+        top.destroy()
+
+    folder_btn = CTkButton(card, text="Open Study Folder", font=("Arial Black", 14),
+                          fg_color=ACCENT, text_color=BTN_TEXT, hover_color="#047857",
+                          corner_radius=10, command=open_folder, width=160, height=36)
+    folder_btn.grid(row=4, column=0, columnspan=2, pady=(6, 6), padx=10, sticky="w")
+    status_label = CTkLabel(card, text="", font=("Arial", 12), text_color=TEXT_DARK, fg_color=CARD_BG)
+    status_label.grid(row=4, column=2, columnspan=2, pady=(6, 6), padx=10, sticky="e")
+
+    progress = ttk.Progressbar(card, mode="determinate")
+    progress.grid(row=5, column=0, columnspan=4, pady=(0, 6), padx=10, sticky="we")
+
+    series_tree = ttk.Treeview(card, columns=("patient", "date", "modality", "description", "frames"),
+                               show="headings", height=5)
+    for column, heading, width in (("patient", "Patient", 130), ("date", "Date", 80), ("modality", "Modality", 70),
+                                   ("description", "Series", 160), ("frames", "Images", 60)):
+        series_tree.heading(column, text=heading)
+        series_tree.column(column, width=width, stretch=column == "description")
+    series_tree.grid(row=6, column=0, columnspan=4, pady=(0, 6), padx=10, sticky="we")
+    series_tree.bind("<<TreeviewSelect>>", select_series)
+
+    slider = CTkSlider(card, from_=0, to=1, command=show_slice, button_color=ACCENT)
+    slider.grid(row=7, column=0, columnspan=3, pady=(0, 12), padx=10, sticky="we")
+    slice_label = CTkLabel(card, text="", font=("Arial", 12), text_color=TEXT_DARK, fg_color=CARD_BG)
+    slice_label.grid(row=7, column=3, pady=(0, 12), padx=10, sticky="e")
+    top.protocol("WM_DELETE_WINDOW", close)
+
+    def set_image(img):
+        dicom_img['img'] = img
+        show_image(img)
+        width_entry.delete(0, 'end')
+        height_entry.delete(0, 'end')
+        width_entry.insert(0, img.width)
+        height_entry.insert(0, img.height)
+
     # Image preview function
     def show_image(img):
         img_resized = img.copy()
@@ -1197,6 +1284,7 @@ def open_dicom_popup(parent):
     card.grid_rowconfigure(1, weight=0)
     card.grid_rowconfigure(2, weight=0)
     card.grid_rowconfigure(3, weight=0)
+    card.grid_rowconfigure((4, 5, 6, 7), weight=0)
     card.grid_columnconfigure((0,1,2,3), weight=1)
 
 
@@ -1,12 +1,21 @@
 import sys
+import os
+import asyncio
 import serial
 import serial.tools.list_ports
 import threading
+import queue
+import struct
+import zlib
 import time
 import json
 import csv
 import io
 import re
+import bisect
+from collections import deque
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QComboBox, QTableWidget, 
@@ -15,7 +24,7 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QAction, QFileDialog, QDialog, QGridLayout, QCheckBox,
                             QSpinBox, QTabWidget, QLineEdit, QTextBrowser, QFrame,
                             QSizePolicy, QHeaderView, QSlider, QStatusBar, QToolBar,
-                            QScrollArea, QSpacerItem)
+                            QScrollArea, QSpacerItem, QInputDialog)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot, QTimer, QPropertyAnimation, QEasingCurve
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QPainter, QColor, QBrush, QPen, QLinearGradient, QPalette
 
@@ -180,72 +189,159 @@ class ModernComboBox(QComboBox):
         """)
 
 
+class DiscoveryCache:
+    """Persistent cache of the last (port, baud rate, device) found per port."""
+    
+    def __init__(self, file_name=None):
+        self.file_name = file_name or os.path.join(
+            os.path.expanduser("~"), ".arduino_serial_monitor_ports.json")
+        self.lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(self.file_name, 'r') as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+    
+    def get(self, port):
+        return self.entries.get(port)
+    
+    def store(self, port, baud_rate, device_info):
+        with self.lock:
+            self.entries[port] = {
+                "baud_rate": baud_rate,
+                "device_info": device_info,
+                "last_seen": time.time()
+            }
+            try:
+                with open(self.file_name, 'w') as file:
+                    json.dump(self.entries, file, indent=2)
+            except OSError:
+                pass  # The cache is only an optimisation
+
+
 class ArduinoDetector(QThread):
-    """Enhanced thread for detecting Arduino devices and their baud rates."""
+    """Enhanced thread for detecting Arduino devices and their baud rates.
+    
+    Accepts a single port or a list of ports. All ports are scanned
+    concurrently, each port is opened once per baud rate and every test
+    command is tried within that session. Baud rates that answered before
+    (from the discovery cache) are tried first.
+    """
     device_found = pyqtSignal(str, int, str)  # port, baud_rate, device_info
     scan_progress = pyqtSignal(int)
     scan_complete = pyqtSignal()
     scan_error = pyqtSignal(str)
     status_update = pyqtSignal(str)
     
-    def __init__(self, port):
+    common_baud_rates = [9600, 19200, 38400, 57600, 74880, 115200, 230400, 250000, 500000, 1000000]
+    test_commands = [b'I\n', b'INFO\n', b'?\n', b'STATUS\n', b'\n']
+    reset_delay = 2.0  # Arduino boards reset when the port is opened
+    response_timeout = 0.5
+    
+    def __init__(self, port, cache=None):
         super().__init__()
-        self.port = port
+        self.ports = [port] if isinstance(port, str) else list(port)
+        self.port = self.ports[0] if len(self.ports) == 1 else ", ".join(self.ports)
         self.running = True
-        self.common_baud_rates = [9600, 19200, 38400, 57600, 74880, 115200, 230400, 250000, 500000, 1000000]
-        self.test_commands = [b'I\n', b'INFO\n', b'?\n', b'STATUS\n', b'\n']
+        self.cache = cache if cache is not None else DiscoveryCache()
+        self.progress_lock = threading.Lock()
+        self.completed_tests = 0
     
     def run(self):
-        total_tests = len(self.common_baud_rates) * len(self.test_commands)
-        current_test = 0
+        self.completed_tests = 0
+        total_tests = len(self.ports) * len(self.common_baud_rates)
+        
+        # Previously seen ports first so known boards come up quickly
+        ports = sorted(self.ports, key=lambda p: self.cache.get(p) is None)
         
-        for baud_rate in self.common_baud_rates:
+        with ThreadPoolExecutor(max_workers=max(1, len(ports))) as executor:
+            futures = {executor.submit(self.scan_port, port, total_tests): port for port in ports}
+            for future in as_completed(futures):
+                port = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = None
+                    self.status_update.emit(f"Scan of {port} failed: {e}")
+                
+                if result:
+                    baud_rate, device_info = result
+                    self.cache.store(port, baud_rate, device_info)
+                    self.device_found.emit(port, baud_rate, device_info)
+                elif self.running:
+                    self.scan_error.emit(f"Could not detect valid Arduino on {port}")
+        
+        self.scan_progress.emit(100)
+        self.scan_complete.emit()
+    
+    def ordered_baud_rates(self, port):
+        """Return the baud rates to try, last known good rate first."""
+        baud_rates = list(self.common_baud_rates)
+        cached = self.cache.get(port)
+        if cached and cached.get("baud_rate") in baud_rates:
+            baud_rates.remove(cached["baud_rate"])
+            baud_rates.insert(0, cached["baud_rate"])
+        return baud_rates
+    
+    def scan_port(self, port, total_tests):
+        """Try each baud rate on one port; return (baud_rate, device_info) or None."""
+        for baud_rate in self.ordered_baud_rates(port):
             if not self.running:
-                break
+                return None
             
-            self.status_update.emit(f"Testing {self.port} at {baud_rate} baud...")
+            self.status_update.emit(f"Testing {port} at {baud_rate} baud...")
+            
+            try:
+                response = self.probe(port, baud_rate)
+            except Exception:
+                response = None  # Try next baud rate
+            
+            with self.progress_lock:
+                self.completed_tests += 1
+                self.scan_progress.emit(int(self.completed_tests / total_tests * 100))
+            
+            if response:
+                return baud_rate, self.identify_device(response)
+        
+        return None
+    
+    def probe(self, port, baud_rate):
+        """Open the port once and try every test command; return the response."""
+        with serial.Serial(port, baud_rate, timeout=0.1) as ser:
+            # Wait out the reset, but accept a boot banner as soon as it arrives
+            response = self.read_response(ser, self.reset_delay)
+            if self.is_meaningful(response):
+                return response
             
             for command in self.test_commands:
                 if not self.running:
-                    break
-                    
-                current_test += 1
-                self.scan_progress.emit(int(current_test / total_tests * 100))
+                    return None
                 
-                try:
-                    ser = serial.Serial(self.port, baud_rate, timeout=1)
-                    time.sleep(2)  # Allow time for Arduino reset
-                    
-                    # Clear any existing data
-                    ser.flushInput()
-                    
-                    # Send test command
-                    ser.write(command)
-                    time.sleep(0.5)
-                    
-                    # Check for response
-                    response = ""
-                    attempts = 3
-                    for _ in range(attempts):
-                        if ser.in_waiting > 0:
-                            response += ser.readline().decode('utf-8', errors='ignore').strip()
-                        time.sleep(0.2)
-                    
-                    if response and len(response) > 2:
-                        # We got a meaningful response
-                        device_info = self.identify_device(response)
-                        ser.close()
-                        self.device_found.emit(self.port, baud_rate, device_info)
-                        self.scan_complete.emit()
-                        return
-                    
-                    ser.close()
-                    
-                except Exception as e:
-                    pass  # Try next combination
-        
-        self.scan_error.emit(f"Could not detect valid Arduino on {self.port}")
-        self.scan_complete.emit()
+                ser.reset_input_buffer()
+                ser.write(command)
+                response = self.read_response(ser, self.response_timeout)
+                if self.is_meaningful(response):
+                    return response
+        
+        return None
+    
+    def read_response(self, ser, timeout):
+        """Collect complete lines from the port until one looks meaningful or time runs out."""
+        response = ""
+        deadline = time.time() + timeout
+        while self.running and time.time() < deadline:
+            if ser.in_waiting > 0:
+                response += ser.readline().decode('utf-8', errors='ignore').strip()
+                if self.is_meaningful(response):
+                    break
+            else:
+                time.sleep(0.02)
+        return response
+    
+    @staticmethod
+    def is_meaningful(response):
+        return bool(response) and len(response) > 2
     
     def identify_device(self, response):
         """Try to identify the Arduino device type from its response."""
@@ -285,6 +381,8 @@ class SerialReader(QThread):
         self.running = True
         self.paused = False
         self.serial = None
+        self.recorder = None  # Optional SessionRecorder fed from this thread
+        self.statistics = None  # Optional StreamStatistics fed from this thread
         self.stats = {
             "messages_received": 0,
             "bytes_received": 0,
@@ -319,6 +417,10 @@ class SerialReader(QThread):
                                 
                                 # Parse and emit the data
                                 parsed_data, data_type = self.parse_data(line)
+                                if self.recorder is not None:
+                                    self.recorder.record(self.port, line, parsed_data, data_type)
+                                if self.statistics is not None:
+                                    self.statistics.update(self.port, parsed_data)
                                 self.data_received.emit(self.port, parsed_data, data_type)
                                 
                                 # Emit stats periodically
@@ -341,7 +443,8 @@ class SerialReader(QThread):
             if self.serial and self.serial.is_open:
                 self.serial.close()
     
-    def parse_data(self, data_str):
+    @classmethod
+    def parse_data(cls, data_str):
         """Enhanced data parsing with type detection."""
         original_str = data_str
         
@@ -396,7 +499,7 @@ class SerialReader(QThread):
         # Try space-separated numeric values
         try:
             values = data_str.split()
-            if len(values) > 1 and all(self.is_numeric(v) for v in values):
+            if len(values) > 1 and all(cls.is_numeric(v) for v in values):
                 numeric_values = []
                 for v in values:
                     try:
@@ -411,7 +514,7 @@ class SerialReader(QThread):
             pass
         
         # Check if it's a single numeric value
-        if self.is_numeric(data_str):
+        if cls.is_numeric(data_str):
             try:
                 if '.' in data_str:
                     return float(data_str), "Float"
@@ -423,7 +526,8 @@ class SerialReader(QThread):
         # Return as string
         return original_str, "String"
     
-    def is_numeric(self, value):
+    @staticmethod
+    def is_numeric(value):
         """Check if a string represents a numeric value."""
         try:
             float(value)
@@ -441,19 +545,975 @@ class SerialReader(QThread):
             self.serial.close()
 
 
+class PortChannel:
+    """State of one port multiplexed by AsyncSerialEngine.
+    
+    Exposes the same controls as SerialReader (``serial``, ``stats``,
+    ``recorder``, ``toggle_pause`` and ``stop``) so the monitor can treat
+    both alike.
+    """
+    
+    def __init__(self, engine, port, baud_rate):
+        self.engine = engine
+        self.port = port
+        self.baud_rate = baud_rate
+        self.running = True
+        self.paused = False
+        self.serial = None
+        self.recorder = None
+        self.statistics = None
+        self.buffer = ""
+        self.poll_task = None
+        self.stats_dirty = False
+        self.stats = {
+            "messages_received": 0,
+            "bytes_received": 0,
+            "errors": 0,
+            "start_time": time.time(),
+            "last_message_time": None
+        }
+    
+    def feed(self, raw_bytes):
+        """Split incoming bytes into lines, parse them and queue them for the GUI."""
+        chunk = raw_bytes.decode('utf-8', errors='ignore')
+        self.buffer += chunk
+        self.stats["bytes_received"] += len(chunk)
+        self.stats_dirty = True
+        
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            line = line.strip()
+            
+            if line:
+                self.stats["messages_received"] += 1
+                self.stats["last_message_time"] = time.time()
+                
+                parsed_data, data_type = SerialReader.parse_data(line)
+                if self.recorder is not None:
+                    self.recorder.record(self.port, line, parsed_data, data_type)
+                if self.statistics is not None:
+                    self.statistics.update(self.port, parsed_data)
+                if self.engine.rule_engine is not None:
+                    self.engine.rule_engine.add(self.stats["last_message_time"], self.port, line, parsed_data)
+                self.engine.pending.append((self.port, parsed_data, data_type))
+    
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.engine.call_in_loop(self.engine.update_reader, self)
+        return self.paused
+    
+    def stop(self):
+        self.running = False
+        self.engine.call_in_loop(self.engine.close_channel, self)
+
+
+class AsyncSerialEngine(QThread):
+    """Multiplexes every connected port in a single asyncio event loop.
+    
+    On POSIX the serial file descriptors are registered with the loop, so
+    idle ports cost nothing. Where file descriptors are not available
+    (Windows) each port falls back to a polling task that backs off while
+    the port is idle. Parsed messages are delivered to Qt in batches.
+    """
+    data_batch = pyqtSignal(list)  # [(port, data, data_type), ...]
+    connection_error = pyqtSignal(str, str)
+    stats_updated = pyqtSignal(str, dict)  # port, stats
+    alert_triggered = pyqtSignal(dict)
+    
+    reset_delay = 2.0  # Allow time for Arduino reset
+    
+    def __init__(self, flush_interval=0.05, stats_interval=0.5):
+        super().__init__()
+        self.flush_interval = flush_interval
+        self.stats_interval = stats_interval
+        self.channels = {}
+        self.pending = []
+        self.rule_engine = None  # Optional RuleEngine evaluated once per flush
+        self.loop = None
+        self.ready = threading.Event()
+    
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self.flush_loop())
+        self.ready.set()
+        
+        try:
+            self.loop.run_forever()
+        finally:
+            for channel in list(self.channels.values()):
+                self.close_channel(channel)
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+    
+    def call_in_loop(self, callback, *args):
+        """Schedule a callback on the engine thread."""
+        self.ready.wait()
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(callback, *args)
+    
+    def add_port(self, port, baud_rate):
+        """Open a port on the engine thread and return its channel."""
+        channel = PortChannel(self, port, baud_rate)
+        self.call_in_loop(self.open_channel, channel)
+        return channel
+    
+    def open_channel(self, channel):
+        self.channels[channel.port] = channel
+        self.loop.create_task(self.start_channel(channel))
+    
+    async def start_channel(self, channel):
+        try:
+            channel.serial = serial.Serial(channel.port, channel.baud_rate, timeout=0)
+            await asyncio.sleep(self.reset_delay)
+            self.update_reader(channel)
+        except Exception as e:
+            self.fail(channel, e)
+    
+    @staticmethod
+    def fileno(channel):
+        try:
+            return channel.serial.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+    
+    def update_reader(self, channel):
+        """Register or unregister a channel with the loop according to its state."""
+        if channel.serial is None or not channel.serial.is_open:
+            return
+        
+        active = channel.running and not channel.paused
+        fd = self.fileno(channel)
+        
+        if fd is not None:
+            if active:
+                self.loop.add_reader(fd, self.on_readable, channel)
+            else:
+                self.loop.remove_reader(fd)
+        elif active and channel.poll_task is None:
+            channel.poll_task = self.loop.create_task(self.poll_channel(channel))
+        elif not active and channel.poll_task is not None:
+            channel.poll_task.cancel()
+            channel.poll_task = None
+    
+    def on_readable(self, channel):
+        try:
+            data = channel.serial.read(channel.serial.in_waiting or 1)
+            if data:
+                channel.feed(data)
+        except Exception as e:
+            self.fail(channel, e)
+    
+    async def poll_channel(self, channel):
+        """Fallback for ports without a selectable file descriptor."""
+        delay = 0.01
+        while channel.running:
+            try:
+                waiting = channel.serial.in_waiting
+                if waiting:
+                    channel.feed(channel.serial.read(waiting))
+                    delay = 0.01
+                else:
+                    delay = min(delay * 2, 0.1)
+            except Exception as e:
+                self.fail(channel, e)
+                return
+            await asyncio.sleep(delay)
+    
+    def fail(self, channel, error):
+        if channel.running:
+            channel.stats["errors"] += 1
+            self.connection_error.emit(channel.port, str(error))
+        self.close_channel(channel)
+    
+    def close_channel(self, channel):
+        channel.running = False
+        if self.channels.get(channel.port) is channel:
+            del self.channels[channel.port]
+        
+        fd = self.fileno(channel)
+        if fd is not None:
+            self.loop.remove_reader(fd)
+        if channel.poll_task is not None:
+            channel.poll_task.cancel()
+            channel.poll_task = None
+        if channel.serial and channel.serial.is_open:
+            channel.serial.close()
+    
+    async def flush_loop(self):
+        """Hand parsed messages to Qt in batches and publish stats periodically."""
+        last_stats = time.time()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            
+            if self.pending:
+                batch, self.pending = self.pending, []
+                self.data_batch.emit(batch)
+            
+            if self.rule_engine is not None:
+                for alert in self.rule_engine.process():
+                    self.alert_triggered.emit(alert)
+            
+            if time.time() - last_stats >= self.stats_interval:
+                last_stats = time.time()
+                for channel in self.channels.values():
+                    if channel.stats_dirty:
+                        channel.stats_dirty = False
+                        self.stats_updated.emit(channel.port, channel.stats.copy())
+    
+    def stop(self):
+        self.call_in_loop(self.loop.stop)
+
+
+class SessionRecorder(QThread):
+    """Background thread that streams every parsed message to an append-only file.
+
+    Messages are queued from the reader threads and written in batches, so the
+    GUI never touches the disk and the table row limit does not apply.
+    Supported formats are CSV, JSON-lines and a compact binary format made of
+    zlib-compressed JSON-lines blocks. Files are rotated once they reach
+    ``max_bytes``.
+    """
+    recording_error = pyqtSignal(str)
+    file_rotated = pyqtSignal(str)
+
+    BINARY_MAGIC = b"SREC1\n"
+    CSV_HEADER = ["timestamp", "port", "data_type", "raw", "data"]
+
+    def __init__(self, file_name, file_format=None, batch_size=500,
+                 flush_interval=1.0, max_bytes=256 * 1024 * 1024, queue_size=100000):
+        super().__init__()
+        base, ext = os.path.splitext(file_name)
+        self.base_name = base
+        self.extension = ext or ".jsonl"
+        self.file_format = file_format or self.format_for_extension(self.extension)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.running = True
+        self.file = None
+        self.csv_writer = None
+        self.segment = 0
+        self.current_file = None
+        self.stats = {
+            "records_written": 0,
+            "bytes_written": 0,
+            "dropped": 0,
+            "files": []
+        }
+
+    @staticmethod
+    def format_for_extension(extension):
+        """Map a file extension to a recording format."""
+        extension = extension.lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".srec", ".bin"):
+            return "binary"
+        return "jsonl"
+
+    def record(self, port, raw, data, data_type):
+        """Queue a parsed message for writing. Safe to call from any thread."""
+        if not self.running:
+            return
+        try:
+            # Block briefly rather than drop when the disk falls behind
+            self.queue.put((time.time(), port, data_type, raw, data), timeout=1.0)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def run(self):
+        try:
+            self.open_next_file()
+            last_flush = time.time()
+
+            while self.running or not self.queue.empty():
+                batch = []
+                try:
+                    batch.append(self.queue.get(timeout=self.flush_interval))
+                    while len(batch) < self.batch_size:
+                        batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    pass
+
+                if batch:
+                    self.write_batch(batch)
+
+                if time.time() - last_flush >= self.flush_interval:
+                    self.file.flush()
+                    last_flush = time.time()
+
+                if self.file.tell() >= self.max_bytes:
+                    self.open_next_file()
+
+        except Exception as e:
+            self.recording_error.emit(str(e))
+
+        finally:
+            if self.file:
+                self.file.flush()
+                self.file.close()
+                self.file = None
+
+    def open_next_file(self):
+        """Close the current segment and start a new one."""
+        if self.file:
+            self.file.flush()
+            self.file.close()
+
+        self.segment += 1
+        self.current_file = f"{self.base_name}_{self.segment:03d}{self.extension}"
+
+        if self.file_format == "csv":
+            self.file = open(self.current_file, 'w', newline='', encoding='utf-8')
+            self.csv_writer = csv.writer(self.file)
+            self.csv_writer.writerow(self.CSV_HEADER)
+        elif self.file_format == "binary":
+            self.file = open(self.current_file, 'wb')
+            self.file.write(self.BINARY_MAGIC)
+        else:
+            self.file = open(self.current_file, 'w', encoding='utf-8')
+
+        self.stats["files"].append(self.current_file)
+        self.file_rotated.emit(self.current_file)
+
+    def write_batch(self, batch):
+        """Write a batch of queued records in the configured format."""
+        if self.file_format == "csv":
+            self.csv_writer.writerows(
+                [timestamp, port, data_type, raw, json.dumps(data)]
+                for timestamp, port, data_type, raw, data in batch)
+        else:
+            payload = "".join(
+                json.dumps({"t": timestamp, "port": port, "type": data_type,
+                            "raw": raw, "data": data}) + "\n"
+                for timestamp, port, data_type, raw, data in batch)
+            if self.file_format == "binary":
+                block = zlib.compress(payload.encode('utf-8'))
+                self.file.write(struct.pack(">I", len(block)))
+                self.file.write(block)
+            else:
+                self.file.write(payload)
+
+        self.stats["records_written"] += len(batch)
+        self.stats["bytes_written"] = self.file.tell()
+
+    def stop(self):
+        """Stop accepting records; queued records are still written out."""
+        self.running = False
+
+
+class SessionReplayer(SerialReader):
+    """Replays recorded sessions through the normal parser and data signals.
+
+    A ``speed`` of 0 replays as fast as possible, otherwise the original
+    inter-message timing is divided by ``speed`` (1x, 10x, ...).
+    """
+
+    def __init__(self, file_names, speed=1.0):
+        super().__init__(f"Replay: {os.path.basename(file_names[0])}", 0)
+        self.file_names = list(file_names)
+        self.speed = speed
+
+    def run(self):
+        try:
+            first_time = None
+            start = time.time()
+
+            for timestamp, port, raw in self.iter_records():
+                if not self.running:
+                    break
+
+                if first_time is None:
+                    first_time = timestamp
+                if self.speed > 0:
+                    target = start + (timestamp - first_time) / self.speed
+                    while self.running and (self.paused or time.time() < target):
+                        if self.paused:
+                            # Shift the schedule so a pause does not cause a burst
+                            start += 0.05
+                            target += 0.05
+                        time.sleep(min(0.05, max(target - time.time(), 0.001)))
+                else:
+                    while self.running and self.paused:
+                        time.sleep(0.05)
+
+                self.stats["messages_received"] += 1
+                self.stats["bytes_received"] += len(raw)
+                self.stats["last_message_time"] = time.time()
+
+                parsed_data, data_type = self.parse_data(raw)
+                if self.statistics is not None:
+                    self.statistics.update(port, parsed_data)
+                self.data_received.emit(port, parsed_data, data_type)
+
+                if self.stats["messages_received"] % 10 == 0:
+                    self.stats_updated.emit(self.port, self.stats.copy())
+
+            self.stats_updated.emit(self.port, self.stats.copy())
+
+        except Exception as e:
+            if self.running:
+                self.stats["errors"] += 1
+                self.connection_error.emit(self.port, str(e))
+
+    def iter_records(self):
+        """Yield (timestamp, port, raw line) from every recording file in order."""
+        for file_name in self.file_names:
+            file_format = SessionRecorder.format_for_extension(os.path.splitext(file_name)[1])
+
+            if file_format == "csv":
+                with open(file_name, 'r', newline='', encoding='utf-8') as file:
+                    for row in csv.DictReader(file):
+                        yield float(row["timestamp"]), row["port"], row["raw"]
+
+            elif file_format == "binary":
+                with open(file_name, 'rb') as file:
+                    if file.read(len(SessionRecorder.BINARY_MAGIC)) != SessionRecorder.BINARY_MAGIC:
+                        raise ValueError(f"{file_name} is not a session recording")
+                    while True:
+                        header = file.read(4)
+                        if len(header) < 4:
+                            break
+                        (length,) = struct.unpack(">I", header)
+                        block = zlib.decompress(file.read(length)).decode('utf-8')
+                        for line in block.splitlines():
+                            record = json.loads(line)
+                            yield record["t"], record["port"], record["raw"]
+
+            else:
+                with open(file_name, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        if line.strip():
+                            record = json.loads(line)
+                            yield record["t"], record["port"], record["raw"]
+
+
+class RollingWindow:
+    """Fixed-size sliding window with O(1) mean, std, min and max.
+    
+    Mean and variance use the sliding form of Welford's update; min and max
+    are kept with monotonic deques so every update is amortised O(1).
+    """
+    
+    def __init__(self, size=1000):
+        self.size = size
+        self.values = deque()
+        self.min_deque = deque()  # (index, value), increasing values
+        self.max_deque = deque()  # (index, value), decreasing values
+        self.index = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def add(self, value):
+        self.values.append(value)
+        count = len(self.values)
+        
+        if count > self.size:
+            old = self.values.popleft()
+            count -= 1
+            old_mean = self.mean
+            self.mean += (value - old) / count
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+        else:
+            delta = value - self.mean
+            self.mean += delta / count
+            self.m2 += delta * (value - self.mean)
+        
+        while self.min_deque and self.min_deque[-1][1] >= value:
+            self.min_deque.pop()
+        self.min_deque.append((self.index, value))
+        while self.max_deque and self.max_deque[-1][1] <= value:
+            self.max_deque.pop()
+        self.max_deque.append((self.index, value))
+        
+        oldest = self.index - self.size
+        if self.min_deque[0][0] <= oldest:
+            self.min_deque.popleft()
+        if self.max_deque[0][0] <= oldest:
+            self.max_deque.popleft()
+        self.index += 1
+    
+    @property
+    def count(self):
+        return len(self.values)
+    
+    @property
+    def last(self):
+        return self.values[-1] if self.values else None
+    
+    @property
+    def minimum(self):
+        return self.min_deque[0][1] if self.min_deque else None
+    
+    @property
+    def maximum(self):
+        return self.max_deque[0][1] if self.max_deque else None
+    
+    @property
+    def std(self):
+        count = len(self.values)
+        return (max(self.m2, 0.0) / (count - 1)) ** 0.5 if count > 1 else 0.0
+
+
+class QuantileSketch:
+    """P-square streaming estimator for a single quantile in O(1) memory."""
+    
+    def __init__(self, quantile):
+        self.p = quantile
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+        self.count = 0
+    
+    def add(self, value):
+        self.count += 1
+        q = self.heights
+        
+        if len(q) < 5:
+            bisect.insort(q, value)
+            return
+        
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = bisect.bisect_right(q, value) - 1
+        
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+    
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return self.heights[int(round(self.p * (len(self.heights) - 1)))]
+        return self.heights[2]
+
+
+class RateCounter:
+    """Message rate over a sliding window of one-second buckets."""
+    
+    def __init__(self, window_seconds=10):
+        self.window_seconds = window_seconds
+        self.buckets = deque()  # [second, count]
+    
+    def add(self, timestamp):
+        second = int(timestamp)
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += 1
+        else:
+            self.buckets.append([second, 1])
+        self.expire(second)
+    
+    def expire(self, now_second):
+        while self.buckets and self.buckets[0][0] <= now_second - self.window_seconds:
+            self.buckets.popleft()
+    
+    def rate(self, now=None):
+        now = time.time() if now is None else now
+        self.expire(int(now))
+        if not self.buckets:
+            return 0.0
+        elapsed = min(self.window_seconds, now - self.buckets[0][0])
+        return sum(count for _, count in self.buckets) / max(elapsed, 1.0)
+
+
+class ChannelStatistics:
+    """Rolling statistics and quantile sketches for one numeric channel."""
+    
+    quantiles = (0.5, 0.95, 0.99)
+    
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self.window = RollingWindow(window_size)
+        self.sketches = self.new_sketches()
+        self.previous_sketches = None
+    
+    def new_sketches(self):
+        return {q: QuantileSketch(q) for q in self.quantiles}
+    
+    def add(self, value):
+        self.window.add(value)
+        # Sketches restart every window so percentiles follow drift
+        if self.sketches[self.quantiles[0]].count >= self.window_size:
+            self.previous_sketches = self.sketches
+            self.sketches = self.new_sketches()
+        for sketch in self.sketches.values():
+            sketch.add(value)
+    
+    def percentile(self, quantile):
+        sketch = self.sketches[quantile]
+        if self.previous_sketches and sketch.count < self.window_size // 2:
+            sketch = self.previous_sketches[quantile]
+        return sketch.value()
+    
+    def snapshot(self):
+        window = self.window
+        result = {
+            "count": window.count,
+            "last": window.last,
+            "mean": window.mean,
+            "min": window.minimum,
+            "max": window.maximum,
+            "std": window.std
+        }
+        for quantile in self.quantiles:
+            result[f"p{int(quantile * 100)}"] = self.percentile(quantile)
+        return result
+
+
+class StreamStatistics:
+    """Streaming per-port and per-channel statistics for parsed serial data.
+    
+    Updated from the reader threads for every message and read by the GUI
+    on a timer. Numeric values become channels named after their key (dicts)
+    or position (lists). Per port it tracks the sliding message rate and the
+    inter-arrival interval, whose standard deviation is reported as jitter;
+    intervals longer than ``gap_factor`` times the mean are counted as gaps,
+    which usually means lost packets.
+    """
+    
+    def __init__(self, window_size=1000, rate_window=10, gap_factor=3.0):
+        self.window_size = window_size
+        self.rate_window = rate_window
+        self.gap_factor = gap_factor
+        self.lock = threading.Lock()
+        self.ports = {}
+        self.total_rate = RateCounter(rate_window)
+    
+    def new_port(self):
+        return {
+            "rate": RateCounter(self.rate_window),
+            "intervals": RollingWindow(self.window_size),
+            "last_arrival": None,
+            "gaps": 0,
+            "channels": {}
+        }
+    
+    @staticmethod
+    def numeric_values(data):
+        """Yield (channel name, value) for every numeric value in a parsed message."""
+        if isinstance(data, bool):
+            return
+        if isinstance(data, (int, float)):
+            yield "value", data
+        elif isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield str(key), value
+        elif isinstance(data, list):
+            for index, value in enumerate(data):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield f"ch{index}", value
+                elif isinstance(value, str) and SerialReader.is_numeric(value):
+                    yield f"ch{index}", float(value)
+    
+    def update(self, port, data, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        
+        with self.lock:
+            state = self.ports.get(port)
+            if state is None:
+                state = self.ports[port] = self.new_port()
+            
+            state["rate"].add(timestamp)
+            self.total_rate.add(timestamp)
+            
+            if state["last_arrival"] is not None:
+                interval = timestamp - state["last_arrival"]
+                intervals = state["intervals"]
+                if intervals.count > 10 and interval > self.gap_factor * intervals.mean:
+                    state["gaps"] += 1
+                intervals.add(interval)
+            state["last_arrival"] = timestamp
+            
+            channels = state["channels"]
+            for name, value in self.numeric_values(data):
+                channel = channels.get(name)
+                if channel is None:
+                    channel = channels[name] = ChannelStatistics(self.window_size)
+                channel.add(value)
+    
+    def message_rate(self, port=None):
+        with self.lock:
+            if port is None:
+                return self.total_rate.rate()
+            state = self.ports.get(port)
+            return state["rate"].rate() if state else 0.0
+    
+    def snapshot(self, port):
+        """Return the current statistics for one port, or None if nothing was seen."""
+        with self.lock:
+            state = self.ports.get(port)
+            if state is None:
+                return None
+            intervals = state["intervals"]
+            return {
+                "rate": state["rate"].rate(),
+                "interval_mean": intervals.mean if intervals.count else None,
+                "jitter": intervals.std,
+                "gaps": state["gaps"],
+                "channels": {name: channel.snapshot()
+                             for name, channel in state["channels"].items()}
+            }
+    
+    def reset(self, port=None):
+        with self.lock:
+            if port is None:
+                self.ports.clear()
+                self.total_rate = RateCounter(self.rate_window)
+            else:
+                self.ports.pop(port, None)
+
+
+class AlertRule:
+    """A single alert condition evaluated by RuleEngine.
+    
+    ``threshold`` rules compare a channel value, ``rate`` rules compare its
+    absolute rate of change per second and ``pattern`` rules match a regular
+    expression against the raw line. An empty ``port`` matches every port.
+    """
+    KINDS = ["threshold", "rate", "pattern"]
+    OPERATORS = [">", ">=", "<", "<=", "==", "!="]
+    
+    def __init__(self, name, kind="threshold", channel="", operator=">", value=0.0,
+                 pattern="", port="", cooldown=1.0, capture=True):
+        self.name = name
+        self.kind = kind
+        self.channel = channel
+        self.operator = operator
+        self.value = float(value)
+        self.pattern = pattern
+        self.port = port
+        self.cooldown = float(cooldown)
+        self.capture = capture
+    
+    def describe(self):
+        if self.kind == "pattern":
+            return f"raw =~ /{self.pattern}/"
+        subject = self.channel if self.kind == "threshold" else f"d({self.channel})/dt"
+        return f"{subject} {self.operator} {self.value:g}"
+    
+    def to_dict(self):
+        return dict(self.__dict__)
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class RuleEngine:
+    """Evaluates alert rules on batches of parsed records and captures trigger windows.
+    
+    Records are added from the serial engine thread as they are parsed and
+    evaluated together once per flush. Numeric rules are evaluated with NumPy
+    over all values of a channel in the batch at once. When a rule with
+    ``capture`` fires, the records from ``pre_seconds`` before to
+    ``post_seconds`` after the trigger are taken from the history ring buffer
+    and written to ``capture_dir`` as JSON lines on a background thread.
+    """
+    OPERATORS = {
+        ">": np.greater, ">=": np.greater_equal,
+        "<": np.less, "<=": np.less_equal,
+        "==": np.equal, "!=": np.not_equal
+    }
+    
+    def __init__(self, rules=(), pre_seconds=2.0, post_seconds=2.0,
+                 capture_dir=None, history_size=200000):
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.capture_dir = capture_dir or os.path.join(os.path.expanduser("~"), "serial_captures")
+        self.history = deque(maxlen=history_size)
+        self.batch = []
+        self.last_values = {}  # (port, channel) -> (timestamp, value) from the previous batch
+        self.last_fired = {}  # rule name -> timestamp
+        self.open_captures = []
+        self.set_rules(rules)
+    
+    def set_rules(self, rules):
+        """Replace the rule set. Call on the thread that runs process()."""
+        self.rules = list(rules)
+        rules_by_channel = {}
+        for rule in self.rules:
+            if rule.kind in ("threshold", "rate") and rule.channel:
+                rules_by_channel.setdefault(rule.channel, []).append(rule)
+        self.rules_by_channel = rules_by_channel
+        self.pattern_rules = [(rule, re.compile(rule.pattern))
+                              for rule in self.rules if rule.kind == "pattern" and rule.pattern]
+    
+    def add(self, timestamp, port, raw, data):
+        self.batch.append((timestamp, port, raw, data))
+    
+    def process(self):
+        """Evaluate the records added since the last call; return the fired alerts."""
+        batch, self.batch = self.batch, []
+        alerts = []
+        
+        if batch:
+            self.history.extend(batch)
+            if self.rules:
+                self.evaluate(batch, alerts)
+            for capture in self.open_captures:
+                capture["records"].extend(
+                    record for record in batch
+                    if capture["start"] <= record[0] <= capture["end"]
+                    and record[0] > capture["last_time"])
+        
+        self.finish_captures(time.time())
+        return alerts
+    
+    def evaluate(self, batch, alerts):
+        if self.rules_by_channel:
+            series = {}
+            for timestamp, port, raw, data in batch:
+                for channel, value in StreamStatistics.numeric_values(data):
+                    if channel in self.rules_by_channel:
+                        times, values = series.setdefault((port, channel), ([], []))
+                        times.append(timestamp)
+                        values.append(value)
+            
+            for (port, channel), (times, values) in series.items():
+                times = np.asarray(times, dtype=np.float64)
+                values = np.asarray(values, dtype=np.float64)
+                previous = self.last_values.get((port, channel))
+                self.last_values[(port, channel)] = (times[-1], values[-1])
+                
+                for rule in self.rules_by_channel[channel]:
+                    if rule.port and rule.port != port:
+                        continue
+                    
+                    if rule.kind == "threshold":
+                        metric_times, metric = times, values
+                    else:
+                        if previous is not None:
+                            all_times = np.concatenate(([previous[0]], times))
+                            all_values = np.concatenate(([previous[1]], values))
+                        else:
+                            all_times, all_values = times, values
+                        if all_values.size < 2:
+                            continue
+                        elapsed = np.maximum(np.diff(all_times), 1e-6)
+                        metric = np.abs(np.diff(all_values)) / elapsed
+                        metric_times = all_times[1:]
+                    
+                    hits = np.flatnonzero(self.OPERATORS[rule.operator](metric, rule.value))
+                    if hits.size:
+                        index = hits[0]
+                        self.fire(rule, metric_times[index], port, float(metric[index]), alerts)
+        
+        for rule, regex in self.pattern_rules:
+            for timestamp, port, raw, data in batch:
+                if (not rule.port or rule.port == port) and regex.search(raw):
+                    self.fire(rule, timestamp, port, raw, alerts)
+                    break
+    
+    def fire(self, rule, timestamp, port, value, alerts):
+        if timestamp - self.last_fired.get(rule.name, float("-inf")) < rule.cooldown:
+            return
+        self.last_fired[rule.name] = timestamp
+        
+        alert = {
+            "time": float(timestamp),
+            "port": port,
+            "rule": rule.name,
+            "condition": rule.describe(),
+            "value": value,
+            "capture_file": None
+        }
+        
+        if rule.capture:
+            stamp = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+            safe_name = re.sub(r"[^\w-]", "_", rule.name)
+            alert["capture_file"] = os.path.join(self.capture_dir, f"capture_{safe_name}_{stamp}.jsonl")
+            
+            start = timestamp - self.pre_seconds
+            records = [record for record in self.history if record[0] >= start]
+            self.open_captures.append({
+                "alert": alert,
+                "start": start,
+                "end": timestamp + self.post_seconds,
+                "records": records,
+                "last_time": records[-1][0] if records else start
+            })
+        
+        alerts.append(alert)
+    
+    def finish_captures(self, now):
+        """Write out captures whose post-trigger window has elapsed."""
+        still_open = []
+        for capture in self.open_captures:
+            if capture["records"]:
+                capture["last_time"] = capture["records"][-1][0]
+            if now >= capture["end"]:
+                threading.Thread(target=self.write_capture, args=(capture,), daemon=True).start()
+            else:
+                still_open.append(capture)
+        self.open_captures = still_open
+    
+    def write_capture(self, capture):
+        alert = capture["alert"]
+        try:
+            os.makedirs(self.capture_dir, exist_ok=True)
+            with open(alert["capture_file"], 'w', encoding='utf-8') as file:
+                file.write(json.dumps({"alert": alert}) + "\n")
+                for timestamp, port, raw, data in capture["records"]:
+                    if timestamp <= capture["end"]:
+                        file.write(json.dumps({"t": timestamp, "port": port,
+                                               "raw": raw, "data": data}) + "\n")
+        except OSError:
+            pass  # Capturing must never interrupt reading
+
+
 class DataStatsWidget(QWidget):
-    """Widget for displaying data statistics."""
+    """Widget for displaying data statistics.
+    
+    Counters come from the reader stats via ``update_stats``; rate, jitter
+    and per-channel values are read from a StreamStatistics engine on a timer.
+    """
+    
+    channel_columns = ["Channel", "Last", "Mean", "Min", "Max", "Std", "P50", "P95"]
     
     def __init__(self):
         super().__init__()
+        self.statistics = None
+        self.port = None
         self.init_ui()
+        
+        self.refresh_timer = QTimer()
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(500)
     
     def init_ui(self):
         layout = QGridLayout()
         
         # Create stat labels with modern styling
         self.stats_labels = {}
-        stats = ["Messages", "Bytes", "Errors", "Rate (msg/s)", "Uptime"]
+        stats = ["Messages", "Bytes", "Errors", "Rate (msg/s)", "Uptime", "Jitter (ms)", "Gaps"]
         
         for i, stat in enumerate(stats):
             # Label
@@ -480,20 +1540,57 @@ class DataStatsWidget(QWidget):
             
             self.stats_labels[stat.split()[0].lower()] = value_label
         
+        # Per-channel rolling statistics
+        self.channel_table = QTableWidget()
+        self.channel_table.setColumnCount(len(self.channel_columns))
+        self.channel_table.setHorizontalHeaderLabels(self.channel_columns)
+        self.channel_table.verticalHeader().setVisible(False)
+        self.channel_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.channel_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        layout.addWidget(self.channel_table, (len(stats) + 2) // 3, 0, 1, 6)
+        
         self.setLayout(layout)
     
+    def set_source(self, statistics, port):
+        """Show the streaming statistics of ``port`` from ``statistics``."""
+        self.statistics = statistics
+        self.port = port
+        self.refresh()
+    
+    def refresh(self):
+        """Read the current rolling statistics from the engine."""
+        if self.statistics is None or self.port is None or not self.isVisible():
+            return
+        
+        snapshot = self.statistics.snapshot(self.port)
+        if snapshot is None:
+            return
+        
+        self.stats_labels["rate"].setText(f"{snapshot['rate']:.1f}")
+        self.stats_labels["jitter"].setText(f"{snapshot['jitter'] * 1000:.2f}")
+        self.stats_labels["gaps"].setText(str(snapshot["gaps"]))
+        
+        channels = snapshot["channels"]
+        self.channel_table.setRowCount(len(channels))
+        for row, (name, values) in enumerate(sorted(channels.items())):
+            cells = [name] + [values[key] for key in ("last", "mean", "min", "max", "std", "p50", "p95")]
+            for col, value in enumerate(cells):
+                text = f"{value:.4g}" if isinstance(value, float) else str(value)
+                item = self.channel_table.item(row, col)
+                if item is None:
+                    self.channel_table.setItem(row, col, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+    
     def update_stats(self, stats):
         """Update the statistics display."""
         self.stats_labels["messages"].setText(str(stats.get("messages_received", 0)))
         self.stats_labels["bytes"].setText(f"{stats.get('bytes_received', 0):,}")
         self.stats_labels["errors"].setText(str(stats.get("errors", 0)))
         
-        # Calculate message rate
+        # Rate comes from the streaming statistics in refresh()
         uptime = time.time() - stats.get("start_time", time.time())
         if uptime > 0:
-            rate = stats.get("messages_received", 0) / uptime
-            self.stats_labels["rate"].setText(f"{rate:.1f}")
-            
             # Format uptime
             hours, remainder = divmod(int(uptime), 3600)
             minutes, seconds = divmod(remainder, 60)
@@ -694,6 +1791,165 @@ class TableSettingsDialog(QDialog):
         return self.settings
 
 
+class AlertRulesDialog(QDialog):
+    """Dialog for editing alert rules and trigger capture settings."""
+    
+    def __init__(self, parent=None, rules=None, pre_seconds=2, post_seconds=2):
+        super().__init__(parent)
+        self.setWindowTitle("Alert Rules")
+        self.resize(700, 450)
+        self.rules = [AlertRule.from_dict(rule.to_dict()) for rule in (rules or [])]
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.init_ui()
+        self.refresh_rules_table()
+    
+    def init_ui(self):
+        layout = QVBoxLayout()
+        
+        self.rules_table = QTableWidget()
+        self.rules_table.setColumnCount(5)
+        self.rules_table.setHorizontalHeaderLabels(["Name", "Port", "Condition", "Cooldown (s)", "Capture"])
+        self.rules_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.rules_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.rules_table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.rules_table)
+        
+        # New rule form
+        form = QGridLayout()
+        
+        self.name_edit = QLineEdit()
+        self.name_edit.setPlaceholderText("Rule name")
+        form.addWidget(QLabel("Name:"), 0, 0)
+        form.addWidget(self.name_edit, 0, 1)
+        
+        self.port_edit = QLineEdit()
+        self.port_edit.setPlaceholderText("Any port")
+        form.addWidget(QLabel("Port:"), 0, 2)
+        form.addWidget(self.port_edit, 0, 3)
+        
+        self.kind_combo = QComboBox()
+        self.kind_combo.addItems(AlertRule.KINDS)
+        form.addWidget(QLabel("Type:"), 1, 0)
+        form.addWidget(self.kind_combo, 1, 1)
+        
+        self.channel_edit = QLineEdit()
+        self.channel_edit.setPlaceholderText("Key, e.g. temp or ch0")
+        form.addWidget(QLabel("Channel:"), 1, 2)
+        form.addWidget(self.channel_edit, 1, 3)
+        
+        self.operator_combo = QComboBox()
+        self.operator_combo.addItems(AlertRule.OPERATORS)
+        form.addWidget(QLabel("Operator:"), 2, 0)
+        form.addWidget(self.operator_combo, 2, 1)
+        
+        self.value_edit = QLineEdit("0")
+        form.addWidget(QLabel("Value:"), 2, 2)
+        form.addWidget(self.value_edit, 2, 3)
+        
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setPlaceholderText("Regular expression for pattern rules")
+        form.addWidget(QLabel("Pattern:"), 3, 0)
+        form.addWidget(self.pattern_edit, 3, 1, 1, 3)
+        
+        self.cooldown_spin = QSpinBox()
+        self.cooldown_spin.setRange(0, 3600)
+        self.cooldown_spin.setValue(1)
+        form.addWidget(QLabel("Cooldown (s):"), 4, 0)
+        form.addWidget(self.cooldown_spin, 4, 1)
+        
+        self.capture_cb = QCheckBox("Capture window to disk")
+        self.capture_cb.setChecked(True)
+        form.addWidget(self.capture_cb, 4, 2, 1, 2)
+        
+        layout.addLayout(form)
+        
+        rule_buttons = QHBoxLayout()
+        add_button = ModernButton("Add Rule", "secondary")
+        add_button.clicked.connect(self.add_rule)
+        remove_button = ModernButton("Remove Selected", "danger")
+        remove_button.clicked.connect(self.remove_rule)
+        rule_buttons.addWidget(add_button)
+        rule_buttons.addWidget(remove_button)
+        rule_buttons.addStretch()
+        layout.addLayout(rule_buttons)
+        
+        # Capture window
+        capture_layout = QHBoxLayout()
+        capture_layout.addWidget(QLabel("Capture before trigger (s):"))
+        self.pre_spin = QSpinBox()
+        self.pre_spin.setRange(0, 60)
+        self.pre_spin.setValue(int(self.pre_seconds))
+        capture_layout.addWidget(self.pre_spin)
+        capture_layout.addWidget(QLabel("after trigger (s):"))
+        self.post_spin = QSpinBox()
+        self.post_spin.setRange(0, 60)
+        self.post_spin.setValue(int(self.post_seconds))
+        capture_layout.addWidget(self.post_spin)
+        capture_layout.addStretch()
+        layout.addLayout(capture_layout)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.ok_button = ModernButton("Apply", "primary")
+        self.ok_button.clicked.connect(self.accept)
+        self.cancel_button = ModernButton("Cancel", "neutral")
+        self.cancel_button.clicked.connect(self.reject)
+        
+        button_layout.addStretch()
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.ok_button)
+        
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+    
+    def refresh_rules_table(self):
+        self.rules_table.setRowCount(len(self.rules))
+        for row, rule in enumerate(self.rules):
+            self.rules_table.setItem(row, 0, QTableWidgetItem(rule.name))
+            self.rules_table.setItem(row, 1, QTableWidgetItem(rule.port or "Any"))
+            self.rules_table.setItem(row, 2, QTableWidgetItem(rule.describe()))
+            self.rules_table.setItem(row, 3, QTableWidgetItem(f"{rule.cooldown:g}"))
+            self.rules_table.setItem(row, 4, QTableWidgetItem("Yes" if rule.capture else "No"))
+    
+    def add_rule(self):
+        name = self.name_edit.text().strip() or f"Rule {len(self.rules) + 1}"
+        kind = self.kind_combo.currentText()
+        
+        try:
+            value = float(self.value_edit.text() or 0)
+            if kind == "pattern":
+                re.compile(self.pattern_edit.text())
+        except (ValueError, re.error) as e:
+            QMessageBox.warning(self, "Invalid Rule", str(e))
+            return
+        
+        if kind != "pattern" and not self.channel_edit.text().strip():
+            QMessageBox.warning(self, "Invalid Rule", "Threshold and rate rules need a channel")
+            return
+        
+        self.rules.append(AlertRule(
+            name, kind,
+            channel=self.channel_edit.text().strip(),
+            operator=self.operator_combo.currentText(),
+            value=value,
+            pattern=self.pattern_edit.text(),
+            port=self.port_edit.text().strip(),
+            cooldown=self.cooldown_spin.value(),
+            capture=self.capture_cb.isChecked()))
+        self.refresh_rules_table()
+    
+    def remove_rule(self):
+        rows = sorted({index.row() for index in self.rules_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            del self.rules[row]
+        self.refresh_rules_table()
+    
+    def get_settings(self):
+        """Return (rules, pre_seconds, post_seconds)."""
+        return self.rules, self.pre_spin.value(), self.post_spin.value()
+
+
 class ArduinoSerialMonitor(QMainWindow):
     """Enhanced main application window with modern UI and improved functionality."""
     
@@ -708,6 +1964,19 @@ class ArduinoSerialMonitor(QMainWindow):
         self.connected_devices = {}
         self.device_stats = {}
         self.previous_values = {}  # For change highlighting
+        self.session_recorder = None
+        self.discovery_cache = DiscoveryCache()
+        self.stream_stats = StreamStatistics()
+        self.rule_engine = RuleEngine()
+        
+        # All connected ports share one event-driven reader thread
+        self.serial_engine = AsyncSerialEngine()
+        self.serial_engine.data_batch.connect(self.handle_data_batch)
+        self.serial_engine.connection_error.connect(self.handle_connection_error)
+        self.serial_engine.stats_updated.connect(self.update_device_stats)
+        self.serial_engine.alert_triggered.connect(self.handle_alert)
+        self.serial_engine.rule_engine = self.rule_engine
+        self.serial_engine.start()
         
         # Enhanced table settings
         self.table_settings = {
@@ -731,6 +2000,11 @@ class ArduinoSerialMonitor(QMainWindow):
         self.refresh_timer.timeout.connect(self.refresh_ports)
         self.refresh_timer.start(3000)  # Refresh every 3 seconds
         
+        # Message rate is read from the streaming statistics, not per message
+        self.rate_timer = QTimer()
+        self.rate_timer.timeout.connect(self.update_message_rate)
+        self.rate_timer.start(1000)
+        
         # Animation for status updates
         self.status_animation = QPropertyAnimation(self.statusBar(), b"geometry")
         self.status_animation.setDuration(300)
@@ -1156,6 +2430,21 @@ class ArduinoSerialMonitor(QMainWindow):
         raw_tab.setLayout(raw_layout)
         self.data_tabs.addTab(raw_tab, "📝 Raw Data")
         
+        # Alerts tab
+        alerts_tab = QWidget()
+        alerts_layout = QVBoxLayout()
+        
+        self.alerts_table = QTableWidget()
+        self.alerts_table.setColumnCount(5)
+        self.alerts_table.setHorizontalHeaderLabels(["Time", "Port", "Rule", "Value", "Capture"])
+        self.alerts_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.alerts_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.alerts_table.horizontalHeader().setStretchLastSection(True)
+        alerts_layout.addWidget(self.alerts_table)
+        
+        alerts_tab.setLayout(alerts_layout)
+        self.data_tabs.addTab(alerts_tab, "🚨 Alerts")
+        
         # Chart view tab (placeholder for future enhancement)
         chart_tab = QWidget()
         chart_layout = QVBoxLayout()
@@ -1285,6 +2574,22 @@ class ArduinoSerialMonitor(QMainWindow):
         
         file_menu.addSeparator()
         
+        self.start_recording_action = QAction("⏺️ Start Recording...", self)
+        self.start_recording_action.setShortcut("Ctrl+R")
+        self.start_recording_action.triggered.connect(self.start_recording)
+        file_menu.addAction(self.start_recording_action)
+        
+        self.stop_recording_action = QAction("⏹️ Stop Recording", self)
+        self.stop_recording_action.triggered.connect(self.stop_recording)
+        self.stop_recording_action.setEnabled(False)
+        file_menu.addAction(self.stop_recording_action)
+        
+        replay_action = QAction("▶️ Replay Recording...", self)
+        replay_action.triggered.connect(self.replay_recording)
+        file_menu.addAction(replay_action)
+        
+        file_menu.addSeparator()
+        
         save_settings_action = QAction("💾 Save Settings", self)
         save_settings_action.triggered.connect(self.save_settings)
         file_menu.addAction(save_settings_action)
@@ -1331,6 +2636,10 @@ class ArduinoSerialMonitor(QMainWindow):
         send_command_action.triggered.connect(self.show_send_command_dialog)
         tools_menu.addAction(send_command_action)
         
+        alert_rules_action = QAction("🚨 Alert Rules...", self)
+        alert_rules_action.triggered.connect(self.show_alert_rules)
+        tools_menu.addAction(alert_rules_action)
+        
         tools_menu.addSeparator()
         
         data_analysis_action = QAction("📊 Data Analysis", self)
@@ -1385,19 +2694,29 @@ class ArduinoSerialMonitor(QMainWindow):
             self.show_notification("No serial ports available", "warning")
             return
         
+        ports = [self.port_combo.itemData(i) for i in range(self.port_combo.count())]
+        ports = [port for port in ports
+                 if port not in self.connected_devices and port not in self.serial_detectors]
+        
+        if not ports:
+            self.show_notification("All ports are already connected or being scanned", "info")
+            return
+        
         self.show_notification(f"Scanning {len(ports)} ports...", "info")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        
+        # One detector scans every port concurrently
+        detector = ArduinoDetector(ports, self.discovery_cache)
+        detector.device_found.connect(self.device_detected)
+        detector.scan_progress.connect(self.update_scan_progress)
+        detector.scan_complete.connect(lambda p=ports: [self.scan_completed(port) for port in p])
+        detector.scan_error.connect(self.show_error)
+        detector.status_update.connect(self.update_scan_status)
         
         for port in ports:
-            if port not in self.connected_devices and port not in self.serial_detectors:
-                detector = ArduinoDetector(port)
-                detector.device_found.connect(self.device_detected)
-                detector.scan_progress.connect(self.update_scan_progress)
-                detector.scan_complete.connect(lambda p=port: self.scan_completed(p))
-                detector.scan_error.connect(self.show_error)
-                detector.status_update.connect(self.update_scan_status)
-                
-                self.serial_detectors[port] = detector
-                detector.start()
+            self.serial_detectors[port] = detector
+        detector.start()
     
     def show_notification(self, message, msg_type="info"):
         """Show a modern notification message."""
@@ -1479,7 +2798,7 @@ class ArduinoSerialMonitor(QMainWindow):
         self.scan_btn.setEnabled(False)
         self.connect_btn.setEnabled(False)
         
-        detector = ArduinoDetector(port_data)
+        detector = ArduinoDetector(port_data, self.discovery_cache)
         detector.device_found.connect(self.device_detected)
         detector.scan_progress.connect(self.update_scan_progress)
         detector.scan_complete.connect(lambda: self.scan_completed(port_data))
@@ -1499,6 +2818,11 @@ class ArduinoSerialMonitor(QMainWindow):
         # Automatically connect
         self.connect_to_device(port, baud_rate, device_info)
     
+    @pyqtSlot(str)
+    def show_error(self, message):
+        """Show an error reported by a background thread."""
+        self.show_notification(message, "error")
+    
     @pyqtSlot(str)
     def update_scan_status(self, status):
         """Update scan status in the UI."""
@@ -1552,11 +2876,10 @@ class ArduinoSerialMonitor(QMainWindow):
     def connect_to_device(self, port, baud_rate, device_info):
         """Connect to a specific device with given parameters."""
         try:
-            # Create and start the serial reader
-            reader = SerialReader(port, baud_rate)
-            reader.data_received.connect(self.handle_data)
-            reader.connection_error.connect(self.handle_connection_error)
-            reader.stats_updated.connect(self.update_device_stats)
+            # Hand the port to the shared serial engine
+            reader = self.serial_engine.add_port(port, baud_rate)
+            reader.recorder = self.session_recorder
+            reader.statistics = self.stream_stats
             
             self.connected_devices[port] = {
                 "reader": reader,
@@ -1565,8 +2888,6 @@ class ArduinoSerialMonitor(QMainWindow):
                 "connected": True
             }
             
-            reader.start()
-            
             # Update UI
             self.update_devices_table()
             self.connect_btn.setEnabled(False)
@@ -1641,6 +2962,12 @@ class ArduinoSerialMonitor(QMainWindow):
             self.devices_table.setItem(row, 2, QTableWidgetItem(str(device_info["baud_rate"])))
             self.devices_table.setItem(row, 3, QTableWidgetItem("Connected" if device_info["connected"] else "Disconnected"))
     
+    @pyqtSlot(list)
+    def handle_data_batch(self, batch):
+        """Handle a batch of messages delivered by the serial engine."""
+        for port, data, data_type in batch:
+            self.handle_data(port, data, data_type)
+    
     @pyqtSlot(str, object, str)
     def handle_data(self, port, data, data_type):
         """Handle incoming data from a device."""
@@ -1670,9 +2997,6 @@ class ArduinoSerialMonitor(QMainWindow):
             self.process_numeric_array_data(port, data, timestamp_item)
         else:
             self.process_string_data(port, data, timestamp_item)
-        
-        # Update message rate
-        self.update_message_rate()
     
     def process_json_data(self, port, data, timestamp_item):
         """Process JSON formatted data."""
@@ -1761,17 +3085,50 @@ class ArduinoSerialMonitor(QMainWindow):
             for i, column in enumerate(new_columns, current_column_count):
                 self.data_table.setHorizontalHeaderItem(i, QTableWidgetItem(column))
     
+    @pyqtSlot(dict)
+    def handle_alert(self, alert):
+        """Log an alert fired by the rule engine."""
+        timestamp = datetime.fromtimestamp(alert["time"]).strftime("%H:%M:%S.%f")[:-3]
+        value = alert["value"]
+        value_text = f"{value:.4g}" if isinstance(value, float) else str(value)
+        
+        row = self.alerts_table.rowCount()
+        self.alerts_table.insertRow(row)
+        self.alerts_table.setItem(row, 0, QTableWidgetItem(timestamp))
+        self.alerts_table.setItem(row, 1, QTableWidgetItem(alert["port"]))
+        self.alerts_table.setItem(row, 2, QTableWidgetItem(f"{alert['rule']} ({alert['condition']})"))
+        self.alerts_table.setItem(row, 3, QTableWidgetItem(value_text))
+        self.alerts_table.setItem(row, 4, QTableWidgetItem(alert["capture_file"] or ""))
+        
+        if self.alerts_table.rowCount() > self.table_settings["row_limit"]:
+            self.alerts_table.removeRow(0)
+        self.alerts_table.scrollToBottom()
+        
+        self.show_notification(f"Alert '{alert['rule']}' on {alert['port']}: {value_text}", "warning")
+    
+    def show_alert_rules(self):
+        """Show the alert rules dialog and push the rules to the serial engine."""
+        dialog = AlertRulesDialog(self, self.rule_engine.rules,
+                                  self.rule_engine.pre_seconds, self.rule_engine.post_seconds)
+        if dialog.exec_() == QDialog.Accepted:
+            rules, pre_seconds, post_seconds = dialog.get_settings()
+            self.apply_alert_rules(rules, pre_seconds, post_seconds)
+            self.show_notification(f"{len(rules)} alert rules active", "success")
+    
+    def apply_alert_rules(self, rules, pre_seconds, post_seconds):
+        """Replace the rule set on the engine thread."""
+        def update():
+            self.rule_engine.pre_seconds = pre_seconds
+            self.rule_engine.post_seconds = post_seconds
+            self.rule_engine.set_rules(rules)
+        
+        # Rules are only ever touched on the engine thread once it runs
+        self.serial_engine.call_in_loop(update)
+    
     def update_message_rate(self):
         """Update the message rate display in the status bar."""
-        total_messages = sum(stats.get("messages_received", 0) 
-                          for stats in self.device_stats.values())
-        
-        total_uptime = max((time.time() - stats.get("start_time", time.time())) 
-                         for stats in self.device_stats.values())
-        
-        if total_uptime > 0:
-            rate = total_messages / total_uptime
-            self.message_rate.setText(f"📡 {rate:.1f} msg/s")
+        rate = self.stream_stats.message_rate()
+        self.message_rate.setText(f"📡 {rate:.1f} msg/s")
     
     @pyqtSlot(str, str)
     def handle_connection_error(self, port, error):
@@ -1786,7 +3143,10 @@ class ArduinoSerialMonitor(QMainWindow):
     def update_device_stats(self, port, stats):
         """Update device statistics."""
         self.device_stats[port] = stats
-        self.stats_widget.update_stats(stats)
+        if self.stats_widget.port is None:
+            self.stats_widget.set_source(self.stream_stats, port)
+        if self.stats_widget.port == port:
+            self.stats_widget.update_stats(stats)
         
         # Update the devices table status if needed
         for row in range(self.devices_table.rowCount()):
@@ -1862,6 +3222,7 @@ class ArduinoSerialMonitor(QMainWindow):
                 break
         
         # Update stats for selected device
+        self.stats_widget.set_source(self.stream_stats, port)
         if port in self.device_stats:
             self.stats_widget.update_stats(self.device_stats[port])
     
@@ -1939,6 +3300,99 @@ class ArduinoSerialMonitor(QMainWindow):
                     row_data.append(item.text() if item else "")
                 file.write("\t".join(row_data) + "\n")
     
+    def start_recording(self):
+        """Start streaming every parsed message to disk."""
+        if self.session_recorder is not None:
+            self.show_notification("Recording already in progress", "warning")
+            return
+        
+        options = QFileDialog.Options()
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Record Session", "", 
+            "JSON Lines (*.jsonl);;CSV Files (*.csv);;Compressed Binary (*.srec)", 
+            options=options)
+        
+        if not file_name:
+            return
+        
+        recorder = SessionRecorder(file_name)
+        recorder.recording_error.connect(
+            lambda error: self.show_notification(f"Recording failed: {error}", "error"))
+        recorder.file_rotated.connect(
+            lambda path: self.show_notification(f"Recording to {path}", "info"))
+        
+        self.session_recorder = recorder
+        for info in self.connected_devices.values():
+            info["reader"].recorder = recorder
+        recorder.start()
+        
+        self.start_recording_action.setEnabled(False)
+        self.stop_recording_action.setEnabled(True)
+    
+    def stop_recording(self):
+        """Stop the session recorder and flush what is still queued."""
+        recorder = self.session_recorder
+        if recorder is None:
+            return
+        
+        for info in self.connected_devices.values():
+            info["reader"].recorder = None
+        self.session_recorder = None
+        
+        recorder.stop()
+        recorder.wait()
+        
+        self.start_recording_action.setEnabled(True)
+        self.stop_recording_action.setEnabled(False)
+        
+        message = f"Recorded {recorder.stats['records_written']:,} messages"
+        if recorder.stats["dropped"]:
+            message += f" ({recorder.stats['dropped']:,} dropped)"
+        self.show_notification(message, "success")
+    
+    def replay_recording(self):
+        """Replay one or more recording files through the parser and UI."""
+        options = QFileDialog.Options()
+        file_names, _ = QFileDialog.getOpenFileNames(
+            self, "Replay Recording", "", 
+            "Recordings (*.jsonl *.csv *.srec);;All Files (*)", 
+            options=options)
+        
+        if not file_names:
+            return
+        
+        speeds = {"1x": 1.0, "10x": 10.0, "Max": 0.0}
+        speed, ok = QInputDialog.getItem(
+            self, "Replay Speed", "Playback speed:", list(speeds.keys()), 0, False)
+        if not ok:
+            return
+        
+        replayer = SessionReplayer(sorted(file_names), speeds[speed])
+        replayer.statistics = self.stream_stats
+        replayer.data_received.connect(self.handle_data)
+        replayer.connection_error.connect(self.handle_connection_error)
+        replayer.stats_updated.connect(self.update_device_stats)
+        replayer.finished.connect(lambda port=replayer.port: self.replay_finished(port))
+        
+        self.connected_devices[replayer.port] = {
+            "reader": replayer,
+            "baud_rate": "-",
+            "device_info": f"Session Replay ({speed})",
+            "connected": True
+        }
+        
+        replayer.start()
+        self.update_devices_table()
+        self.clear_data_btn.setEnabled(True)
+        self.show_notification(f"Replaying {len(file_names)} file(s) at {speed}", "info")
+    
+    def replay_finished(self, port):
+        """Remove a finished replay from the device list."""
+        if port in self.connected_devices:
+            del self.connected_devices[port]
+            self.update_devices_table()
+        self.show_notification(f"{port} finished", "info")
+    
     def save_settings(self):
         """Save application settings to a file."""
         options = QFileDialog.Options()
@@ -1953,12 +3407,18 @@ class ArduinoSerialMonitor(QMainWindow):
         try:
             settings = {
                 "table_settings": self.table_settings,
+                "alert_rules": {
+                    "rules": [rule.to_dict() for rule in self.rule_engine.rules],
+                    "pre_seconds": self.rule_engine.pre_seconds,
+                    "post_seconds": self.rule_engine.post_seconds
+                },
                 "connected_devices": {
                     port: {
                         "baud_rate": info["baud_rate"],
                         "device_info": info["device_info"]
                     }
                     for port, info in self.connected_devices.items()
+                    if not isinstance(info["reader"], SessionReplayer)
                 }
             }
             
@@ -1989,6 +3449,14 @@ class ArduinoSerialMonitor(QMainWindow):
                 self.table_settings = settings["table_settings"]
                 self.auto_scroll_action.setChecked(self.table_settings["auto_scroll"])
             
+            # Update alert rules
+            if "alert_rules" in settings:
+                alert_settings = settings["alert_rules"]
+                self.apply_alert_rules(
+                    [AlertRule.from_dict(rule) for rule in alert_settings.get("rules", [])],
+                    alert_settings.get("pre_seconds", 2.0),
+                    alert_settings.get("post_seconds", 2.0))
+            
             # Reconnect to devices
             if "connected_devices" in settings:
                 for port, info in settings["connected_devices"].items():
@@ -2172,6 +3640,7 @@ class ArduinoSerialMonitor(QMainWindow):
             <li><b>Data Display:</b> Shows parsed data in a table format and raw data in the text area</li>
             <li><b>Pause Display:</b> Temporarily pause data display without disconnecting</li>
             <li><b>Export Data:</b> Save collected data to CSV, JSON, or text format</li>
+            <li><b>Record Session:</b> Stream every message to disk (JSON lines, CSV or compressed binary) and replay it later at 1x, 10x or max speed</li>
             <li><b>Send Commands:</b> Send custom commands to your Arduino</li>
         </ul>
         
@@ -2203,15 +3672,28 @@ class ArduinoSerialMonitor(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close event."""
-        # Stop all detectors
-        for detector in self.serial_detectors.values():
+        # Stop all detectors (one detector may cover several ports)
+        for detector in set(self.serial_detectors.values()):
             detector.stop()
             detector.wait()
         
+        # Flush any in-progress recording
+        self.stop_recording()
+        
+        # Stop replays, they cannot be selected in the port combo
+        for port, info in list(self.connected_devices.items()):
+            if isinstance(info["reader"], SessionReplayer):
+                info["reader"].stop()
+                info["reader"].wait()
+                del self.connected_devices[port]
+        
         # Disconnect all devices
         for port in list(self.connected_devices.keys()):
             self.disconnect_device()
         
+        self.serial_engine.stop()
+        self.serial_engine.wait()
+        
         event.accept()
 
 
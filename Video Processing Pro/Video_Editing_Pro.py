@@ -4,91 +4,69 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                             QLabel, QPushButton, QSlider, QFileDialog, QListWidget, 
                             QMessageBox, QFrame, QSplitter, QProgressBar, QListWidgetItem,
                             QSystemTrayIcon, QMenu, QAction,QDialog,
-                            QComboBox,QSpinBox,QDialogButtonBox)
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+                            QComboBox,QSpinBox,QDialogButtonBox,QCheckBox,
+                            QTableWidget,QTableWidgetItem,QHeaderView)
+from PyQt5.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal
 from PyQt5.QtGui import QPixmap, QImage, QFont, QIcon
-import cv2
-import numpy as np
 from moviepy.editor import VideoFileClip, concatenate_videoclips
+from proglog import ProgressBarLogger
 import traceback
 import subprocess
 import json
+import multiprocessing
+import threading
+import time
+import video_engine
+import media_index
+from batch_cut import BatchCutDialog
+from media_index import FilmstripWidget, MediaIndexer, ProxyBuilder
+from playback_engine import PlaybackEngine
 
-class VideoThread(QThread):
-    """Thread for processing videos without freezing the UI"""
-    update_frame = pyqtSignal(np.ndarray)
-    update_duration = pyqtSignal(float)
-    finished = pyqtSignal()
-    error = pyqtSignal(str)
+class MoviePyProgressLogger(ProgressBarLogger):
+    """Proglog logger that turns MoviePy's frame counter into real progress"""
     
-    def __init__(self, video_path=None):
+    def __init__(self, callback, cancel_event):
         super().__init__()
-        self.video_path = video_path
-        self.running = True
-        self.paused = False
-        self.current_frame_position = 0
-        self.cap = None
-    
-    def run(self):
-        try:
-            if not self.video_path:
-                return
-                
-            self.cap = cv2.VideoCapture(self.video_path)
-            if not self.cap.isOpened():
-                self.error.emit(f"Error opening video file: {self.video_path}")
-                return
-                
-            fps = self.cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps if fps else 0
-            self.update_duration.emit(duration)
-            
-            while self.running:
-                if not self.paused:
-                    ret, frame = self.cap.read()
-                    if not ret:
-                        # If reached the end, restart from beginning
-                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        self.current_frame_position = 0
-                        continue
-                    
-                    self.current_frame_position = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-                    self.update_frame.emit(frame)
-                
-                # Sleep to control playback speed
-                self.msleep(33)  # ~30 fps
-            
-            self.cap.release()
-            self.finished.emit()
-        except Exception as e:
-            self.error.emit(f"Error in video thread: {str(e)}")
-    
-    def stop(self):
-        self.running = False
-        self.wait()
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.started = time.time()
     
-    def toggle_pause(self):
-        self.paused = not self.paused
-    
-    def seek(self, frame_position):
-        if self.cap and self.cap.isOpened():
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_position)
-            self.current_frame_position = frame_position
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if self.cancel_event.is_set():
+            # Raising here aborts write_videofile
+            raise video_engine.JobCancelled()
+        
+        if bar not in ('frame_index', 't') or attr != 'index':
+            return
+        
+        total = self.bars[bar].get('total') or 0
+        elapsed = max(time.time() - self.started, 1e-6)
+        frame = value + 1
+        fps = frame / elapsed
+        self.callback({
+            'percent': 100.0 * frame / total if total else 0.0,
+            'frame': frame,
+            'fps': fps,
+            'speed': None,
+            'eta': (total - frame) / fps if total and fps else None,
+        })
 
 
 class VideoProcessingThread(QThread):
     """Thread for video processing tasks like trimming and merging using MoviePy"""
     progress_update = pyqtSignal(int)
+    progress_detail = pyqtSignal(dict)  # percent, frame, fps, speed, eta
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    status = pyqtSignal(str)  # fallbacks taken while the job keeps running
+    cancelled = pyqtSignal()
     
     def __init__(self, task, params):
         super().__init__()
         self.task = task  # 'trim' or 'merge'
         self.params = params
+        self.cancel_event = threading.Event()
+        self.progress_range = (0, 100)
     
     def run(self):
         try:
@@ -96,72 +74,184 @@ class VideoProcessingThread(QThread):
                 self.trim_video()
             elif self.task == 'merge':
                 self.merge_videos()
+        except video_engine.JobCancelled:
+            self.remove_partial_output()
+            self.cancelled.emit()
         except Exception as e:
             self.error.emit(f"Error in video processing: {str(e)}\n{traceback.format_exc()}")
     
+    def cancel(self):
+        """Request cancellation; the running encoder is stopped at the next progress update"""
+        self.cancel_event.set()
+    
+    def remove_partial_output(self):
+        output_path = self.params.get('output_path')
+        if not output_path:
+            return
+        # MoviePy leaves its audio pass behind when cancelled during it
+        for path in (output_path, f"{output_path}.temp-audio.m4a"):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise video_engine.JobCancelled()
+    
+    def report_progress(self, info):
+        """Map encoder progress into the current progress range and emit it"""
+        low, high = self.progress_range
+        info = dict(info)
+        info['percent'] = low + (high - low) * min(info.get('percent') or 0.0, 100.0) / 100.0
+        self.progress_update.emit(int(info['percent']))
+        self.progress_detail.emit(info)
+    
+    def write_clip(self, clip, output_path, codec="libx264", bitrate=None, preset="Balanced", fps=None):
+        """Encode a MoviePy clip with real progress and cancellation"""
+        preset_args = video_engine.ENCODER_PRESETS.get(codec, {}).get(preset, [])
+        x264_preset = preset_args[1] if preset_args[:1] == ['-preset'] else "medium"
+        extra_args = [] if preset_args[:1] == ['-preset'] else preset_args
+        
+        clip.write_videofile(
+            output_path, 
+            codec=codec, 
+            audio_codec="aac",
+            bitrate=f"{bitrate}M" if bitrate else None,
+            fps=fps,
+            temp_audiofile=f"{output_path}.temp-audio.m4a",  # Unique per job
+            remove_temp=True,
+            preset=x264_preset, 
+            ffmpeg_params=extra_args or None,
+            threads=4,
+            verbose=False,
+            logger=MoviePyProgressLogger(self.report_progress, self.cancel_event)
+        )
+    
     def trim_video(self):
         input_path = self.params['input_path']
         output_path = self.params['output_path']
         start_time = self.params['start_time']
         end_time = self.params['end_time']
         
+        if self.params.get('lossless') and self.lossless_trim(input_path, output_path, start_time, end_time):
+            return
+        
+        if self.parallel_trim(input_path, output_path, start_time, end_time):
+            return
+        
+        clip = None
+        trimmed_clip = None
         try:
-            # Initial progress updates
             self.progress_update.emit(5)
             clip = VideoFileClip(input_path)
-            self.progress_update.emit(10)
-            
             trimmed_clip = clip.subclip(start_time, end_time)
-            self.progress_update.emit(20)
+            self.check_cancelled()
             
-            # Setup for progress monitoring
-            total_frames = int(trimmed_clip.fps * trimmed_clip.duration)
+            self.progress_range = (10, 99)
+            self.write_clip(trimmed_clip, output_path)
             
-            # For progress tracking, we need to monitor the output file's growth
-            def our_progress_monitor():
-                # Since we can't directly hook into MoviePy's progress,
-                # we'll simulate progress based on time
-                import time
-                start_time = time.time()
-                estimated_encoding_time = trimmed_clip.duration * 0.5  # rough estimate
-                
-                # Loop until the encoding is likely complete
-                while time.time() - start_time < estimated_encoding_time * 1.5:
-                    elapsed = time.time() - start_time
-                    progress_ratio = min(elapsed / (estimated_encoding_time * 1.2), 1.0)
-                    scaled_progress = 20 + int(progress_ratio * 70)
-                    self.progress_update.emit(scaled_progress)
-                    time.sleep(0.3)  # Update roughly 3 times per second
-            
-            # Start the progress monitor in a separate thread
-            import threading
-            progress_thread = threading.Thread(target=our_progress_monitor)
-            progress_thread.daemon = True
-            progress_thread.start()
-            
-            # Encode the video
-            trimmed_clip.write_videofile(
-                output_path, 
-                codec="libx264", 
-                audio_codec="aac",
-                temp_audiofile="temp-audio.m4a", 
-                remove_temp=True,
-                preset="medium", 
-                threads=4,
-                verbose=False, # Disable built-in progress display
-                logger=None
-            )
+            self.progress_update.emit(100)
+            self.finished.emit(output_path)
+        
+        except video_engine.JobCancelled:
+            raise
+        except Exception as e:
+            self.error.emit(f"Error trimming video: {str(e)}\n{traceback.format_exc()}")
+        
+        finally:
+            if trimmed_clip:
+                trimmed_clip.close()
+            if clip:
+                clip.close()
+    
+    def parallel_trim(self, input_path, output_path, start_time, end_time):
+        """Re-encode long ranges as keyframe-aligned chunks on all cores
+        
+        Returns False for short ranges, which MoviePy encodes in one pass.
+        """
+        workers = video_engine.default_chunk_workers(end_time - start_time)
+        if workers < 2:
+            return False
+        
+        try:
+            keyframes = media_index.cached_keyframe_times(input_path)
+        except Exception as e:
+            self.status.emit(f"Keyframe probe failed, encoding in one pass: {str(e)}")
+            return False
+        
+        self.progress_range = (5, 99)
+        video_engine.encode_range(input_path, output_path, start_time, end_time,
+                                  keyframes=keyframes, workers=workers,
+                                  progress_callback=self.report_progress,
+                                  cancel_event=self.cancel_event)
+        
+        self.progress_update.emit(100)
+        self.finished.emit(output_path)
+        return True
+    
+    def lossless_trim(self, input_path, output_path, start_time, end_time):
+        """Trim with stream copy and smart cut; returns False to fall back to re-encoding"""
+        try:
+            self.progress_update.emit(5)
+            info = video_engine.probe_video(input_path)
+            self.progress_update.emit(15)
+            keyframes = media_index.cached_keyframe_times(input_path)
+            self.progress_update.emit(30)
             
-            # Clean up
-            clip.close()
-            trimmed_clip.close()
+            self.progress_range = (30, 99)
+            video_engine.stream_copy_trim(input_path, output_path, start_time, end_time,
+                                          info=info, keyframes=keyframes,
+                                          cancel_event=self.cancel_event,
+                                          status_callback=self.status.emit,
+                                          progress_callback=self.report_progress)
             
-            # Ensure we reach 100%
             self.progress_update.emit(100)
             self.finished.emit(output_path)
-            
+            return True
+        except video_engine.JobCancelled:
+            raise
         except Exception as e:
-            self.error.emit(f"Error trimming video: {str(e)}\n{traceback.format_exc()}")
+            self.status.emit(f"Lossless trim failed, re-encoding instead: {str(e)}")
+            return False
+    
+    def pipeline_merge(self, video_paths, output_path):
+        """Merge through ffmpeg, re-encoding only inputs that differ from the chosen settings
+        
+        Returns False to fall back to MoviePy when the inputs cannot be probed.
+        """
+        try:
+            infos = []
+            for i, path in enumerate(video_paths):
+                self.check_cancelled()
+                infos.append(video_engine.probe_video(path))
+                self.progress_update.emit(int(10 * (i + 1) / len(video_paths)))
+        except video_engine.JobCancelled:
+            raise
+        except Exception as e:
+            self.status.emit(f"Probing failed, merging with MoviePy instead: {str(e)}")
+            return False
+        
+        target = video_engine.merge_target(
+            infos,
+            resolution=self.params.get('resolution', 'Original'),
+            fps=self.params.get('fps', 'Original'),
+            codec=self.params.get('codec')
+        )
+        
+        self.progress_range = (10, 99)
+        video_engine.normalized_merge(
+            video_paths, output_path, target, infos=infos,
+            bitrate=self.params.get('bitrate'),
+            preset=self.params.get('preset', 'Balanced'),
+            progress_callback=self.report_progress,
+            cancel_event=self.cancel_event
+        )
+        
+        self.progress_update.emit(100)
+        self.finished.emit(output_path)
+        return True
     
     def merge_videos(self):
         video_paths = self.params['video_paths']
@@ -171,79 +261,138 @@ class VideoProcessingThread(QThread):
             self.error.emit("No videos selected for merging")
             return
         
+        clips = []
+        final_clip = None
         try:
-            clips = []
+            if self.pipeline_merge(video_paths, output_path):
+                return
+            
             # Load all video clips
+            resolution = self.params.get('resolution', 'Original')
             for i, path in enumerate(video_paths):
-                progress = int(20 * (i / len(video_paths)))
+                self.check_cancelled()
+                progress = int(10 * (i / len(video_paths)))
                 self.progress_update.emit(progress)
                 clip = VideoFileClip(path)
                 clips.append(clip)
             
             # Concatenate clips
-            self.progress_update.emit(25)
-            final_clip = concatenate_videoclips(clips)
-            self.progress_update.emit(30)
-            
-            # Calculate total duration for progress estimation
-            total_duration = sum(clip.duration for clip in clips)
-            
-            # Setup progress monitoring thread
-            def our_progress_monitor():
-                import time
-                start_time = time.time()
-                # Rough estimate based on total video duration
-                estimated_encoding_time = total_duration * 0.5
-                
-                # Loop until the encoding is likely complete
-                while time.time() - start_time < estimated_encoding_time * 1.5:
-                    elapsed = time.time() - start_time
-                    progress_ratio = min(elapsed / (estimated_encoding_time * 1.2), 1.0)
-                    # Scale from 30% to 90% for encoding progress
-                    scaled_progress = 30 + int(progress_ratio * 60)
-                    self.progress_update.emit(scaled_progress)
-                    time.sleep(0.3)  # Update roughly 3 times per second
-            
-            # Start the progress monitor in a separate thread
-            import threading
-            progress_thread = threading.Thread(target=our_progress_monitor)
-            progress_thread.daemon = True
-            progress_thread.start()
+            if resolution != 'Original':
+                width, height = (int(value) for value in resolution.lower().split('x'))
+                final_clip = concatenate_videoclips([clip.resize(newsize=(width, height)) for clip in clips])
+            else:
+                final_clip = concatenate_videoclips(clips, method="compose")
             
-            # Write the output file
-            final_clip.write_videofile(
-                output_path, 
-                codec="libx264", 
-                audio_codec="aac", 
-                temp_audiofile="temp-audio.m4a", 
-                remove_temp=True, 
-                preset="medium", 
-                threads=4,
-                verbose=False, # Disable built-in progress display
-                logger=None
-            )
+            codec = video_engine.CODEC_ALIASES.get(self.params.get('codec'), self.params.get('codec'))
+            fps = self.params.get('fps', 'Original')
             
-            # Clean up
-            for clip in clips:
-                clip.close()
-            final_clip.close()
+            self.progress_range = (10, 99)
+            self.write_clip(final_clip, output_path,
+                            codec=video_engine.VIDEO_ENCODERS.get(codec, "libx264"),
+                            bitrate=self.params.get('bitrate'),
+                            preset=self.params.get('preset', 'Balanced'),
+                            fps=None if fps == 'Original' else int(fps))
             
-            # Ensure we reach 100%
             self.progress_update.emit(100)
             self.finished.emit(output_path)
-            
+        
+        except video_engine.JobCancelled:
+            raise
         except Exception as e:
             self.error.emit(f"Error merging videos: {str(e)}\n{traceback.format_exc()}")
+        
+        finally:
+            for clip in clips:
+                clip.close()
+            if final_clip:
+                final_clip.close()
+
+
+class ProcessingJobQueue(QObject):
+    """Queue of processing jobs run concurrently up to ``max_workers``"""
+    job_added = pyqtSignal(int, str)  # job id, description
+    job_started = pyqtSignal(int)
+    job_progress = pyqtSignal(int, dict)
+    job_finished = pyqtSignal(int, str)  # job id, output path
+    job_failed = pyqtSignal(int, str)
+    job_status = pyqtSignal(int, str)
+    job_cancelled = pyqtSignal(int)
+    
+    def __init__(self, max_workers=2):
+        super().__init__()
+        self.max_workers = max_workers
+        self.next_id = 1
+        self.pending = []  # [(job id, task, params)]
+        self.running = {}  # job id -> VideoProcessingThread
+    
+    def submit(self, task, params, description):
+        job_id = self.next_id
+        self.next_id += 1
+        self.pending.append((job_id, task, params))
+        self.job_added.emit(job_id, description)
+        self.start_next()
+        return job_id
+    
+    def set_max_workers(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self.start_next()
+    
+    def start_next(self):
+        while self.pending and len(self.running) < self.max_workers:
+            job_id, task, params = self.pending.pop(0)
+            
+            thread = VideoProcessingThread(task, params)
+            thread.progress_detail.connect(lambda info, j=job_id: self.job_progress.emit(j, info))
+            thread.status.connect(lambda message, j=job_id: self.job_status.emit(j, message))
+            thread.finished.connect(lambda path, j=job_id: self.job_done(j, self.job_finished, path))
+            thread.error.connect(lambda message, j=job_id: self.job_done(j, self.job_failed, message))
+            thread.cancelled.connect(lambda j=job_id: self.job_done(j, self.job_cancelled))
+            
+            self.running[job_id] = thread
+            thread.start()
+            self.job_started.emit(job_id)
+    
+    def job_done(self, job_id, signal, *args):
+        thread = self.running.pop(job_id, None)
+        if thread:
+            thread.wait()  # run() has already returned, this only joins the thread
+        signal.emit(job_id, *args)
+        self.start_next()
+    
+    def cancel(self, job_id):
+        for index, (pending_id, _, _) in enumerate(self.pending):
+            if pending_id == job_id:
+                del self.pending[index]
+                self.job_cancelled.emit(job_id)
+                return
+        
+        if job_id in self.running:
+            self.running[job_id].cancel()
+    
+    def cancel_all(self):
+        for job_id, _, _ in self.pending:
+            self.job_cancelled.emit(job_id)
+        self.pending = []
+        for thread in list(self.running.values()):
+            thread.cancel()
+        for thread in list(self.running.values()):
+            thread.wait()
+    
+    def active_count(self):
+        return len(self.pending) + len(self.running)
 
 
 class VideoPreviewWidget(QWidget):
     """Widget for displaying video preview with controls"""
+    status = pyqtSignal(str)
+    
     def __init__(self, title):
         super().__init__()
         self.title = title
         self.video_path = None
         self.thread = None
         self.duration = 0  # in seconds
+        self.pending_position = None  # seconds to seek to once the video is open
         self.initUI()
     
     def initUI(self):
@@ -289,33 +438,38 @@ class VideoPreviewWidget(QWidget):
         self.timer.timeout.connect(self.update_slider_position)
         self.timer.start(1000)  # Update every second
     
-    def load_video(self, video_path):
+    def load_video(self, video_path, position=None):
         if self.thread and self.thread.isRunning():
             self.thread.stop()
         
         self.video_path = video_path
-        self.thread = VideoThread(video_path)
+        self.pending_position = position
+        self.thread = PlaybackEngine(video_path)
+        self.thread.set_display_size(self.video_frame.width(), self.video_frame.height())
         self.thread.update_frame.connect(self.update_frame)
         self.thread.update_duration.connect(self.set_duration)
         self.thread.error.connect(self.handle_error)
+        self.thread.status.connect(self.status.emit)
         self.thread.start()
         
         self.play_button.setEnabled(True)
         self.play_button.setText("Pause")
         self.progress_slider.setEnabled(True)
     
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.thread:
+            self.thread.set_display_size(self.video_frame.width(), self.video_frame.height())
+    
     def update_frame(self, frame):
-        # Convert OpenCV BGR to RGB for QImage
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_frame.shape
-        bytes_per_line = ch * w
-        
-        # Create QImage and QPixmap
-        q_img = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        # Frames arrive as RGB already scaled to the display on the decode thread
+        h, w, ch = frame.shape
+        q_img = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888)
         pixmap = QPixmap.fromImage(q_img)
         
-        # Scale pixmap to fit in video_frame while maintaining aspect ratio
-        pixmap = pixmap.scaled(self.video_frame.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # Only frames decoded before a resize still need scaling
+        if w > self.video_frame.width() or h > self.video_frame.height():
+            pixmap = pixmap.scaled(self.video_frame.size(), Qt.KeepAspectRatio, Qt.FastTransformation)
         
         self.video_frame.setPixmap(pixmap)
     
@@ -324,6 +478,16 @@ class VideoPreviewWidget(QWidget):
         self.progress_slider.setRange(0, int(duration))
         minutes, seconds = divmod(int(duration), 60)
         self.time_label.setText(f"00:00 / {minutes:02d}:{seconds:02d}")
+        
+        if self.pending_position:
+            self.set_position(self.pending_position)
+            self.pending_position = None
+    
+    def current_position(self):
+        """Seconds of the frame on screen"""
+        if not self.thread or not self.thread.fps:
+            return 0.0
+        return self.thread.current_frame_position / self.thread.fps
     
     def toggle_playback(self):
         if not self.thread:
@@ -337,24 +501,23 @@ class VideoPreviewWidget(QWidget):
             self.play_button.setText("Pause")
     
     def set_position(self, position):
-        if not self.thread or not self.thread.cap:
+        if not self.thread:
             return
             
         # Convert from slider position (seconds) to frame number
-        fps = self.thread.cap.get(cv2.CAP_PROP_FPS)
-        frame_position = int(position * fps)
+        frame_position = int(position * self.thread.fps)
         self.thread.seek(frame_position)
         
         # Update time label
-        minutes, seconds = divmod(position, 60)
+        minutes, seconds = divmod(int(position), 60)
         total_minutes, total_seconds = divmod(int(self.duration), 60)
         self.time_label.setText(f"{minutes:02d}:{seconds:02d} / {total_minutes:02d}:{total_seconds:02d}")
     
     def update_slider_position(self):
-        if not self.thread or not self.thread.cap or self.thread.paused:
+        if not self.thread or self.thread.paused:
             return
             
-        fps = self.thread.cap.get(cv2.CAP_PROP_FPS)
+        fps = self.thread.fps
         if fps > 0:
             current_second = self.thread.current_frame_position / fps
             self.progress_slider.setValue(int(current_second))
@@ -512,10 +675,12 @@ class VideoEditor(QMainWindow):
         
         # Input video preview
         self.input_preview = VideoPreviewWidget("Input Video")
+        self.input_preview.status.connect(self.update_status)
         preview_layout.addWidget(self.input_preview)
         
         # Output video preview
         self.output_preview = VideoPreviewWidget("Output Video")
+        self.output_preview.status.connect(self.update_status)
         preview_layout.addWidget(self.output_preview)
         
         main_splitter.addWidget(preview_widget)
@@ -540,6 +705,11 @@ class VideoEditor(QMainWindow):
         load_btn.clicked.connect(self.load_input_video)
         trim_layout.addWidget(load_btn)
         
+        # Thumbnail timeline, click to seek the input preview
+        self.filmstrip = FilmstripWidget()
+        self.filmstrip.position_selected.connect(self.input_preview.set_position)
+        trim_layout.addWidget(self.filmstrip)
+        
         # Trim sliders
         sliders_layout = QHBoxLayout()
         
@@ -577,6 +747,19 @@ class VideoEditor(QMainWindow):
         
         trim_layout.addLayout(sliders_layout)
         
+        # Stream copy instead of re-encoding
+        self.lossless_checkbox = QCheckBox("Lossless (stream copy, smart cut)")
+        self.lossless_checkbox.setChecked(True)
+        self.lossless_checkbox.toggled.connect(self.update_trim_values)
+        trim_layout.addWidget(self.lossless_checkbox)
+        
+        # Preview large sources through low resolution proxies
+        self.proxy_checkbox = QCheckBox("Preview with proxy media")
+        self.proxy_checkbox.setChecked(True)
+        self.proxy_checkbox.setToolTip("Trim and merge always read the original files")
+        self.proxy_checkbox.toggled.connect(self.on_proxy_toggled)
+        trim_layout.addWidget(self.proxy_checkbox)
+        
         # Trim button
         self.trim_btn = QPushButton("Trim Video")
         self.trim_btn.clicked.connect(self.trim_video)
@@ -634,6 +817,39 @@ class VideoEditor(QMainWindow):
         
         editing_layout.addLayout(operations_layout)
         
+        # Job queue section
+        jobs_frame = QFrame()
+        jobs_frame.setFrameShape(QFrame.StyledPanel)
+        jobs_layout = QVBoxLayout(jobs_frame)
+        
+        jobs_header = QHBoxLayout()
+        jobs_title = QLabel("Processing Jobs")
+        jobs_title.setFont(QFont('Arial', 12, QFont.Bold))
+        jobs_header.addWidget(jobs_title)
+        jobs_header.addStretch()
+        
+        jobs_header.addWidget(QLabel("Parallel jobs:"))
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spinbox.setValue(min(2, self.workers_spinbox.maximum()))
+        self.workers_spinbox.valueChanged.connect(lambda value: self.job_queue.set_max_workers(value))
+        jobs_header.addWidget(self.workers_spinbox)
+        
+        self.cancel_job_btn = QPushButton("Cancel Selected")
+        self.cancel_job_btn.clicked.connect(self.cancel_selected_jobs)
+        jobs_header.addWidget(self.cancel_job_btn)
+        jobs_layout.addLayout(jobs_header)
+        
+        self.jobs_table = QTableWidget(0, 6)
+        self.jobs_table.setHorizontalHeaderLabels(["ID", "Job", "Status", "Progress", "Speed", "ETA"])
+        self.jobs_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.jobs_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.jobs_table.verticalHeader().setVisible(False)
+        self.jobs_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        jobs_layout.addWidget(self.jobs_table)
+        
+        editing_layout.addWidget(jobs_frame)
+        
         # Progress section
         progress_layout = QHBoxLayout()
         
@@ -655,8 +871,32 @@ class VideoEditor(QMainWindow):
         
         self.setCentralWidget(central_widget)
         
-        # Set up processing thread
+        # Background keyframe/thumbnail indexing of the input video
+        self.input_index = None
+        self.trim_start = 0.0
+        self.media_indexer = MediaIndexer()
+        self.media_indexer.index_ready.connect(self.on_index_ready)
+        self.media_indexer.error.connect(self.update_status)
+        
+        # Proxies are encoded in the background and swapped into the preview when ready
+        self.proxy_builder = ProxyBuilder()
+        self.proxy_builder.proxy_progress.connect(self.on_proxy_progress)
+        self.proxy_builder.proxy_ready.connect(self.on_proxy_ready)
+        self.proxy_builder.error.connect(self.update_status)
+        
+        # Set up processing queue
         self.processing_thread = None
+        self.job_tasks = {}  # job id -> task
+        self.job_percents = {}  # job id -> percent done, of the running jobs
+        self.job_rows = {}  # job id -> jobs table row
+        self.job_queue = ProcessingJobQueue(self.workers_spinbox.value())
+        self.job_queue.job_added.connect(self.on_job_added)
+        self.job_queue.job_started.connect(lambda job_id: self.set_job_status(job_id, "Running"))
+        self.job_queue.job_progress.connect(self.on_job_progress)
+        self.job_queue.job_finished.connect(self.on_job_finished)
+        self.job_queue.job_failed.connect(self.on_job_failed)
+        self.job_queue.job_status.connect(lambda job_id, message: self.update_status(f"Job {job_id}: {message}"))
+        self.job_queue.job_cancelled.connect(self.on_job_cancelled)
     
     def create_menu_bar(self):
         menubar = self.menuBar()
@@ -691,6 +931,11 @@ class VideoEditor(QMainWindow):
         merge_action.triggered.connect(self.merge_videos)
         tools_menu.addAction(merge_action)
         
+        batch_action = QAction("&Batch Trim from Cut List...", self)
+        batch_action.setShortcut("Ctrl+B")
+        batch_action.triggered.connect(self.show_batch_trim)
+        tools_menu.addAction(batch_action)
+        
         # Help menu
         help_menu = menubar.addMenu("&Help")
         
@@ -766,7 +1011,12 @@ class VideoEditor(QMainWindow):
         """Open a file passed as command line argument"""
         if os.path.isfile(file_path):
             self.input_video_path = file_path
-            self.input_preview.load_video(file_path)
+            self.input_index = None
+            self.input_preview.load_video(self.preview_path(file_path))
+            self.filmstrip.clear()
+            self.media_indexer.request(file_path)
+            if self.proxy_checkbox.isChecked():
+                self.proxy_builder.request(file_path)
             self.status_label.setText(f"Loaded: {os.path.basename(file_path)}")
             self.add_to_recent_files(file_path)
             
@@ -783,6 +1033,7 @@ class VideoEditor(QMainWindow):
                 self.start_slider.setEnabled(True)
                 self.end_slider.setEnabled(True)
                 
+                self.filmstrip.set_duration(duration_seconds)
                 self.update_trim_values()
             except Exception as e:
                 QMessageBox.warning(self, "Warning", f"Error getting video duration: {str(e)}")
@@ -859,12 +1110,59 @@ class VideoEditor(QMainWindow):
             end_seconds = start_seconds + 1
             self.end_slider.setValue(end_seconds)
         
+        # Lossless cuts start on a keyframe; the end needs no snapping
+        self.trim_start = float(start_seconds)
+        snapped = False
+        if self.lossless_checkbox.isChecked() and self.input_index and self.input_index.get('keyframes'):
+            self.trim_start = media_index.snap_to_keyframe(start_seconds, self.input_index['keyframes'])
+            self.trim_start = min(self.trim_start, end_seconds - 0.001)
+            snapped = True
+        
         # Update labels
-        start_minutes, start_seconds = divmod(start_seconds, 60)
-        self.start_time_label.setText(f"{start_minutes:02d}:{start_seconds:02d}")
+        start_minutes, start_rest = divmod(self.trim_start, 60)
+        if snapped:
+            self.start_time_label.setText(f"{int(start_minutes):02d}:{start_rest:04.1f} (keyframe)")
+        else:
+            self.start_time_label.setText(f"{int(start_minutes):02d}:{int(start_rest):02d}")
+        
+        end_minutes, end_seconds_part = divmod(end_seconds, 60)
+        self.end_time_label.setText(f"{end_minutes:02d}:{end_seconds_part:02d}")
         
-        end_minutes, end_seconds = divmod(end_seconds, 60)
-        self.end_time_label.setText(f"{end_minutes:02d}:{end_seconds:02d}")
+        self.filmstrip.set_range(self.trim_start, end_seconds)
+    
+    def preview_path(self, path):
+        """File to preview for path: its proxy when enabled and built, else the original"""
+        if self.proxy_checkbox.isChecked():
+            return media_index.existing_proxy(path) or path
+        return path
+    
+    def on_proxy_toggled(self, checked):
+        if not self.input_video_path:
+            return
+        if checked:
+            self.proxy_builder.request(self.input_video_path)
+        preview = self.preview_path(self.input_video_path)
+        if preview != self.input_preview.video_path:
+            self.input_preview.load_video(preview, self.input_preview.current_position())
+    
+    def on_proxy_progress(self, path, percent):
+        if path == self.input_video_path:
+            self.status_label.setText(f"Building preview proxy for {os.path.basename(path)}: {percent:.0f}%")
+    
+    def on_proxy_ready(self, path, proxy):
+        if path != self.input_video_path:
+            return
+        self.status_label.setText(f"Loaded: {os.path.basename(path)} (previewing proxy)")
+        if self.proxy_checkbox.isChecked() and self.input_preview.video_path != proxy:
+            self.input_preview.load_video(proxy, self.input_preview.current_position())
+    
+    def on_index_ready(self, path, index):
+        """Show the filmstrip and enable keyframe snapping once indexing finishes"""
+        if path != self.input_video_path:
+            return
+        self.input_index = index
+        self.filmstrip.set_index(index)
+        self.update_trim_values()
     
     # Replace the complex progress monitoring with simplified version:
     def trim_video(self):
@@ -873,7 +1171,7 @@ class VideoEditor(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please load a video first")
             return
         
-        start_seconds = self.start_slider.value()
+        start_seconds = self.trim_start
         end_seconds = self.end_slider.value()
         
         # Ensure end time is after start time
@@ -906,14 +1204,12 @@ class VideoEditor(QMainWindow):
             'input_path': self.input_video_path,
             'output_path': output_path,
             'start_time': start_seconds,
-            'end_time': end_seconds
+            'end_time': end_seconds,
+            'lossless': self.lossless_checkbox.isChecked()
         }
         
-        self.processing_thread = VideoProcessingThread('trim', params)
-        self.processing_thread.progress_update.connect(self.update_progress)
-        self.processing_thread.finished.connect(self.on_trim_completed)
-        self.processing_thread.error.connect(self.on_processing_error)
-        self.processing_thread.start()
+        self.submit_job('trim', params, f"Trim {os.path.basename(self.input_video_path)} "
+                        f"{start_seconds:.2f}s-{end_seconds}s")
     
     def add_video_to_merge(self):
         """Add a video to the merge list"""
@@ -1013,6 +1309,8 @@ class VideoEditor(QMainWindow):
             resolution = first_video_info.get('resolution', '1920x1080')
             fps = first_video_info.get('fps', 30)
             codec = first_video_info.get('codec', 'h264')
+            # Show ffprobe codec names the way the options dialog lists them
+            codec = {v: k for k, v in video_engine.CODEC_ALIASES.items()}.get(codec, codec)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to analyze video: {str(e)}")
             return
@@ -1034,17 +1332,88 @@ class VideoEditor(QMainWindow):
             'resolution': merge_options['resolution'],
             'fps': merge_options['fps'],
             'codec': merge_options['codec'],
-            'bitrate': merge_options['bitrate']
+            'bitrate': merge_options['bitrate'],
+            'preset': merge_options['preset']
         }
         
-        # Disable UI elements during processing
-        self.toggle_ui_elements(False)
+        self.submit_job('merge', params, f"Merge {count} videos into {os.path.basename(output_path)}")
+    
+    def show_batch_trim(self):
+        """Trim many segments from a CSV/JSON cut list in parallel processes"""
+        dialog = BatchCutDialog(self, lossless=self.lossless_checkbox.isChecked())
+        dialog.output_created.connect(self.output_video_paths.append)
+        dialog.exec_()
+    
+    def submit_job(self, task, params, description):
+        """Queue a processing job"""
+        job_id = self.job_queue.submit(task, params, description)
+        self.job_tasks[job_id] = task
+        return job_id
+    
+    def on_job_added(self, job_id, description):
+        row = self.jobs_table.rowCount()
+        self.jobs_table.insertRow(row)
+        self.job_rows[job_id] = row
+        for col, text in enumerate([str(job_id), description, "Queued", "0%", "", ""]):
+            self.jobs_table.setItem(row, col, QTableWidgetItem(text))
+    
+    def set_job_status(self, job_id, status):
+        row = self.job_rows.get(job_id)
+        if row is not None:
+            self.jobs_table.item(row, 2).setText(status)
+    
+    def on_job_progress(self, job_id, info):
+        row = self.job_rows.get(job_id)
+        if row is None:
+            return
+        
+        self.jobs_table.item(row, 3).setText(f"{info.get('percent', 0):.1f}%")
+        speed = f"{info['fps']:.1f} fps" if info.get('fps') else ""
+        if info.get('speed'):
+            speed += f" ({info['speed']:.2f}x)"
+        self.jobs_table.item(row, 4).setText(speed.strip())
         
-        self.processing_thread = VideoProcessingThread('merge', params)
-        self.processing_thread.progress_update.connect(self.update_progress)
-        self.processing_thread.finished.connect(self.on_merge_completed)
-        self.processing_thread.error.connect(self.on_processing_error)
-        self.processing_thread.start()
+        eta = info.get('eta')
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            self.jobs_table.item(row, 5).setText(f"{minutes:02d}:{seconds:02d}")
+        
+        # The bar shows all running jobs together
+        self.job_percents[job_id] = info.get('percent', 0)
+        self.progress_bar.setValue(int(sum(self.job_percents.values()) / len(self.job_percents)))
+    
+    def on_job_finished(self, job_id, output_path):
+        self.set_job_status(job_id, "Done")
+        self.job_percents.pop(job_id, None)
+        row = self.job_rows.get(job_id)
+        if row is not None:
+            self.jobs_table.item(row, 3).setText("100%")
+            self.jobs_table.item(row, 5).setText("")
+        
+        if self.job_tasks.pop(job_id, None) == 'merge':
+            self.on_merge_completed(output_path)
+        else:
+            self.on_trim_completed(output_path)
+    
+    def on_job_failed(self, job_id, error_msg):
+        self.set_job_status(job_id, "Failed")
+        self.job_percents.pop(job_id, None)
+        self.job_tasks.pop(job_id, None)
+        self.on_processing_error(error_msg)
+    
+    def on_job_cancelled(self, job_id):
+        self.set_job_status(job_id, "Cancelled")
+        self.job_percents.pop(job_id, None)
+        self.job_tasks.pop(job_id, None)
+        if not self.job_queue.active_count():
+            self.progress_bar.setVisible(False)
+        self.status_label.setText(f"Job {job_id} cancelled")
+    
+    def cancel_selected_jobs(self):
+        rows = {index.row() for index in self.jobs_table.selectedIndexes()}
+        for job_id, row in self.job_rows.items():
+            if row in rows:
+                self.job_queue.cancel(job_id)
     
     def show_merge_options_dialog(self, default_resolution, default_fps, default_codec):
         """Show dialog for advanced merge options"""
@@ -1091,6 +1460,19 @@ class VideoEditor(QMainWindow):
         bitrate_layout.addWidget(bitrate_spinbox)
         layout.addLayout(bitrate_layout)
         
+        # Encoder speed preset
+        preset_layout = QHBoxLayout()
+        preset_layout.addWidget(QLabel("Speed Preset:"))
+        preset_combo = QComboBox()
+        preset_combo.addItems(video_engine.PRESET_NAMES)
+        preset_combo.setCurrentText("Fast")
+        preset_layout.addWidget(preset_combo)
+        layout.addLayout(preset_layout)
+        
+        note = QLabel("Only clips that differ from these settings are re-encoded.")
+        note.setStyleSheet("color: gray;")
+        layout.addWidget(note)
+        
         # Buttons
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         button_box.accepted.connect(dialog.accept)
@@ -1104,7 +1486,8 @@ class VideoEditor(QMainWindow):
                 'resolution': resolution_combo.currentText(),
                 'fps': fps_combo.currentText(),
                 'codec': codec_combo.currentText(),
-                'bitrate': bitrate_spinbox.value()
+                'bitrate': bitrate_spinbox.value(),
+                'preset': preset_combo.currentText()
             }
         return None
     
@@ -1195,7 +1578,11 @@ class VideoEditor(QMainWindow):
         # Load the output video in the preview
         self.output_preview.load_video(output_path)
         
-        QMessageBox.information(self, "Success", f"Video trimmed successfully:\n{output_path}")
+        # Only interrupt once the whole queue has drained
+        if not self.job_queue.active_count():
+            QMessageBox.information(self, "Success", f"Video trimmed successfully:\n{output_path}")
+        else:
+            self.progress_bar.setVisible(True)
     
     def on_merge_completed(self, output_path):
         """Called when merge operation is completed"""
@@ -1208,7 +1595,10 @@ class VideoEditor(QMainWindow):
         # Load the output video in the preview
         self.output_preview.load_video(output_path)
         
-        QMessageBox.information(self, "Success", f"Videos merged successfully:\n{output_path}")
+        if not self.job_queue.active_count():
+            QMessageBox.information(self, "Success", f"Videos merged successfully:\n{output_path}")
+        else:
+            self.progress_bar.setVisible(True)
     
     def on_processing_error(self, error_msg):
         """Called when processing error occurs"""
@@ -1243,7 +1633,7 @@ class VideoEditor(QMainWindow):
     def preview_merge_video(self, video_path):
         """Preview a video from the merge list"""
         if os.path.isfile(video_path):
-            self.input_preview.load_video(video_path)
+            self.input_preview.load_video(self.preview_path(video_path))
             self.status_label.setText(f"Previewing: {os.path.basename(video_path)}")
     
     def closeEvent(self, event):
@@ -1259,6 +1649,11 @@ class VideoEditor(QMainWindow):
             self.processing_thread.terminate()
             self.processing_thread.wait()
         
+        # Stop queued and running jobs
+        self.job_queue.cancel_all()
+        self.media_indexer.stop()
+        self.proxy_builder.stop()
+        
         # Save settings
         self.save_settings()
         
@@ -1276,6 +1671,9 @@ class VideoEditor(QMainWindow):
 
 
 if __name__ == "__main__":
+    # Batch cuts run in worker processes, which need this in frozen builds
+    multiprocessing.freeze_support()
+    
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     
@@ -0,0 +1,326 @@
+"""Batch trimming from a cut list, executed on a process pool
+
+Each cut list entry runs ``video_engine.run_cut`` in its own worker
+process, so segments from many files are cut in parallel. Workers report
+progress through a managed queue that the runner thread forwards to the
+GUI as signals; at the end a CSV report is written next to the outputs.
+"""
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from queue import Empty
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import (QCheckBox, QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel,
+                             QLineEdit, QMessageBox, QPushButton, QSpinBox, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout)
+
+import media_index
+import video_engine
+
+REPORT_NAME = "batch_report.csv"
+
+
+class BatchCutRunner(QThread):
+    """Run a cut list across a process pool and write a summary report"""
+    job_progress = pyqtSignal(int, dict)  # cut index, progress info
+    job_finished = pyqtSignal(int, dict)  # cut index, result
+    job_failed = pyqtSignal(int, str)
+    summary_ready = pyqtSignal(dict)
+
+    def __init__(self, cuts, lossless=True, max_workers=None, report_path=None):
+        super().__init__()
+        self.cuts = cuts
+        self.lossless = lossless
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.report_path = report_path
+        self.cancel_event = None
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+
+    def run(self):
+        started = time.time()
+        results = {}
+
+        with multiprocessing.Manager() as manager:
+            progress_queue = manager.Queue()
+            self.cancel_event = manager.Event()
+            if self.cancel_requested:
+                self.cancel_event.set()
+
+            # One keyframe probe per source file, shared by all of its cuts
+            keyframes = {}
+            if self.lossless:
+                for path in {cut['input'] for cut in self.cuts}:
+                    try:
+                        keyframes[path] = media_index.cached_keyframe_times(path)
+                    except Exception:
+                        keyframes[path] = None
+
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(video_engine.run_cut, index, cut, self.lossless,
+                                keyframes.get(cut['input']), progress_queue, self.cancel_event): index
+                    for index, cut in enumerate(self.cuts)
+                }
+                pending = set(futures)
+
+                while pending:
+                    done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    self.drain(progress_queue)
+
+                    if self.cancel_requested:
+                        for future in pending:
+                            future.cancel()
+
+                    for future in done:
+                        index = futures[future]
+                        results[index] = self.collect(index, future)
+
+                self.drain(progress_queue)
+
+        summary = self.summarize(results, time.time() - started)
+        self.summary_ready.emit(summary)
+
+    def drain(self, progress_queue):
+        while True:
+            try:
+                index, info = progress_queue.get_nowait()
+            except Empty:
+                return
+            self.job_progress.emit(index, info)
+
+    def collect(self, index, future):
+        if future.cancelled():
+            self.job_failed.emit(index, "Cancelled")
+            return {'status': 'cancelled'}
+        try:
+            result = future.result()
+        except video_engine.JobCancelled:
+            self.job_failed.emit(index, "Cancelled")
+            return {'status': 'cancelled'}
+        except Exception as e:
+            self.job_failed.emit(index, str(e))
+            return {'status': 'failed', 'error': str(e)}
+
+        result['status'] = 'done'
+        self.job_finished.emit(index, result)
+        return result
+
+    def summarize(self, results, elapsed):
+        counts = {'done': 0, 'failed': 0, 'cancelled': 0}
+        for result in results.values():
+            counts[result['status']] += 1
+
+        report_path, report_error = self.report_path, None
+        if self.report_path:
+            try:
+                with open(self.report_path, 'w', encoding='utf-8', newline='') as report_file:
+                    writer = csv.writer(report_file)
+                    writer.writerow(['input', 'start', 'end', 'output', 'status', 'mode', 'seconds', 'error'])
+                    for index, cut in enumerate(self.cuts):
+                        result = results.get(index, {'status': 'cancelled'})
+                        writer.writerow([cut['input'], f"{cut['start']:.3f}", f"{cut['end']:.3f}",
+                                         cut['output'], result['status'], result.get('mode', ''),
+                                         f"{result.get('seconds', 0):.1f}", result.get('error', '')])
+            except OSError as e:
+                report_path, report_error = None, f"Could not write batch report: {str(e)}"
+
+        return dict(counts, total=len(self.cuts), elapsed=elapsed, report_path=report_path,
+                    report_error=report_error)
+
+
+class BatchCutDialog(QDialog):
+    """Load a cut list, run it and show per-cut progress and the summary"""
+    output_created = pyqtSignal(str)
+
+    def __init__(self, parent=None, lossless=True):
+        super().__init__(parent)
+        self.setWindowTitle("Batch Cut")
+        self.resize(900, 500)
+        self.cuts = []
+        self.generated = False  # cuts came from set_cuts rather than a file
+        self.runner = None
+
+        layout = QVBoxLayout(self)
+
+        list_layout = QHBoxLayout()
+        list_layout.addWidget(QLabel("Cut list (CSV/JSON):"))
+        self.cut_list_edit = QLineEdit()
+        self.cut_list_edit.setReadOnly(True)
+        list_layout.addWidget(self.cut_list_edit)
+        browse_list_btn = QPushButton("Browse...")
+        browse_list_btn.clicked.connect(self.browse_cut_list)
+        list_layout.addWidget(browse_list_btn)
+        layout.addLayout(list_layout)
+
+        output_layout = QHBoxLayout()
+        output_layout.addWidget(QLabel("Output folder:"))
+        self.output_dir_edit = QLineEdit()
+        output_layout.addWidget(self.output_dir_edit)
+        browse_output_btn = QPushButton("Browse...")
+        browse_output_btn.clicked.connect(self.browse_output_dir)
+        output_layout.addWidget(browse_output_btn)
+        layout.addLayout(output_layout)
+
+        options_layout = QHBoxLayout()
+        self.lossless_checkbox = QCheckBox("Lossless (stream copy, smart cut)")
+        self.lossless_checkbox.setChecked(lossless)
+        options_layout.addWidget(self.lossless_checkbox)
+        options_layout.addStretch()
+        options_layout.addWidget(QLabel("Parallel processes:"))
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spinbox.setValue(max(1, (os.cpu_count() or 2) // 2))
+        options_layout.addWidget(self.workers_spinbox)
+        layout.addLayout(options_layout)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["File", "Range", "Output", "Status", "Progress"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.summary_label = QLabel("Load a cut list to begin")
+        layout.addWidget(self.summary_label)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        self.start_btn = QPushButton("Start")
+        self.start_btn.setEnabled(False)
+        self.start_btn.clicked.connect(self.start_batch)
+        buttons_layout.addWidget(self.start_btn)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_batch)
+        buttons_layout.addWidget(self.cancel_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+
+    def browse_cut_list(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Open Cut List", "", "Cut Lists (*.csv *.json);;All Files (*)"
+        )
+        if not path:
+            return
+        self.cut_list_edit.setText(path)
+        self.generated = False
+        if not self.output_dir_edit.text():
+            self.output_dir_edit.setText(os.path.dirname(path))
+        self.load_cuts()
+
+    def browse_output_dir(self):
+        path = QFileDialog.getExistingDirectory(self, "Select Output Folder", self.output_dir_edit.text())
+        if path:
+            self.output_dir_edit.setText(path)
+            if self.generated:
+                for cut in self.cuts:
+                    cut['output'] = os.path.join(path, os.path.basename(cut['output']))
+                self.show_cuts()
+            else:
+                self.load_cuts()
+
+    def load_cuts(self):
+        if not self.cut_list_edit.text():
+            return
+        try:
+            self.cuts = video_engine.load_cut_list(self.cut_list_edit.text(), self.output_dir_edit.text() or None)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Cut List", f"Could not read cut list: {str(e)}")
+            self.cuts = []
+        self.show_cuts()
+
+    def set_cuts(self, cuts, source="Detected split points"):
+        """Run cuts prepared by the caller instead of a cut list file"""
+        self.cut_list_edit.setText(source)
+        self.generated = True
+        if cuts:
+            self.output_dir_edit.setText(os.path.dirname(cuts[0]['output']))
+        self.cuts = cuts
+        self.show_cuts()
+
+    def show_cuts(self):
+        missing = sorted({cut['input'] for cut in self.cuts if not os.path.exists(cut['input'])})
+        if missing:
+            QMessageBox.warning(self, "Cut List", "Files not found:\n" + "\n".join(missing[:10]))
+
+        self.table.setRowCount(len(self.cuts))
+        for row, cut in enumerate(self.cuts):
+            values = [os.path.basename(cut['input']), f"{cut['start']:.2f}s - {cut['end']:.2f}s",
+                      os.path.basename(cut['output']), "Missing input" if cut['input'] in missing else "Ready", ""]
+            for column, text in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+        self.start_btn.setEnabled(bool(self.cuts) and not missing)
+        self.summary_label.setText(f"{len(self.cuts)} cuts loaded")
+
+    def start_batch(self):
+        output_dir = os.path.dirname(self.cuts[0]['output'])
+        self.runner = BatchCutRunner(
+            self.cuts,
+            lossless=self.lossless_checkbox.isChecked(),
+            max_workers=self.workers_spinbox.value(),
+            report_path=os.path.join(output_dir, REPORT_NAME)
+        )
+        self.runner.job_progress.connect(self.on_job_progress)
+        self.runner.job_finished.connect(self.on_job_finished)
+        self.runner.job_failed.connect(lambda row, error: self.set_status(row, "Cancelled" if error == "Cancelled" else "Failed", error))
+        self.runner.summary_ready.connect(self.on_summary)
+
+        for row in range(len(self.cuts)):
+            self.set_status(row, "Queued")
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.summary_label.setText(f"Cutting {len(self.cuts)} segments with {self.workers_spinbox.value()} processes...")
+        self.runner.start()
+
+    def cancel_batch(self):
+        if self.runner:
+            self.runner.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.summary_label.setText("Cancelling...")
+
+    def set_status(self, row, status, tooltip=None):
+        item = self.table.item(row, 3)
+        item.setText(status)
+        if tooltip:
+            item.setToolTip(tooltip)
+
+    def on_job_progress(self, row, info):
+        self.set_status(row, "Running")
+        progress = f"{info.get('percent', 0):.0f}%"
+        if info.get('eta'):
+            progress += f" (ETA {int(info['eta'])}s)"
+        self.table.item(row, 4).setText(progress)
+
+    def on_job_finished(self, row, result):
+        mode = "copied" if result.get('mode') == 'copy' else "re-encoded"
+        self.set_status(row, f"Done ({mode})")
+        self.table.item(row, 4).setText(f"{result.get('seconds', 0):.1f}s")
+        self.output_created.emit(result['output'])
+
+    def on_summary(self, summary):
+        self.cancel_btn.setEnabled(False)
+        self.start_btn.setEnabled(True)
+        text = (f"{summary['done']} of {summary['total']} done, {summary['failed']} failed, "
+                f"{summary['cancelled']} cancelled in {summary['elapsed']:.1f}s")
+        if summary.get('report_path'):
+            text += f" - report: {summary['report_path']}"
+        elif summary.get('report_error'):
+            text += f" - {summary['report_error']}"
+        self.summary_label.setText(text)
+
+    def closeEvent(self, event):
+        if self.runner and self.runner.isRunning():
+            self.runner.cancel()
+            self.runner.wait()
+        super().closeEvent(event)
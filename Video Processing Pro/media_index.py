@@ -0,0 +1,389 @@
+"""Keyframe index, thumbnail filmstrip and proxy media for timeline navigation
+
+Indexes are cached on disk, keyed by a signature of the file's path, size,
+modification time and a hash of its first and last megabyte, so reopening
+a file never probes or decodes it again. Thumbnails are taken at keyframes,
+which costs one seek and one decoded frame each.
+
+Proxies are low resolution, intra-frame only copies of large sources used
+for preview and scrubbing; every frame is a keyframe, so any seek decodes a
+single small frame. They keep the source timeline, so positions picked on
+a proxy apply unchanged to the original that trim and merge read.
+"""
+import bisect
+import hashlib
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import Qt, QThread, QRectF, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QPixmap, QPen
+from PyQt5.QtWidgets import QWidget
+
+import video_engine
+
+INDEX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".video_editor_index")
+THUMBNAIL_HEIGHT = 54
+THUMBNAIL_COUNT = 40
+SIGNATURE_BLOCK = 1024 * 1024
+INDEX_VERSION = 2  # indexes of older versions are rebuilt; 2 counts keyframes from the stream start
+
+PROXY_DIR = os.path.join(INDEX_CACHE_DIR, "proxies")
+PROXY_HEIGHT = 540
+PROXY_MIN_SOURCE_HEIGHT = 720  # smaller sources preview fine as they are
+
+
+def file_signature(path):
+    """Hash identifying this version of the file without reading all of it"""
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    with open(path, 'rb') as video_file:
+        digest.update(video_file.read(SIGNATURE_BLOCK))
+        if stat.st_size > 2 * SIGNATURE_BLOCK:
+            video_file.seek(-SIGNATURE_BLOCK, os.SEEK_END)
+            digest.update(video_file.read(SIGNATURE_BLOCK))
+    return digest.hexdigest()
+
+
+def cache_paths(path):
+    """Paths of the index JSON and the filmstrip image for a video"""
+    signature = file_signature(path)
+    return (os.path.join(INDEX_CACHE_DIR, f"{signature}.json"),
+            os.path.join(INDEX_CACHE_DIR, f"{signature}.jpg"))
+
+
+def load_index(path):
+    """Return the cached index of a video, or None"""
+    try:
+        index_path, strip_path = cache_paths(path)
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+
+    if index.get('thumbnail_times') and not os.path.exists(strip_path):
+        index.pop('thumbnail_times')
+    index['strip_path'] = strip_path if index.get('thumbnail_times') else None
+    return index
+
+
+def save_index(path, index):
+    os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+    index_path, _ = cache_paths(path)
+    data = {key: value for key, value in index.items() if key != 'strip_path'}
+    data['version'] = INDEX_VERSION
+
+    # Indexer and players may write the same entry, so replace atomically
+    temp_path = f"{index_path}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as index_file:
+        json.dump(data, index_file)
+    os.replace(temp_path, index_path)
+
+
+def cached_keyframe_times(path):
+    """Keyframe times of a video, probed once and then read from the cache"""
+    index = load_index(path) or {}
+    if 'keyframes' not in index:
+        index['keyframes'] = video_engine.keyframe_times(path)
+        save_index(path, index)
+    return index['keyframes']
+
+
+def snap_to_keyframe(seconds, keyframes):
+    """Nearest keyframe time to ``seconds``; unchanged when there are no keyframes"""
+    if not keyframes:
+        return seconds
+    position = bisect.bisect_left(keyframes, seconds)
+    candidates = keyframes[max(0, position - 1):position + 1]
+    return min(candidates, key=lambda keyframe: abs(keyframe - seconds))
+
+
+def build_index(path, thumbnail_count=THUMBNAIL_COUNT, thumbnail_height=THUMBNAIL_HEIGHT,
+                status_callback=None):
+    """Probe keyframes and render the filmstrip, reusing whatever is cached
+
+    A failed keyframe probe still yields a filmstrip; the failure is passed
+    to ``status_callback``.
+    """
+    index = load_index(path) or {}
+
+    if 'keyframes' not in index:
+        try:
+            index['keyframes'] = video_engine.keyframe_times(path)
+        except Exception as e:
+            # Not cached, so a later run with ffprobe available fills it in
+            if status_callback:
+                status_callback(f"Keyframe probe failed for {os.path.basename(path)}: {str(e)}")
+    keyframes = index.get('keyframes', [])
+
+    if index.get('thumbnail_times'):
+        return index
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Cannot open {path}")
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        index['duration'] = duration
+
+        # Evenly spaced positions moved onto keyframes, so each thumbnail is one decode
+        wanted = [duration * (i + 0.5) / thumbnail_count for i in range(thumbnail_count)]
+        times = sorted({snap_to_keyframe(t, keyframes) for t in wanted})
+
+        thumbnails = []
+        thumbnail_times = []
+        for seconds in times:
+            cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000.0)
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            height, width = frame.shape[:2]
+            size = (max(1, int(width * thumbnail_height / height)), thumbnail_height)
+            thumbnails.append(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+            thumbnail_times.append(seconds)
+    finally:
+        cap.release()
+
+    if thumbnails:
+        _, strip_path = cache_paths(path)
+        os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+        cv2.imwrite(strip_path, np.hstack(thumbnails), [cv2.IMWRITE_JPEG_QUALITY, 80])
+        index['thumbnail_times'] = thumbnail_times
+        index['thumbnail_width'] = thumbnails[0].shape[1]
+        index['strip_path'] = strip_path
+
+    save_index(path, index)
+    return index
+
+
+def proxy_path(path):
+    return os.path.join(PROXY_DIR, f"{file_signature(path)}.mp4")
+
+
+def existing_proxy(path):
+    """Path of a finished proxy for this version of the file, or None"""
+    try:
+        proxy = proxy_path(path)
+    except OSError:
+        return None
+    return proxy if os.path.exists(proxy) else None
+
+
+def needs_proxy(path):
+    cap = cv2.VideoCapture(path)
+    try:
+        return cap.get(cv2.CAP_PROP_FRAME_HEIGHT) > PROXY_MIN_SOURCE_HEIGHT
+    finally:
+        cap.release()
+
+
+def make_proxy(path, progress_callback=None, cancel_event=None):
+    """Encode a small all-intra H.264 copy of a video without audio"""
+    proxy = proxy_path(path)
+    if os.path.exists(proxy):
+        return proxy
+
+    os.makedirs(PROXY_DIR, exist_ok=True)
+    temp_path = f"{proxy}.partial.mp4"
+    duration = video_engine.probe_video(path)['duration'] if progress_callback else None
+    try:
+        video_engine.run_ffmpeg(
+            ['-i', path, '-map', '0:v:0', '-an',
+             '-vf', f"scale=-2:{PROXY_HEIGHT}",
+             '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'fastdecode',
+             '-g', '1', '-crf', '26', '-pix_fmt', 'yuv420p', temp_path],
+            duration=duration, progress_callback=progress_callback, cancel_event=cancel_event)
+        os.replace(temp_path, proxy)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return proxy
+
+
+class ProxyBuilder(QThread):
+    """Background thread encoding proxies for requested files one at a time"""
+    proxy_progress = pyqtSignal(str, float)  # source path, percent
+    proxy_ready = pyqtSignal(str, str)  # source path, proxy path
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.queue = []
+        self.running = True
+        self.condition = threading.Condition()
+        self.cancel_event = threading.Event()
+
+    def request(self, path):
+        with self.condition:
+            if path not in self.queue:
+                self.queue.append(path)
+            self.condition.notify()
+        if not self.isRunning():
+            self.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.cancel_event.set()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                path = self.queue.pop(0)
+
+            try:
+                if not needs_proxy(path):
+                    continue
+                proxy = make_proxy(path, lambda info: self.proxy_progress.emit(path, info['percent']),
+                                   self.cancel_event)
+                self.proxy_ready.emit(path, proxy)
+            except video_engine.JobCancelled:
+                return
+            except Exception as e:
+                self.error.emit(f"Proxy for {os.path.basename(path)} failed: {str(e)}")
+
+
+class MediaIndexer(QThread):
+    """Background thread building indexes for requested files one at a time"""
+    index_ready = pyqtSignal(str, dict)  # video path, index
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.queue = []
+        self.running = True
+        self.condition = threading.Condition()
+
+    def request(self, path):
+        with self.condition:
+            if path not in self.queue:
+                self.queue.append(path)
+            self.condition.notify()
+        if not self.isRunning():
+            self.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                path = self.queue.pop(0)
+
+            try:
+                self.index_ready.emit(path, build_index(path, status_callback=self.error.emit))
+            except Exception as e:
+                self.error.emit(f"Indexing {os.path.basename(path)} failed: {str(e)}")
+
+
+class FilmstripWidget(QWidget):
+    """Thumbnail timeline with keyframe ticks, a selected range and a playhead"""
+    position_selected = pyqtSignal(float)  # seconds
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(THUMBNAIL_HEIGHT + 10)
+        self.setMaximumHeight(THUMBNAIL_HEIGHT + 10)
+        self.setCursor(Qt.PointingHandCursor)
+        self.clear()
+
+    def clear(self):
+        self.strip = None
+        self.thumbnail_times = []
+        self.thumbnail_width = 0
+        self.keyframes = []
+        self.duration = 0.0
+        self.range = None
+        self.position = None
+        self.update()
+
+    def set_duration(self, duration):
+        self.duration = duration
+        self.update()
+
+    def set_index(self, index):
+        self.keyframes = index.get('keyframes', [])
+        self.thumbnail_times = index.get('thumbnail_times', [])
+        self.thumbnail_width = index.get('thumbnail_width', 0)
+        self.duration = index.get('duration') or self.duration
+        strip_path = index.get('strip_path')
+        self.strip = QPixmap(strip_path) if strip_path else None
+        self.update()
+
+    def set_range(self, start, end):
+        self.range = (start, end)
+        self.update()
+
+    def set_position(self, seconds):
+        self.position = seconds
+        self.update()
+
+    def x_for(self, seconds):
+        return self.width() * seconds / self.duration if self.duration else 0
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#222'))
+        height = self.height()
+
+        if self.strip and not self.strip.isNull() and self.duration:
+            # Each thumbnail covers the span until the next one
+            for i, seconds in enumerate(self.thumbnail_times):
+                end = self.thumbnail_times[i + 1] if i + 1 < len(self.thumbnail_times) else self.duration
+                x = self.x_for(seconds if i else 0)
+                target = QRectF(x, 0, max(1.0, self.x_for(end) - x), height - 6)
+                source = QRectF(i * self.thumbnail_width, 0, self.thumbnail_width, self.strip.height())
+                painter.drawPixmap(target, self.strip, source)
+
+        if self.keyframes and self.duration:
+            painter.setPen(QPen(QColor('#FFC107'), 1))
+            for keyframe in self.keyframes:
+                x = int(self.x_for(keyframe))
+                painter.drawLine(x, height - 5, x, height)
+
+        if self.range and self.duration:
+            start, end = (self.x_for(value) for value in self.range)
+            painter.fillRect(QRectF(0, 0, start, height), QColor(0, 0, 0, 150))
+            painter.fillRect(QRectF(end, 0, self.width() - end, height), QColor(0, 0, 0, 150))
+            painter.setPen(QPen(QColor('#0078D7'), 2))
+            painter.drawRect(QRectF(start, 1, end - start, height - 2))
+
+        if self.position is not None and self.duration:
+            x = int(self.x_for(self.position))
+            painter.setPen(QPen(QColor('white'), 2))
+            painter.drawLine(x, 0, x, height)
+
+        painter.end()
+
+    def mousePressEvent(self, event):
+        self.select_at(event.x())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.select_at(event.x())
+
+    def select_at(self, x):
+        if self.duration and self.width():
+            seconds = min(max(x, 0), self.width()) * self.duration / self.width()
+            self.position = seconds
+            self.update()
+            self.position_selected.emit(seconds)
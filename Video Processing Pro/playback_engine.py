@@ -0,0 +1,330 @@
+"""Prefetching playback engine for the preview widgets
+
+A single thread owns the ``cv2.VideoCapture``. Between presenting frames it
+decodes ahead of the playhead into an LRU cache of RGB frames downscaled to
+the preview size, so playback runs at the source frame rate and scrubbing
+back and forth inside already decoded GOPs never touches the decoder.
+Seeks go to the keyframe before the target (from an ffprobe keyframe
+index) and decode forward, caching every frame on the way.
+
+Scaling and BGR to RGB conversion happen on the engine thread into
+recycled buffers, so only display-sized arrays cross to the GUI thread and
+the widgets can wrap them in a QImage without converting or rescaling.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict, deque
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import media_index
+
+
+class FrameCache:
+    """LRU cache of decoded frames bounded by memory
+
+    Evicted arrays are kept for reuse as decode targets, so steady-state
+    playback allocates no new frame memory. Only the engine thread reads
+    and writes it.
+    """
+
+    # The newest frames stay cached even when they alone exceed the budget
+    MIN_RECYCLE_AGE = 8
+    # Emitted arrays wait in the queued signal until the GUI copies them, so
+    # the last this many are never recycled, however soon they are evicted
+    EMITTED_GUARD = 32
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.spare = []
+        self.emitted = deque(maxlen=self.EMITTED_GUARD)
+
+    def __contains__(self, index):
+        return index in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get(self, index):
+        frame = self.frames.get(index)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.frames.move_to_end(index)
+        self.hits += 1
+        return frame
+
+    def put(self, index, frame):
+        old = self.frames.pop(index, None)
+        if old is not None:
+            self.size -= old.nbytes
+        self.frames[index] = frame
+        self.size += frame.nbytes
+
+        # Always keep the newest frames, even if they alone exceed the budget
+        while self.size > self.max_bytes and len(self.frames) > self.MIN_RECYCLE_AGE:
+            _, evicted = self.frames.popitem(last=False)
+            self.size -= evicted.nbytes
+            if len(self.spare) < 2 and not any(evicted is frame for frame in self.emitted):
+                self.spare.append(evicted)
+
+    def mark_emitted(self, frame):
+        """Keep an array handed to the GUI from being reused as a decode target"""
+        self.emitted.append(frame)
+
+    def take_buffer(self, shape, dtype=np.uint8):
+        """Return a recycled array of this shape, or a new one"""
+        while self.spare:
+            buffer = self.spare.pop()
+            if buffer.shape == shape and buffer.dtype == dtype:
+                return buffer
+        return np.empty(shape, dtype)
+
+    def clear(self):
+        self.frames.clear()
+        self.spare.clear()
+        self.size = 0
+
+
+class PlaybackEngine(QThread):
+    """Decode-ahead video player emitting preview-sized RGB frames
+
+    Emitted arrays are owned by the engine's cache; receivers must copy
+    them (``QPixmap.fromImage`` does) rather than keep references.
+    """
+    update_frame = pyqtSignal(np.ndarray)
+    position_changed = pyqtSignal(int)  # frame index of the emitted frame
+    update_duration = pyqtSignal(float)
+    playback_finished = pyqtSignal()
+    error = pyqtSignal(str)
+    status = pyqtSignal(str)  # problems playback carries on through
+
+    def __init__(self, video_path, loop=True, paused=False, prefetch_seconds=1.0,
+                 cache_bytes=256 * 1024 * 1024):
+        super().__init__()
+        self.video_path = video_path
+        self.loop = loop
+        self.paused = paused
+        self.prefetch_seconds = prefetch_seconds
+        self.cache = FrameCache(cache_bytes)
+        self.running = True
+
+        self.fps = 30.0
+        self.frame_count = 0
+        self.current_frame_position = 0
+        self.keyframes = None  # sorted frame indices, filled in the background
+
+        self.cap = None
+        self.decode_position = 0  # index of the frame the next read() returns
+        self.display_size = None  # (width, height) of the preview
+        self.scaled_size = None
+        self.scaled_for = None  # display size scaled_size was computed for
+        self.resize_buffer = None
+        self.seek_request = None
+        self.condition = threading.Condition()
+
+    # Control, called from the GUI thread
+
+    def seek(self, frame_position):
+        with self.condition:
+            self.seek_request = int(frame_position)
+            self.condition.notify()
+
+    def toggle_pause(self):
+        with self.condition:
+            self.paused = not self.paused
+            self.condition.notify()
+
+    def set_paused(self, paused):
+        with self.condition:
+            self.paused = paused
+            self.condition.notify()
+
+    def set_display_size(self, width, height):
+        """Frames are downscaled to fit this size; changing it drops the cache"""
+        with self.condition:
+            size = (max(1, int(width)), max(1, int(height)))
+            if size != self.display_size:
+                self.display_size = size
+                # Redraw the current frame at the new size
+                if self.seek_request is None:
+                    self.seek_request = self.current_frame_position
+                self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.wait()
+
+    # Engine thread
+
+    def run(self):
+        try:
+            if not self.video_path:
+                return
+
+            self.cap = cv2.VideoCapture(self.video_path)
+            if not self.cap.isOpened():
+                self.error.emit(f"Error opening video file: {self.video_path}")
+                return
+
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.update_duration.emit(self.frame_count / self.fps)
+
+            threading.Thread(target=self.load_keyframes, daemon=True).start()
+
+            self.playback_loop()
+        except Exception as e:
+            self.error.emit(f"Error in video thread: {str(e)}")
+        finally:
+            if self.cap is not None:
+                self.cap.release()
+
+    def load_keyframes(self):
+        try:
+            times = media_index.cached_keyframe_times(self.video_path)
+            self.keyframes = sorted({int(round(t * self.fps)) for t in times})
+        except Exception as e:
+            # Without ffprobe seeks fall back to OpenCV's own positioning
+            self.status.emit(f"Keyframe index unavailable: {str(e)}")
+
+    def playback_loop(self):
+        interval = 1.0 / self.fps
+        if not self.present(0):
+            self.error.emit(f"Could not decode video file: {self.video_path}")
+            return
+        next_deadline = time.perf_counter() + interval
+
+        while self.running:
+            with self.condition:
+                target, self.seek_request = self.seek_request, None
+                paused = self.paused
+
+            if target is not None:
+                self.present(min(max(target, 0), max(self.frame_count - 1, 0)))
+                next_deadline = time.perf_counter() + interval
+                continue
+
+            now = time.perf_counter()
+            if paused:
+                next_deadline = now + interval
+            elif now >= next_deadline:
+                # Skip frames instead of drifting when decoding falls behind
+                step = 1 + int((now - next_deadline) / interval)
+                next_deadline += step * interval
+                index = self.current_frame_position + step
+
+                if index >= self.frame_count:
+                    if not self.loop:
+                        with self.condition:
+                            self.paused = True
+                        self.playback_finished.emit()
+                        continue
+                    index = 0
+
+                if not self.present(index):
+                    # Container reported more frames than it has
+                    self.frame_count = index
+                continue
+
+            if self.prefetch_step():
+                continue
+
+            with self.condition:
+                if self.running and self.seek_request is None:
+                    self.condition.wait(None if self.paused else max(0.0, next_deadline - time.perf_counter()))
+
+    def present(self, index):
+        frame = self.frame_at(index)
+        if frame is None:
+            return False
+        self.current_frame_position = index
+        self.position_changed.emit(index)
+        self.cache.mark_emitted(frame)
+        self.update_frame.emit(frame)
+        return True
+
+    def prefetch_step(self):
+        """Decode the first missing frame ahead of the playhead; False when the window is full"""
+        end = min(self.frame_count, self.current_frame_position + 1 + int(self.prefetch_seconds * self.fps))
+        for index in range(self.current_frame_position + 1, end):
+            if index not in self.cache:
+                self.frame_at(index)
+                return True
+        return False
+
+    def frame_at(self, index):
+        frame = self.cache.get(index)
+        if frame is not None:
+            return frame
+
+        if not self.decode_forward_cheaper(index):
+            self.seek_decoder(index)
+
+        while self.decode_position <= index:
+            if self.decode_position in self.cache:
+                # Already have it, skip the colour conversion and scaling
+                ok = self.cap.grab()
+            else:
+                ok, raw = self.cap.read()
+                if ok:
+                    self.cache.put(self.decode_position, self.convert(raw))
+            if not ok:
+                return None
+            self.decode_position += 1
+
+        return self.cache.get(index)
+
+    def decode_forward_cheaper(self, index):
+        """True when reading on from the decoder position beats a seek"""
+        if index < self.decode_position:
+            return False
+        if self.keyframes:
+            # A seek would land on a keyframe at or before the current position
+            return self.keyframe_before(index) <= self.decode_position
+        return index - self.decode_position <= self.fps
+
+    def keyframe_before(self, index):
+        position = bisect.bisect_right(self.keyframes, index) - 1
+        return self.keyframes[position] if position >= 0 else 0
+
+    def seek_decoder(self, index):
+        start = self.keyframe_before(index) if self.keyframes else index
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        self.decode_position = start
+
+    def convert(self, frame):
+        """Scale a decoded BGR frame to the display size and convert it to RGB"""
+        height, width = frame.shape[:2]
+        display_size = self.display_size or (width, height)
+
+        if self.scaled_for != display_size:
+            ratio = min(display_size[0] / width, display_size[1] / height, 1.0)
+            self.scaled_size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+            self.scaled_for = display_size
+            self.resize_buffer = None
+            # Frames cached at the old size would be shown at the wrong scale
+            self.cache.clear()
+
+        scaled_width, scaled_height = self.scaled_size
+        rgb = self.cache.take_buffer((scaled_height, scaled_width, 3))
+
+        if self.scaled_size == (width, height):
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+            return rgb
+
+        # The scaled frame is a fraction of the source, so convert colour after resizing
+        if self.resize_buffer is None:
+            self.resize_buffer = np.empty((scaled_height, scaled_width, 3), np.uint8)
+        cv2.resize(frame, self.scaled_size, dst=self.resize_buffer, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.resize_buffer, cv2.COLOR_BGR2RGB, dst=rgb)
+        return rgb
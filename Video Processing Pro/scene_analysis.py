@@ -0,0 +1,254 @@
+"""Scene-change and silence detection for proposing split points
+
+ffmpeg decodes the video at a few frames per second, scaled to a tiny
+resolution, and the audio as 8 kHz mono. Scene scores combine colour
+histogram distance and mean frame difference between consecutive samples,
+computed a batch of frames at a time with NumPy. Silence comes from the
+RMS level of 50 ms audio windows. The raw scores are cached per file next
+to the media index, so changing thresholds never re-reads the video.
+"""
+import os
+import subprocess
+import threading
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import media_index
+import video_engine
+
+ANALYSIS_VERSION = 1
+SAMPLE_FPS = 4
+SAMPLE_SIZE = (160, 90)
+AUDIO_RATE = 8000
+AUDIO_WINDOW = 0.05  # seconds per RMS value
+BATCH_FRAMES = 64
+
+DEFAULT_SCENE_THRESHOLD = 0.3
+DEFAULT_MIN_SCENE = 2.0
+DEFAULT_SILENCE_DB = -40.0
+DEFAULT_MIN_SILENCE = 0.8
+
+
+def analysis_path(path):
+    return os.path.join(media_index.INDEX_CACHE_DIR,
+                        f"{media_index.file_signature(path)}.analysis{ANALYSIS_VERSION}.npz")
+
+
+def load_analysis(path):
+    """Cached scores of a video, or None"""
+    try:
+        with np.load(analysis_path(path)) as data:
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def scene_scores(frames, previous=None):
+    """Change score of each frame against the one before it
+
+    ``frames`` is an (N, H, W, 3) uint8 batch and ``previous`` the last
+    frame of the previous batch. The score averages the L1 distance of
+    16-bin per-channel histograms and the mean absolute grey difference,
+    both scaled to 0..1.
+    """
+    if previous is not None:
+        frames = np.concatenate([previous[None], frames])
+    count, height, width, _ = frames.shape
+    pixels = height * width
+
+    # Histograms of all frames at once: one bincount over offset bin indices
+    bins = (frames >> 4).astype(np.int64) + np.array([0, 16, 32])
+    bins = bins.reshape(count, -1) + (np.arange(count) * 48)[:, None]
+    histograms = np.bincount(bins.ravel(), minlength=count * 48).reshape(count, 48) / pixels
+    histogram_distance = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 6.0
+
+    grey = frames.astype(np.float32) @ np.array([0.299, 0.587, 0.114], np.float32)
+    frame_difference = np.abs(np.diff(grey, axis=0)).mean(axis=(1, 2)) / 255.0
+
+    scores = 0.5 * histogram_distance + 0.5 * frame_difference
+    if previous is None:
+        scores = np.concatenate([[0.0], scores])
+    return scores
+
+
+def rms_db(samples, window):
+    """RMS level in dBFS of consecutive windows of 16-bit samples"""
+    usable = len(samples) - len(samples) % window
+    if not usable:
+        return np.empty(0, np.float32)
+    blocks = samples[:usable].astype(np.float32).reshape(-1, window) / 32768.0
+    rms = np.sqrt(np.mean(blocks * blocks, axis=1))
+    return (20.0 * np.log10(np.maximum(rms, 1e-6))).astype(np.float32)
+
+
+def analyze(path, duration=None, progress_callback=None, cancel_event=None):
+    """Compute scene scores and audio levels of a video, using the cache when possible"""
+    cached = load_analysis(path)
+    if cached is not None:
+        return cached
+
+    width, height = SAMPLE_SIZE
+    frame_bytes = width * height * 3
+    expected_frames = max(1, int((duration or 0) * SAMPLE_FPS))
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def report(percent):
+        if progress_callback:
+            progress_callback(min(100.0, percent))
+
+    # Video pass, 0-80%
+    process = subprocess.Popen(
+        [video_engine.FFMPEG_BINARY, '-v', 'error', '-i', path, '-an',
+         '-vf', f"fps={SAMPLE_FPS},scale={width}:{height}",
+         '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    scores = []
+    previous = None
+    read_frames = 0
+    try:
+        while True:
+            if cancelled():
+                raise video_engine.JobCancelled()
+            data = process.stdout.read(frame_bytes * BATCH_FRAMES)
+            count = len(data) // frame_bytes
+            if not count:
+                process.wait()
+                break
+            frames = np.frombuffer(data[:count * frame_bytes], np.uint8).reshape(count, height, width, 3)
+            scores.append(scene_scores(frames, previous))
+            previous = frames[-1]
+            read_frames += count
+            report(80.0 * read_frames / expected_frames)
+    finally:
+        process.kill()
+        process.wait()
+    # Never cache the result of a failed decode, it would be returned for this file from then on
+    if process.returncode != 0 or not scores:
+        raise RuntimeError(f"Could not decode the video of {os.path.basename(path)}")
+
+    # Audio pass, 80-100%
+    window = int(AUDIO_RATE * AUDIO_WINDOW)
+    process = subprocess.Popen(
+        [video_engine.FFMPEG_BINARY, '-v', 'error', '-i', path, '-vn',
+         '-ac', '1', '-ar', str(AUDIO_RATE), '-f', 's16le', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    levels = []
+    read_seconds = 0.0
+    try:
+        while True:
+            if cancelled():
+                raise video_engine.JobCancelled()
+            # Whole windows only, so no samples carry over between reads
+            data = process.stdout.read(window * 2 * 200)
+            if not data:
+                break
+            samples = np.frombuffer(data[:len(data) - len(data) % 2], np.int16)
+            levels.append(rms_db(samples, window))
+            read_seconds += len(samples) / AUDIO_RATE
+            if duration:
+                report(80.0 + 20.0 * read_seconds / duration)
+    finally:
+        process.kill()
+        process.wait()
+
+    analysis = {
+        'scene_scores': np.concatenate(scores) if scores else np.zeros(0),
+        'sample_fps': np.array(SAMPLE_FPS),
+        'audio_db': np.concatenate(levels) if levels else np.zeros(0, np.float32),
+        'audio_window': np.array(AUDIO_WINDOW),
+    }
+
+    os.makedirs(media_index.INDEX_CACHE_DIR, exist_ok=True)
+    target = analysis_path(path)
+    temp_path = f"{target}.partial.npz"
+    np.savez_compressed(temp_path, **analysis)
+    os.replace(temp_path, target)
+
+    report(100.0)
+    return analysis
+
+
+def local_maxima(values, radius):
+    """Mask of entries that are the maximum within ``radius`` on each side"""
+    if not len(values) or radius < 1:
+        return np.ones(len(values), bool)
+    padded = np.pad(values, radius, mode='constant', constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1)
+    return values >= windows.max(axis=1)
+
+
+def propose_split_points(analysis, duration=None, scene_threshold=DEFAULT_SCENE_THRESHOLD,
+                         min_scene=DEFAULT_MIN_SCENE, silence_db=DEFAULT_SILENCE_DB,
+                         min_silence=DEFAULT_MIN_SILENCE):
+    """Split points from cached scores as sorted dicts with time, kind and score
+
+    Scene cuts are scores above the threshold that are the strongest change
+    within ``min_scene`` seconds. Silences at least ``min_silence`` long
+    propose their midpoint. Scene cuts inside or next to a silence are
+    reported once as 'scene+silence'.
+    """
+    points = []
+
+    scores = analysis['scene_scores']
+    sample_fps = float(analysis['sample_fps'])
+    peaks = (scores >= scene_threshold) & local_maxima(scores, int(min_scene * sample_fps))
+    for index in np.flatnonzero(peaks):
+        points.append({'time': float(index / sample_fps), 'kind': 'scene', 'score': float(scores[index])})
+
+    levels = analysis['audio_db']
+    window = float(analysis['audio_window'])
+    silent = np.concatenate([[False], levels < silence_db, [False]])
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    for start, end in zip(edges[::2], edges[1::2]):
+        if (end - start) * window < min_silence:
+            continue
+        start_time, end_time = start * window, end * window
+        scene = next((p for p in points if p['kind'] == 'scene' and
+                      start_time - 1.0 <= p['time'] <= end_time + 1.0), None)
+        if scene:
+            scene['kind'] = 'scene+silence'
+        else:
+            points.append({'time': float(start_time + end_time) / 2, 'kind': 'silence',
+                           'score': float(levels[start:end].mean())})
+
+    # Points at the very start or end would only produce empty segments
+    end_limit = (duration or float('inf')) - 1.0
+    return sorted((p for p in points if 1.0 <= p['time'] <= end_limit), key=lambda p: p['time'])
+
+
+def segments_from_points(times, duration):
+    """Consecutive (start, end) ranges covering the video split at ``times``"""
+    bounds = [0.0] + sorted(t for t in times if 0.0 < t < duration) + [duration]
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end - start > 0.1]
+
+
+class SceneAnalysisThread(QThread):
+    """Analyse a video in the background"""
+    progress = pyqtSignal(int)
+    analysis_ready = pyqtSignal(str, dict)  # video path, analysis
+    error = pyqtSignal(str)
+
+    def __init__(self, path, duration):
+        super().__init__()
+        self.path = path
+        self.duration = duration
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            analysis = analyze(self.path, self.duration,
+                               progress_callback=lambda percent: self.progress.emit(int(percent)),
+                               cancel_event=self.cancel_event)
+            self.analysis_ready.emit(self.path, analysis)
+        except video_engine.JobCancelled:
+            pass
+        except Exception as e:
+            self.error.emit(f"Analysis failed: {str(e)}")
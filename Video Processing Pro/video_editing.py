@@ -7,13 +7,20 @@ import numpy as np
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QSlider, QFileDialog, QListWidget, QWidget, QMessageBox, 
-    QDialog, QDialogButtonBox, QProgressBar
+    QDialog, QDialogButtonBox, QProgressBar, QCheckBox, QListWidgetItem,
+    QDoubleSpinBox, QSpinBox, QFormLayout
 )
 from PyQt5.QtGui import QImage, QPixmap, QPalette, QColor
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
 from moviepy.editor import VideoFileClip, concatenate_videoclips
 
+from batch_cut import BatchCutDialog
+import media_index
+import scene_analysis
+from media_index import FilmstripWidget, MediaIndexer, ProxyBuilder
+from playback_engine import PlaybackEngine
+
 class VideoProcessingThread(QThread):
     """Thread to handle video processing to keep UI responsive"""
     progress_updated = pyqtSignal(int)
@@ -109,6 +116,84 @@ class VideoSelectionDialog(QDialog):
         return [original_videos[i] for i in selected_indices]
 
 
+class SplitPointsDialog(QDialog):
+    """Review split points proposed by scene/silence analysis."""
+    seek_requested = pyqtSignal(float)
+    
+    def __init__(self, analysis, duration, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('MOHD HABIB - Detected Split Points')
+        self.setGeometry(200, 200, 460, 480)
+        self.analysis = analysis
+        self.duration = duration
+        self.points = []
+        
+        layout = QVBoxLayout()
+        
+        # Thresholds re-evaluate the cached scores instantly
+        form = QFormLayout()
+        self.scene_threshold = QDoubleSpinBox()
+        self.scene_threshold.setRange(0.05, 1.0)
+        self.scene_threshold.setSingleStep(0.05)
+        self.scene_threshold.setValue(scene_analysis.DEFAULT_SCENE_THRESHOLD)
+        form.addRow('Scene change threshold:', self.scene_threshold)
+        
+        self.silence_db = QSpinBox()
+        self.silence_db.setRange(-90, -10)
+        self.silence_db.setSuffix(' dB')
+        self.silence_db.setValue(int(scene_analysis.DEFAULT_SILENCE_DB))
+        form.addRow('Silence below:', self.silence_db)
+        
+        self.min_silence = QDoubleSpinBox()
+        self.min_silence.setRange(0.1, 30.0)
+        self.min_silence.setSuffix(' s')
+        self.min_silence.setValue(scene_analysis.DEFAULT_MIN_SILENCE)
+        form.addRow('Minimum silence:', self.min_silence)
+        layout.addLayout(form)
+        
+        for control in (self.scene_threshold, self.silence_db, self.min_silence):
+            control.valueChanged.connect(self.refresh_points)
+        
+        layout.addWidget(QLabel('Checked points split the video (double-click to preview):'))
+        self.point_list = QListWidget()
+        self.point_list.itemDoubleClicked.connect(
+            lambda item: self.seek_requested.emit(item.data(Qt.UserRole)))
+        layout.addWidget(self.point_list)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText('Split at Checked Points')
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        
+        self.setLayout(layout)
+        self.refresh_points()
+    
+    def refresh_points(self):
+        self.points = scene_analysis.propose_split_points(
+            self.analysis, self.duration,
+            scene_threshold=self.scene_threshold.value(),
+            silence_db=self.silence_db.value(),
+            min_silence=self.min_silence.value()
+        )
+        self.point_list.clear()
+        for point in self.points:
+            if point['kind'] == 'silence':
+                detail = f"silence ({point['score']:.0f} dB)"
+            else:
+                detail = f"{point['kind']} ({point['score']:.2f})"
+            item = QListWidgetItem(f"{str(timedelta(seconds=round(point['time'], 1)))[:10]}  {detail}")
+            item.setData(Qt.UserRole, point['time'])
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.point_list.addItem(item)
+    
+    def checked_times(self):
+        return [self.point_list.item(i).data(Qt.UserRole)
+                for i in range(self.point_list.count())
+                if self.point_list.item(i).checkState() == Qt.Checked]
+
+
 class VideoEditorApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -117,6 +202,18 @@ class VideoEditorApp(QMainWindow):
         self.loaded_videos = []
         self.video_clips = []
         self.processing_thread = None
+        self.analysis_thread = None
+        self.player = None
+        
+        # Keyframes and thumbnails are indexed in the background
+        self.media_indexer = MediaIndexer()
+        self.media_indexer.index_ready.connect(self.on_index_ready)
+        self.media_indexer.error.connect(self.statusBar().showMessage)
+        
+        # Low resolution proxies for previewing large sources
+        self.proxy_builder = ProxyBuilder()
+        self.proxy_builder.proxy_ready.connect(self.on_proxy_ready)
+        self.proxy_builder.error.connect(self.statusBar().showMessage)
 
     def initUI(self):
         """Initialize the main user interface."""
@@ -204,6 +301,11 @@ class VideoEditorApp(QMainWindow):
         self.slider.sliderMoved.connect(self.slider_moved)
         left_panel.addWidget(self.slider)
         
+        # Thumbnail timeline
+        self.filmstrip = FilmstripWidget()
+        self.filmstrip.position_selected.connect(self.filmstrip_clicked)
+        left_panel.addWidget(self.filmstrip)
+        
         # Control buttons
         button_layout = QHBoxLayout()
         buttons = [
@@ -220,6 +322,12 @@ class VideoEditorApp(QMainWindow):
         
         left_panel.addLayout(button_layout)
         
+        # Proxies only affect preview; split and merge read the original files
+        self.proxy_checkbox = QCheckBox('Preview with proxy media')
+        self.proxy_checkbox.setChecked(True)
+        self.proxy_checkbox.toggled.connect(self.on_proxy_toggled)
+        left_panel.addWidget(self.proxy_checkbox)
+        
         # Right panel for video list and processing
         right_panel = QVBoxLayout()
         
@@ -232,6 +340,8 @@ class VideoEditorApp(QMainWindow):
         process_buttons = [
             ('Split Video', self.split_video),
             ('Merge Videos', self.merge_videos),
+            ('Detect Splits', self.detect_split_points),
+            ('Batch Split', self.batch_split),
             ('Clear List', self.clear_video_list)
         ]
         
@@ -257,10 +367,6 @@ class VideoEditorApp(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
         
-        # Video playback timer
-        self.play_timer = QTimer()
-        self.play_timer.timeout.connect(self.update_frame)
-        
         # Playback state variables
         self.is_playing = False
         self.start_point = 0
@@ -269,7 +375,7 @@ class VideoEditorApp(QMainWindow):
     
     def split_video(self):
         """Split the video based on selected start and end points with user-selected save location."""
-        if not hasattr(self, 'cap') or not self.cap.isOpened():
+        if self.player is None:
             QMessageBox.warning(self, 'Error', 'No video loaded')
             return
         
@@ -321,6 +427,58 @@ class VideoEditorApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'Could not prepare video splitting: {str(e)}')
     
+    def detect_split_points(self):
+        """Analyse the current video for scene changes and silences."""
+        if self.player is None or not self.loaded_videos:
+            QMessageBox.warning(self, 'Error', 'No video loaded')
+            return
+        if self.analysis_thread and self.analysis_thread.isRunning():
+            return
+        
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.analysis_thread = scene_analysis.SceneAnalysisThread(self.loaded_videos[-1], self.duration)
+        self.analysis_thread.progress.connect(self.update_progress_bar)
+        self.analysis_thread.analysis_ready.connect(self.on_analysis_ready)
+        self.analysis_thread.error.connect(self.on_processing_error)
+        self.analysis_thread.start()
+    
+    def on_analysis_ready(self, path, analysis):
+        """Let the user review proposals, then split through the batch pipeline."""
+        self.progress_bar.setValue(100)
+        duration = self.duration
+        
+        dialog = SplitPointsDialog(analysis, duration, self)
+        dialog.seek_requested.connect(lambda seconds: self.player and self.player.seek(int(seconds * self.fps)))
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        
+        segments = scene_analysis.segments_from_points(dialog.checked_times(), duration)
+        if len(segments) < 2:
+            QMessageBox.information(self, 'Split', 'No split points selected')
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, 'Select Output Folder', os.path.dirname(path))
+        if not output_dir:
+            return
+        
+        stem, extension = os.path.splitext(os.path.basename(path))
+        cuts = [{
+            'input': path,
+            'start': start,
+            'end': end,
+            'output': os.path.join(output_dir, f'{stem}_part{number:03d}{extension or ".mp4"}'),
+        } for number, (start, end) in enumerate(segments, 1)]
+        
+        batch_dialog = BatchCutDialog(self)
+        batch_dialog.set_cuts(cuts)
+        batch_dialog.exec_()
+    
+    def batch_split(self):
+        """Split many segments from a CSV/JSON cut list in parallel processes."""
+        dialog = BatchCutDialog(self)
+        dialog.exec_()
+    
     def merge_videos(self):
         """Merge selected videos into a single output file."""
         # Check if there are enough videos to merge
@@ -412,16 +570,15 @@ class VideoEditorApp(QMainWindow):
     
     def slider_moved(self, position):
         """Handle slider movement to seek video."""
-        self.current_frame = position
-        self.update_frame()
+        if self.player:
+            self.player.seek(position)
         
     def toggle_playback(self):
         """Toggle video play/pause."""
+        if self.player is None:
+            return
         self.is_playing = not self.is_playing
-        if self.is_playing:
-            self.play_timer.start(int(1000 / self.fps))
-        else:
-            self.play_timer.stop()
+        self.player.set_paused(not self.is_playing)
             
     def load_video(self):
         """Load a video file and prepare it for playback."""
@@ -433,13 +590,14 @@ class VideoEditorApp(QMainWindow):
         
         if file_path:
             try:
-                # Open video using OpenCV
-                self.cap = cv2.VideoCapture(file_path)
-                
-                # Get video properties
-                self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+                # Read video properties with OpenCV
+                cap = cv2.VideoCapture(file_path)
+                if not cap.isOpened():
+                    raise IOError(f'Cannot open {file_path}')
+                self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
                 self.duration = self.total_frames / self.fps
+                cap.release()
                 
                 # Configure slider
                 self.slider.setRange(0, self.total_frames)
@@ -451,8 +609,16 @@ class VideoEditorApp(QMainWindow):
                 self.video_list.addItem(os.path.basename(file_path))
                 self.loaded_videos.append(file_path)
                 
-                # Display first frame
-                self.update_frame()
+                # Playback engine shows the first frame and waits paused
+                self.start_player(self.preview_path(file_path))
+                
+                self.start_point = 0
+                self.end_point = 0
+                self.filmstrip.clear()
+                self.filmstrip.set_duration(self.duration)
+                self.media_indexer.request(file_path)
+                if self.proxy_checkbox.isChecked():
+                    self.proxy_builder.request(file_path)
                 
             except Exception as e:
                 QMessageBox.critical(self, 'Error', f'Could not load video: {str(e)}')
@@ -460,50 +626,115 @@ class VideoEditorApp(QMainWindow):
     def set_start_point(self):
         """Set the start point for video splitting."""
         self.start_point = self.current_frame
+        self.update_filmstrip_range()
         QMessageBox.information(self, 'Start Point', f'Start point set at {self.format_time(self.start_point/self.fps)}')
 
     def set_end_point(self):
         """Set the end point for video splitting."""
         self.end_point = self.current_frame
+        self.update_filmstrip_range()
         QMessageBox.information(self, 'End Point', f'End point set at {self.format_time(self.end_point/self.fps)}')
 
-    def update_frame(self):
+    def preview_path(self, path):
+        """Proxy of path when enabled and built, else path itself."""
+        if self.proxy_checkbox.isChecked():
+            return media_index.existing_proxy(path) or path
+        return path
+    
+    def on_proxy_toggled(self, checked):
+        if not self.loaded_videos:
+            return
+        if checked:
+            self.proxy_builder.request(self.loaded_videos[-1])
+        self.start_player(self.preview_path(self.loaded_videos[-1]), self.current_frame)
+    
+    def on_proxy_ready(self, path, proxy):
+        """Swap the preview to the proxy, keeping the position."""
+        if self.proxy_checkbox.isChecked() and self.loaded_videos and path == self.loaded_videos[-1]:
+            self.start_player(proxy, self.current_frame)
+    
+    def start_player(self, file_path, frame=0):
+        """Replace the playback engine with one for file_path."""
+        self.stop_player()
+        self.current_frame = frame
+        self.is_playing = False
+        
+        self.player = PlaybackEngine(file_path, loop=False, paused=True)
+        if frame:
+            self.player.seek(frame)
+        self.player.set_display_size(self.video_label.width(), self.video_label.height())
+        self.player.update_frame.connect(self.update_frame)
+        self.player.position_changed.connect(self.on_position_changed)
+        self.player.playback_finished.connect(self.on_playback_finished)
+        self.player.error.connect(lambda message: QMessageBox.critical(self, 'Error', message))
+        self.player.status.connect(self.statusBar().showMessage)
+        self.player.start()
+    
+    def stop_player(self):
+        if self.player:
+            self.player.stop()
+            self.player = None
+    
+    def update_frame(self, frame):
         """Update the video frame display."""
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            # Set video to current frame
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-            ret, frame = self.cap.read()
-            
-            if ret:
-                # Convert frame to QImage
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_frame.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                
-                # Scale image to fit label
-                pixmap = QPixmap.fromImage(qt_image).scaled(
-                    self.video_label.width(), 
-                    self.video_label.height(), 
-                    Qt.KeepAspectRatio
-                )
-                self.video_label.setPixmap(pixmap)
-                
-                # Update time label and slider
-                current_time = self.current_frame / self.fps
-                self.time_label.setText(
-                    f'{self.format_time(current_time)} / {self.format_time(self.duration)}'
-                )
-                self.slider.setValue(self.current_frame)
-                
-                # Increment frame if playing
-                if self.is_playing:
-                    self.current_frame += 1
-                    
-                    # Stop if reached end or selected end point
-                    if (self.current_frame >= self.total_frames or 
-                        (self.end_point > 0 and self.current_frame >= self.end_point)):
-                        self.toggle_playback()
+        # Frames arrive as RGB already scaled to the label on the decode thread
+        h, w, ch = frame.shape
+        qt_image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888)
+        pixmap = QPixmap.fromImage(qt_image)
+        
+        # Only frames decoded before a resize still need scaling
+        if w > self.video_label.width() or h > self.video_label.height():
+            pixmap = pixmap.scaled(
+                self.video_label.width(), 
+                self.video_label.height(), 
+                Qt.KeepAspectRatio
+            )
+        self.video_label.setPixmap(pixmap)
+    
+    def on_position_changed(self, frame_index):
+        """Update time label and slider for the frame on screen."""
+        self.current_frame = frame_index
+        current_time = self.current_frame / self.fps
+        self.time_label.setText(
+            f'{self.format_time(current_time)} / {self.format_time(self.duration)}'
+        )
+        self.slider.setValue(self.current_frame)
+        self.filmstrip.set_position(current_time)
+        
+        # Stop at the selected end point
+        if self.is_playing and self.end_point > 0 and self.current_frame >= self.end_point:
+            self.toggle_playback()
+    
+    def on_playback_finished(self):
+        self.is_playing = False
+    
+    def on_index_ready(self, path, index):
+        """Show the filmstrip of the video on screen."""
+        if self.loaded_videos and path == self.loaded_videos[-1]:
+            self.filmstrip.set_index(index)
+    
+    def filmstrip_clicked(self, seconds):
+        """Seek to the position clicked on the filmstrip."""
+        if self.player:
+            self.player.seek(int(seconds * self.fps))
+    
+    def update_filmstrip_range(self):
+        end_point = self.end_point if self.end_point > self.start_point else self.total_frames
+        self.filmstrip.set_range(self.start_point / self.fps, end_point / self.fps)
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.player:
+            self.player.set_display_size(self.video_label.width(), self.video_label.height())
+    
+    def closeEvent(self, event):
+        if self.analysis_thread and self.analysis_thread.isRunning():
+            self.analysis_thread.cancel()
+            self.analysis_thread.wait()
+        self.stop_player()
+        self.media_indexer.stop()
+        self.proxy_builder.stop()
+        super().closeEvent(event)
 
 def main():
     app = QApplication(sys.argv)
@@ -512,4 +743,4 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
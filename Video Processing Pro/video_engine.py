@@ -0,0 +1,823 @@
+"""FFmpeg helpers shared by the video editors
+
+Probing, keyframe lookup and lossless (stream copy) trimming and merging.
+Everything here runs ffmpeg/ffprobe as subprocesses and is safe to call
+from worker threads.
+"""
+import os
+import csv
+import bisect
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FFMPEG_BINARY = "ffmpeg"
+FFPROBE_BINARY = "ffprobe"
+
+try:
+    # MoviePy ships its own ffmpeg build through imageio-ffmpeg
+    from moviepy.config import get_setting
+    FFMPEG_BINARY = get_setting("FFMPEG_BINARY")
+except Exception:
+    pass
+
+# Encoders used to re-encode the partial GOPs at the ends of a smart cut
+VIDEO_ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+    'mpeg4': 'mpeg4',
+    'vp9': 'libvpx-vp9',
+}
+
+AUDIO_ENCODERS = {
+    'aac': 'aac',
+    'mp3': 'libmp3lame',
+    'opus': 'libopus',
+    'vorbis': 'libvorbis',
+    'ac3': 'ac3',
+}
+
+# Codecs whose parameter sets MPEG-TS carries in-band (annex B), so parts
+# encoded with different settings can be joined by stream copy through it
+TRANSPORT_VIDEO_CODECS = ('h264', 'hevc', 'mpeg4')
+TRANSPORT_AUDIO_CODECS = ('aac', 'mp3', 'ac3', 'opus')
+
+# Names used in the UI that differ from ffprobe codec names
+CODEC_ALIASES = {'h265': 'hevc'}
+
+# Speed/quality presets expressed per encoder, so the same choice works for all codecs
+ENCODER_PRESETS = {
+    'libx264': {
+        'Fastest': ['-preset', 'ultrafast'],
+        'Fast': ['-preset', 'veryfast'],
+        'Balanced': ['-preset', 'medium'],
+        'Quality': ['-preset', 'slow'],
+    },
+    'libx265': {
+        'Fastest': ['-preset', 'ultrafast'],
+        'Fast': ['-preset', 'veryfast'],
+        'Balanced': ['-preset', 'medium'],
+        'Quality': ['-preset', 'slow'],
+    },
+    'libvpx-vp9': {
+        'Fastest': ['-deadline', 'realtime', '-cpu-used', '8', '-row-mt', '1'],
+        'Fast': ['-deadline', 'good', '-cpu-used', '5', '-row-mt', '1'],
+        'Balanced': ['-deadline', 'good', '-cpu-used', '2', '-row-mt', '1'],
+        'Quality': ['-deadline', 'good', '-cpu-used', '0', '-row-mt', '1'],
+    },
+}
+
+PRESET_NAMES = ['Fastest', 'Fast', 'Balanced', 'Quality']
+
+# Re-encodes shorter than two chunks of this length run as a single encoder
+CHUNK_MIN_SECONDS = 60
+
+
+def parse_fraction(value, default=0.0):
+    """Convert an ffprobe fraction like '30000/1001' to a float"""
+    try:
+        if '/' in str(value):
+            num, den = str(value).split('/', 1)
+            return float(num) / float(den) if float(den) else default
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class JobCancelled(Exception):
+    """Raised when a running job is cancelled"""
+
+
+def progress_info(done_seconds, total_seconds, frame, started):
+    """Build the progress dict reported to callbacks"""
+    elapsed = max(time.time() - started, 1e-6)
+    percent = min(100.0, 100.0 * done_seconds / total_seconds) if total_seconds else 0.0
+    speed = done_seconds / elapsed
+    remaining = (total_seconds - done_seconds) / speed if speed > 0 and total_seconds else None
+    return {
+        'percent': percent,
+        'frame': frame,
+        'fps': frame / elapsed if frame else 0.0,
+        'speed': speed,
+        'eta': remaining,
+    }
+
+
+def stage_progress(progress_callback, offset, length, total, started):
+    """Callback mapping a step's progress onto seconds [offset, offset + length) of total work"""
+    if not progress_callback or not total:
+        return None
+
+    def callback(info):
+        position = offset + length * min(info['percent'], 100.0) / 100.0
+        overall = progress_info(position, total, info['frame'], started)
+        overall['fps'] = info['fps']
+        progress_callback(overall)
+    return callback
+
+
+def run_ffmpeg(args, duration=None, progress_callback=None, cancel_event=None):
+    """Run ffmpeg with the given arguments and raise RuntimeError on failure
+
+    With a ``progress_callback`` the encoder's ``-progress`` output is parsed
+    and the callback receives dicts with percent, frame, fps, speed (media
+    seconds per second) and eta. Setting ``cancel_event`` kills the process
+    and raises JobCancelled.
+    """
+    command = [FFMPEG_BINARY, '-y', '-hide_banner', '-v', 'error']
+
+    if progress_callback is None and cancel_event is None:
+        result = subprocess.run(command + list(args), capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+        return result
+
+    process = subprocess.Popen(
+        command + ['-progress', 'pipe:1', '-nostats'] + list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+
+    # Drain stderr on the side so a chatty encoder can never block
+    errors = []
+    stderr_thread = threading.Thread(target=lambda: errors.extend(process.stderr), daemon=True)
+    stderr_thread.start()
+
+    started = time.time()
+    frame = 0
+    try:
+        for line in process.stdout:
+            if cancel_event is not None and cancel_event.is_set():
+                process.kill()
+                process.wait()
+                raise JobCancelled()
+
+            key, _, value = line.strip().partition('=')
+            if key == 'frame':
+                frame = int(value or 0)
+            elif key == 'out_time_us' and value.isdigit() and progress_callback:
+                progress_callback(progress_info(int(value) / 1e6, duration, frame, started))
+            elif key == 'progress' and value == 'end' and progress_callback:
+                progress_callback(progress_info(duration or 0, duration, frame, started))
+    finally:
+        if process.poll() is None and cancel_event is not None and cancel_event.is_set():
+            process.kill()
+
+    process.wait()
+    stderr_thread.join(timeout=1)
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelled()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {''.join(errors).strip()}")
+    return process
+
+
+def probe_video(path):
+    """Return codec, geometry, timing and audio parameters of a video file"""
+    result = subprocess.run(
+        [FFPROBE_BINARY, '-v', 'error', '-show_data_hash', 'sha256',
+         '-show_entries',
+         'stream=codec_type,codec_name,profile,level,refs,extradata_hash,width,height,r_frame_rate,'
+         'pix_fmt,time_base,sample_rate,channels:format=duration',
+         '-of', 'json', path],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr.strip()}")
+
+    data = json.loads(result.stdout)
+    video = next((s for s in data.get('streams', []) if s.get('codec_type') == 'video'), {})
+    audio = next((s for s in data.get('streams', []) if s.get('codec_type') == 'audio'), None)
+
+    return {
+        'codec': video.get('codec_name'),
+        'profile': video.get('profile'),
+        'level': video.get('level'),
+        'refs': video.get('refs'),
+        'extradata_hash': video.get('extradata_hash'),  # hash of the SPS/PPS (avcC, hvcC) header
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'fps_fraction': video.get('r_frame_rate', '30/1'),
+        'fps': parse_fraction(video.get('r_frame_rate'), 30.0),
+        'pix_fmt': video.get('pix_fmt'),
+        'time_base': video.get('time_base'),
+        'duration': parse_fraction(data.get('format', {}).get('duration'), 0.0),
+        'audio_codec': audio.get('codec_name') if audio else None,
+        'sample_rate': audio.get('sample_rate') if audio else None,
+        'channels': audio.get('channels') if audio else None,
+    }
+
+
+def keyframe_times(path):
+    """Return the sorted presentation times (seconds) of all video keyframes
+
+    Times count from the video stream's start, like cut points and frame
+    indices do, also in files that start later than 0 (MPEG-TS, edit lists).
+    """
+    result = subprocess.run(
+        [FFPROBE_BINARY, '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=start_time:packet=pts_time,flags', '-of', 'csv=p=0', path],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr.strip()}")
+
+    start_time = 0.0
+    times = []
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) == 1:
+            # The stream section has the start time alone
+            start_time = parse_fraction(parts[0], 0.0)
+        elif 'K' in parts[1] and parts[0] not in ('', 'N/A'):
+            times.append(float(parts[0]))
+    return sorted(seconds - start_time for seconds in times)
+
+
+def same_codec_parameters(infos):
+    """True when all inputs share the decoder setup (SPS/PPS) of the first
+
+    The concat demuxer with ``-c copy`` writes only the first file's codec
+    parameters, so a part encoded with other parameters would be decoded
+    with the wrong ones. An input whose header hash ffprobe does not report
+    counts as different.
+    """
+    keys = ('profile', 'level', 'refs', 'extradata_hash')
+    first = infos[0]
+    if any(info.get('extradata_hash') is None for info in infos):
+        return len(infos) == 1
+    return all(all(info.get(key) == first.get(key) for key in keys) for info in infos[1:])
+
+
+def streams_compatible(infos):
+    """True when all inputs can be concatenated without re-encoding"""
+    keys = ('codec', 'width', 'height', 'fps_fraction', 'pix_fmt',
+            'audio_codec', 'sample_rate', 'channels')
+    first = infos[0]
+    return all(all(info.get(key) == first.get(key) for key in keys) for info in infos[1:])
+
+
+def concat_copy(segment_paths, output_path, cancel_event=None, extra_args=None, duration=None,
+                progress_callback=None):
+    """Join files with identical stream parameters using the concat demuxer
+
+    MPEG-TS parts may differ in their encoder settings, since each carries
+    its own parameter sets in-band.
+    """
+    work_dir = tempfile.mkdtemp(prefix='concat_')
+    try:
+        list_path = os.path.join(work_dir, 'segments.txt')
+        with open(list_path, 'w', encoding='utf-8') as list_file:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                list_file.write(f"file '{escaped}'\n")
+
+        run_ffmpeg(['-f', 'concat', '-safe', '0', '-i', list_path,
+                    '-map', '0', '-c', 'copy', '-movflags', '+faststart'] + list(extra_args or []) + [output_path],
+                   duration=duration, progress_callback=progress_callback, cancel_event=cancel_event)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def copy_segment(input_path, output_path, start, end, cancel_event=None, progress_callback=None):
+    """Stream copy [start, end) starting from the keyframe at or before start"""
+    run_ffmpeg(['-ss', f"{start:.6f}", '-i', input_path, '-t', f"{end - start:.6f}",
+                '-map', '0:v:0', '-map', '0:a?', '-c', 'copy',
+                '-avoid_negative_ts', 'make_zero', output_path],
+               duration=end - start, progress_callback=progress_callback, cancel_event=cancel_event)
+
+
+def encode_segment_like(input_path, output_path, start, end, info, cancel_event=None, progress_callback=None):
+    """Re-encode [start, end) with the codecs, frame rate and pixel format of the source"""
+    args = ['-ss', f"{start:.6f}", '-i', input_path, '-t', f"{end - start:.6f}",
+            '-map', '0:v:0', '-map', '0:a?',
+            '-c:v', VIDEO_ENCODERS[info['codec']],
+            '-r', info['fps_fraction']]
+    if info.get('pix_fmt'):
+        args += ['-pix_fmt', info['pix_fmt']]
+    if info.get('audio_codec'):
+        args += ['-c:a', AUDIO_ENCODERS[info['audio_codec']],
+                 '-ar', str(info['sample_rate']), '-ac', str(info['channels'])]
+    run_ffmpeg(args + [output_path], duration=end - start,
+               progress_callback=progress_callback, cancel_event=cancel_event)
+
+
+def merge_target(infos, resolution='Original', fps='Original', codec=None):
+    """Stream parameters of a merge output
+
+    "Original" settings and the pixel format and audio layout follow the
+    first input, so inputs shot on the same device need no re-encoding.
+    """
+    first = infos[0]
+    codec = CODEC_ALIASES.get(codec, codec) or first['codec']
+    if codec not in VIDEO_ENCODERS:
+        codec = 'h264'
+
+    if resolution and resolution != 'Original':
+        width, height = (int(value) for value in resolution.lower().split('x'))
+    else:
+        width, height = first['width'], first['height']
+
+    fps_fraction = first['fps_fraction'] if not fps or fps == 'Original' else f"{int(fps)}/1"
+
+    audio = next((info for info in infos if info.get('audio_codec')), None)
+    audio_codec = None
+    if audio:
+        audio_codec = audio['audio_codec'] if audio['audio_codec'] in AUDIO_ENCODERS else 'aac'
+
+    return {
+        'codec': codec,
+        'width': width,
+        'height': height,
+        'fps_fraction': fps_fraction,
+        'fps': parse_fraction(fps_fraction, 30.0),
+        'pix_fmt': first.get('pix_fmt') or 'yuv420p',
+        'time_base': first.get('time_base') if fps_fraction == first['fps_fraction'] else None,
+        'audio_codec': audio_codec,
+        'sample_rate': audio.get('sample_rate') if audio else None,
+        'channels': audio.get('channels') if audio else None,
+    }
+
+
+def transport_compatible(info):
+    """True when the streams can be joined through MPEG-TS"""
+    return (info.get('codec') in TRANSPORT_VIDEO_CODECS and
+            (info.get('audio_codec') is None or info.get('audio_codec') in TRANSPORT_AUDIO_CODECS))
+
+
+def matches_target(info, target):
+    """True when a file can be stream copied into an output with ``target`` parameters"""
+    keys = ('codec', 'width', 'height', 'fps_fraction', 'pix_fmt',
+            'audio_codec', 'sample_rate', 'channels')
+    return all(info.get(key) == target.get(key) for key in keys)
+
+
+def normalize_video(input_path, output_path, target, info=None, bitrate=None, preset='Balanced',
+                    progress_callback=None, cancel_event=None, keyframes=None, workers=None):
+    """Re-encode a file to the target geometry, frame rate, pixel format and codecs
+
+    The picture is scaled to fit and padded, so differing aspect ratios are
+    letterboxed instead of stretched. Inputs without audio get a silent
+    track when the target has one, otherwise the concat would drop sound.
+    Long inputs are encoded in parallel chunks.
+    """
+    info = info or probe_video(input_path)
+    encoder = VIDEO_ENCODERS[target['codec']]
+    width, height = target['width'], target['height']
+    duration = info.get('duration') or 0.0
+
+    video_filter = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                    f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+                    f"fps={target['fps_fraction']},format={target['pix_fmt']}")
+
+    video_args = ['-vf', video_filter, '-c:v', encoder]
+    video_args += ENCODER_PRESETS.get(encoder, {}).get(preset, [])
+    if bitrate:
+        video_args += ['-b:v', f"{bitrate}M", '-maxrate', f"{bitrate}M", '-bufsize', f"{2 * bitrate}M"]
+
+    mux_args = []
+    if target.get('time_base') and not output_path.endswith('.ts'):
+        # Same track timescale as the copied inputs keeps the concat seamless
+        mux_args = ['-video_track_timescale', target['time_base'].split('/')[-1]]
+
+    audio_inputs = ['-i', input_path]
+    audio_map = '0:a:0'
+    audio_args = []
+    if target.get('audio_codec'):
+        if not info.get('audio_codec'):
+            layout = 'mono' if str(target.get('channels')) == '1' else 'stereo'
+            audio_inputs = ['-f', 'lavfi', '-t', f"{duration:.6f}",
+                            '-i', f"anullsrc=r={target['sample_rate']}:cl={layout}"]
+        audio_args = ['-c:a', AUDIO_ENCODERS[target['audio_codec']],
+                      '-ar', str(target['sample_rate']), '-ac', str(target['channels'])]
+
+    workers = workers or default_chunk_workers(duration)
+    if workers > 1:
+        chunked_encode(input_path, output_path, video_args,
+                       audio_args=(audio_inputs + ['-map', '0:a:0', '-vn'] + audio_args) if audio_args else None,
+                       end=duration, keyframes=keyframes, workers=workers, mux_args=mux_args,
+                       progress_callback=progress_callback, cancel_event=cancel_event)
+        return output_path
+
+    args = ['-i', input_path]
+    if audio_args and not info.get('audio_codec'):
+        args += audio_inputs
+        audio_map = '1:a:0'
+    args += ['-map', '0:v:0'] + video_args + mux_args
+    if audio_args:
+        args += ['-map', audio_map] + audio_args
+
+    run_ffmpeg(args + [output_path], duration=duration,
+               progress_callback=progress_callback, cancel_event=cancel_event)
+    return output_path
+
+
+def encode_range(input_path, output_path, start, end, codec='h264', preset='Balanced', bitrate=None,
+                 info=None, keyframes=None, workers=None, progress_callback=None, cancel_event=None):
+    """Re-encode [start, end) with the given codec, in parallel chunks when it is long"""
+    info = info or probe_video(input_path)
+    encoder = VIDEO_ENCODERS[CODEC_ALIASES.get(codec, codec)]
+    video_args = ['-c:v', encoder] + ENCODER_PRESETS.get(encoder, {}).get(preset, [])
+    if bitrate:
+        video_args += ['-b:v', f"{bitrate}M"]
+    audio_args = ['-c:a', 'aac'] if info.get('audio_codec') else []
+
+    workers = workers or default_chunk_workers(end - start)
+    if workers > 1:
+        return chunked_encode(input_path, output_path, video_args,
+                              audio_args=(['-i', input_path, '-map', '0:a:0', '-vn'] + audio_args) if audio_args else None,
+                              start=start, end=end, keyframes=keyframes, workers=workers,
+                              progress_callback=progress_callback, cancel_event=cancel_event)
+
+    args = ['-ss', f"{start:.6f}", '-i', input_path, '-t', f"{end - start:.6f}", '-map', '0:v:0']
+    args += video_args
+    if audio_args:
+        args += ['-map', '0:a:0'] + audio_args
+    run_ffmpeg(args + ['-movflags', '+faststart', output_path], duration=end - start,
+               progress_callback=progress_callback, cancel_event=cancel_event)
+    return output_path
+
+
+def default_chunk_workers(duration):
+    """Parallel chunk count for a re-encode of ``duration`` seconds"""
+    if duration < 2 * CHUNK_MIN_SECONDS:
+        return 1
+    return max(1, min(os.cpu_count() or 1, int(duration // CHUNK_MIN_SECONDS)))
+
+
+def chunk_ranges(start, end, keyframes, chunks):
+    """Split [start, end) into up to ``chunks`` ranges whose later starts are keyframes"""
+    inner = [k for k in keyframes if start < k < end]
+    bounds = [start]
+    for i in range(1, chunks):
+        if not inner:
+            break
+        ideal = start + (end - start) * i / chunks
+        position = bisect.bisect_left(inner, ideal)
+        nearest = min(inner[max(0, position - 1):position + 1], key=lambda k: abs(k - ideal))
+        if nearest > bounds[-1] + 1.0:
+            bounds.append(nearest)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class CombinedEvent:
+    """Looks set when any of the wrapped events is set"""
+
+    def __init__(self, *events):
+        self.events = [event for event in events if event is not None]
+
+    def is_set(self):
+        return any(event.is_set() for event in self.events)
+
+
+def chunked_encode(input_path, output_path, video_args, audio_args=None, start=0.0, end=None,
+                   keyframes=None, workers=None, mux_args=None, progress_callback=None, cancel_event=None):
+    """Encode [start, end) as parallel keyframe-aligned chunks joined by stream copy
+
+    ``video_args`` are the output options (filters, encoder, rate control)
+    applied to every chunk, each of which runs in its own ffmpeg process.
+    ``audio_args`` is a complete argument list, inputs included, producing
+    the audio track in a separate pass alongside the chunks; the track is
+    muxed in at the end. The first error stops all other processes.
+    """
+    if end is None:
+        end = probe_video(input_path)['duration']
+    keyframes = keyframes if keyframes is not None else keyframe_times(input_path)
+    workers = workers or default_chunk_workers(end - start)
+    ranges = chunk_ranges(start, end, keyframes, workers)
+    threads = max(1, (os.cpu_count() or 1) // len(ranges))
+
+    total = end - start
+    done = [0.0] * len(ranges)
+    frames = [0] * len(ranges)
+    lock = threading.Lock()
+    started = time.time()
+    abort = threading.Event()
+    stop = CombinedEvent(cancel_event, abort)
+
+    def chunk_progress(i):
+        def callback(info):
+            if not progress_callback:
+                return
+            with lock:
+                done[i] = (ranges[i][1] - ranges[i][0]) * info['percent'] / 100.0
+                frames[i] = info['frame']
+                overall = progress_info(sum(done), total, sum(frames), started)
+            progress_callback(overall)
+        return callback
+
+    work_dir = tempfile.mkdtemp(prefix='chunks_')
+    try:
+        extension = os.path.splitext(output_path)[1] or '.mp4'
+        chunk_paths = [os.path.join(work_dir, f'chunk{i:04d}{extension}') for i in range(len(ranges))]
+        audio_path = os.path.join(work_dir, 'audio.mka') if audio_args else None
+
+        def encode(i):
+            chunk_start, chunk_end = ranges[i]
+            run_ffmpeg(['-ss', f"{chunk_start:.6f}", '-i', input_path, '-t', f"{chunk_end - chunk_start:.6f}",
+                        '-map', '0:v:0', '-an'] + list(video_args) + ['-threads', str(threads), chunk_paths[i]],
+                       duration=chunk_end - chunk_start, progress_callback=chunk_progress(i), cancel_event=stop)
+
+        def encode_audio():
+            seek = ['-ss', f"{start:.6f}"] if start > 0 else []
+            run_ffmpeg(seek + list(audio_args) + ['-t', f"{total:.6f}", audio_path], cancel_event=stop)
+
+        with ThreadPoolExecutor(max_workers=len(ranges) + 1) as pool:
+            futures = [pool.submit(encode, i) for i in range(len(ranges))]
+            if audio_path:
+                futures.append(pool.submit(encode_audio))
+
+            error = None
+            for future in futures:
+                try:
+                    future.result()
+                except JobCancelled:
+                    pass
+                except Exception as e:
+                    abort.set()
+                    error = error or e
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled()
+        if error:
+            raise error
+
+        if audio_path:
+            video_path = os.path.join(work_dir, f'video{extension}')
+            concat_copy(chunk_paths, video_path, cancel_event)
+            run_ffmpeg(['-i', video_path, '-i', audio_path, '-map', '0:v:0', '-map', '1:a:0',
+                        '-c', 'copy', '-movflags', '+faststart'] + list(mux_args or []) + [output_path],
+                       cancel_event=cancel_event)
+        else:
+            concat_copy(chunk_paths, output_path, cancel_event, extra_args=mux_args)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if progress_callback:
+        progress_callback(progress_info(total, total, sum(frames), started))
+    return output_path
+
+
+def normalized_merge(video_paths, output_path, target, infos=None, bitrate=None, preset='Balanced',
+                     progress_callback=None, cancel_event=None):
+    """Merge files, normalizing only the inputs that differ from ``target``
+
+    Inputs that match are stream copied. Unless all of them match and share
+    their parameter sets, the parts are joined through MPEG-TS, which
+    carries each part's parameter sets in-band; the concat demuxer would
+    otherwise decode every part with the first one's. Codecs MPEG-TS cannot
+    carry fall back to normalizing every input, so all parts are encoded
+    alike. Progress covers the media time of every ffmpeg pass.
+    """
+    infos = infos or [probe_video(path) for path in video_paths]
+    pending = [i for i, info in enumerate(infos) if not matches_target(info, target)]
+    direct = not pending and same_codec_parameters(infos)
+    through_transport = not direct and len(infos) > 1 and transport_compatible(target)
+    if not direct and not through_transport:
+        pending = list(range(len(infos)))
+    remuxed = [i for i in range(len(infos)) if through_transport and i not in pending]
+    # Seconds of media each step goes through: encodes, remuxes and the final join
+    duration = sum(info['duration'] for info in infos)
+    total = sum(infos[i]['duration'] for i in pending + remuxed) + (duration if len(infos) > 1 else 0)
+
+    work_dir = tempfile.mkdtemp(prefix='merge_')
+    try:
+        extension = '.ts' if through_transport else os.path.splitext(output_path)[1] or '.mp4'
+        segments = list(video_paths)
+        done = 0.0
+        started = time.time()
+
+        for index in remuxed:
+            segments[index] = os.path.join(work_dir, f'part{index}.ts')
+            run_ffmpeg(['-i', video_paths[index], '-map', '0:v:0', '-map', '0:a?', '-c', 'copy',
+                        segments[index]], duration=infos[index]['duration'],
+                       progress_callback=stage_progress(progress_callback, done, infos[index]['duration'],
+                                                        total, started),
+                       cancel_event=cancel_event)
+            done += infos[index]['duration']
+
+        for index in pending:
+            segments[index] = normalize_video(
+                video_paths[index], os.path.join(work_dir, f'part{index}{extension}'), target,
+                info=infos[index], bitrate=bitrate, preset=preset,
+                progress_callback=stage_progress(progress_callback, done, infos[index]['duration'],
+                                                 total, started),
+                cancel_event=cancel_event)
+            done += infos[index]['duration']
+
+        if len(segments) == 1:
+            shutil.copyfile(segments[0], output_path)
+        else:
+            concat_copy(segments, output_path, cancel_event, duration=duration,
+                        progress_callback=stage_progress(progress_callback, done, duration, total, started))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if progress_callback and total:
+        progress_callback(progress_info(total, total, 0, started))
+    return output_path
+
+
+def can_smart_cut(info):
+    """True when the partial GOPs at a cut can be re-encoded and joined to the copied GOPs"""
+    return info.get('codec') in VIDEO_ENCODERS and transport_compatible(info)
+
+
+def stream_copy_trim(input_path, output_path, start, end, smart_cut=True, info=None, keyframes=None,
+                     cancel_event=None, status_callback=None, progress_callback=None):
+    """Trim without re-encoding the bulk of the video
+
+    The whole GOPs between the first keyframe at or after ``start`` and the
+    last keyframe at or before ``end`` are stream copied. With
+    ``smart_cut`` the partial GOPs at either end are re-encoded, so both
+    cuts are frame accurate and no kept frame references a dropped one.
+    The parts are joined through MPEG-TS, which carries each part's
+    parameter sets (SPS/PPS) in-band, so the re-encoded parts need not
+    match the source's encoder settings. Without ``smart_cut`` or a codec
+    that can be joined that way, the copy starts at the keyframe before
+    ``start``, ends by ``-t`` at ``end``, and ``status_callback`` is told.
+    Progress covers the parts and the join.
+    """
+    info = info or probe_video(input_path)
+    keyframes = keyframes if keyframes is not None else keyframe_times(input_path)
+
+    tolerance = 0.5 / info['fps'] if info['fps'] else 0.001
+    copy_start = next((k for k in keyframes if k >= start - tolerance), None)
+    copy_end = max((k for k in keyframes if k <= end + tolerance), default=None)
+    # Ends on a keyframe or at the end of the file need no re-encoded tail
+    at_file_end = not info.get('duration') or end >= info['duration'] - tolerance
+    end_aligned = at_file_end or (copy_end is not None and end - copy_end <= tolerance)
+    if end_aligned:
+        copy_end = end
+
+    start_aligned = copy_start is not None and copy_start - start <= tolerance
+    if start_aligned and end_aligned:
+        copy_segment(input_path, output_path, copy_start, end, cancel_event, progress_callback)
+        return output_path
+
+    previous = copy_start if start_aligned else max((k for k in keyframes if k <= start), default=0.0)
+    if not smart_cut or not can_smart_cut(info):
+        if smart_cut and status_callback:
+            status_callback(f"Smart cut unavailable for {info.get('codec')} video; "
+                            f"copying from the keyframe at {previous:.2f}s")
+        copy_segment(input_path, output_path, previous, end, cancel_event, progress_callback)
+        return output_path
+
+    if copy_start is None or copy_end is None or copy_start >= copy_end:
+        # No whole GOP inside the range, all of it is re-encoded
+        encode_segment_like(input_path, output_path, start, end, info, cancel_event, progress_callback)
+        return output_path
+
+    # The parts cover the range once and the join once more
+    total = 2 * (end - start)
+    started = time.time()
+    work_dir = tempfile.mkdtemp(prefix='smartcut_')
+    try:
+        parts = []
+        if not start_aligned:
+            parts.append(os.path.join(work_dir, 'head.ts'))
+            encode_segment_like(input_path, parts[-1], start, copy_start, info, cancel_event,
+                                stage_progress(progress_callback, 0.0, copy_start - start, total, started))
+        parts.append(os.path.join(work_dir, 'body.ts'))
+        copy_segment(input_path, parts[-1], copy_start, copy_end, cancel_event,
+                     stage_progress(progress_callback, copy_start - start, copy_end - copy_start, total, started))
+        if end - copy_end > tolerance:
+            parts.append(os.path.join(work_dir, 'tail.ts'))
+            encode_segment_like(input_path, parts[-1], copy_end, end, info, cancel_event,
+                                stage_progress(progress_callback, copy_end - start, end - copy_end, total, started))
+        concat_copy(parts, output_path, cancel_event, duration=end - start,
+                    progress_callback=stage_progress(progress_callback, end - start, end - start, total, started))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return output_path
+
+
+def parse_timecode(value):
+    """Seconds from '83.5', '01:23.5' or '00:01:23.500'"""
+    text = str(value).strip()
+    seconds = 0.0
+    for part in text.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+CUT_LIST_COLUMNS = {
+    'input': ('file', 'input', 'path', 'source'),
+    'start': ('start', 'in', 'start_time'),
+    'end': ('end', 'out', 'end_time'),
+    'output': ('output', 'name', 'output_name'),
+}
+
+
+def load_cut_list(path, output_dir=None):
+    """Read a CSV or JSON cut list into dicts with input, start, end and output
+
+    CSV files may have a header naming the columns (file, start, end,
+    output) or list them in that order. JSON is a list of objects with the
+    same keys, optionally under "cuts". Relative inputs resolve against the
+    cut list's folder, outputs against ``output_dir``; missing output names
+    are numbered after the input file.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    output_dir = output_dir or base_dir
+
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as cut_file:
+            data = json.load(cut_file)
+        rows = data.get('cuts', []) if isinstance(data, dict) else data
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as cut_file:
+            lines = [line for line in csv.reader(cut_file) if any(cell.strip() for cell in line)]
+        rows = []
+        if lines:
+            header = [cell.strip().lower() for cell in lines[0]]
+            try:
+                parse_timecode(lines[0][1])
+                header = ['file', 'start', 'end', 'output']
+            except (IndexError, ValueError):
+                lines = lines[1:]
+            rows = [dict(zip(header, (cell.strip() for cell in line))) for line in lines]
+
+    cuts = []
+    for number, row in enumerate(rows, 1):
+        row = {str(key).lower(): value for key, value in row.items()}
+        values = {}
+        for field, names in CUT_LIST_COLUMNS.items():
+            values[field] = next((row[name] for name in names if row.get(name) not in (None, '')), None)
+        if values['input'] is None or values['start'] is None or values['end'] is None:
+            raise ValueError(f"Cut {number}: file, start and end are required")
+
+        input_path = os.path.join(base_dir, os.path.expanduser(values['input']))
+        start, end = parse_timecode(values['start']), parse_timecode(values['end'])
+        if end <= start:
+            raise ValueError(f"Cut {number}: end must be after start")
+
+        stem, extension = os.path.splitext(os.path.basename(input_path))
+        output_name = values['output'] or f"{stem}_{number:03d}"
+        if not os.path.splitext(output_name)[1]:
+            output_name += extension or '.mp4'
+
+        cuts.append({
+            'input': os.path.normpath(input_path),
+            'start': start,
+            'end': end,
+            'output': os.path.normpath(os.path.join(output_dir, output_name)),
+        })
+    return cuts
+
+
+def reencode_segment(input_path, output_path, start, end, preset='Balanced',
+                     progress_callback=None, cancel_event=None):
+    """Cut [start, end) re-encoding to H.264/AAC"""
+    args = ['-ss', f"{start:.6f}", '-i', input_path, '-t', f"{end - start:.6f}",
+            '-map', '0:v:0', '-map', '0:a?', '-c:v', 'libx264']
+    args += ENCODER_PRESETS['libx264'].get(preset, [])
+    args += ['-c:a', 'aac', '-movflags', '+faststart', output_path]
+    run_ffmpeg(args, duration=end - start, progress_callback=progress_callback, cancel_event=cancel_event)
+
+
+def run_cut(index, cut, lossless=True, keyframes=None, progress_queue=None, cancel_event=None):
+    """Execute one cut list entry; meant to run in a worker process
+
+    Progress is put on ``progress_queue`` as ``(index, info)`` tuples.
+    Lossless cuts fall back to re-encoding when stream copy fails.
+    """
+    started = time.time()
+
+    def report(info):
+        if progress_queue is not None:
+            progress_queue.put((index, info))
+
+    output_path = cut['output']
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    report(progress_info(0, 1, 0, started))
+
+    try:
+        try:
+            if not lossless:
+                raise RuntimeError("re-encode requested")
+            stream_copy_trim(cut['input'], output_path, cut['start'], cut['end'],
+                             keyframes=keyframes, cancel_event=cancel_event, progress_callback=report)
+            mode = 'copy'
+        except JobCancelled:
+            raise
+        except RuntimeError:
+            reencode_segment(cut['input'], output_path, cut['start'], cut['end'],
+                             progress_callback=report, cancel_event=cancel_event)
+            mode = 'encode'
+    except BaseException:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+    report(progress_info(1, 1, 0, started))
+    return {'output': output_path, 'mode': mode, 'seconds': time.time() - started}
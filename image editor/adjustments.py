@@ -0,0 +1,255 @@
+import os
+import threading
+import tkinter as tk
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Hashable and picklable, so it can be a step of a cached filter chain and go to batch workers
+Adjustments = namedtuple("Adjustments", [
+    "black", "white", "gamma",            # levels
+    "brightness", "contrast",             # -100..100
+    "shadows", "midtones", "highlights",  # curve outputs at inputs 64, 128 and 192
+    "blur",                               # gaussian blur radius, 0 is off
+    "sharpen", "radius",                  # unsharp mask amount and radius
+])
+NEUTRAL = Adjustments(0, 255, 1.0, 0, 0, 64, 128, 192, 0.0, 0.0, 1.0)
+
+MIN_STRIP_ROWS = 64
+BLUR_STRIP_ROWS = 256  # convolution buffers are this many rows plus the kernel halo
+KEEP_BUFFER_BYTES = 64 * 1024 * 1024  # larger buffers, as for full resolution renders, are not kept
+strip_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+
+def run_strips(function, height, max_rows=None):
+    """Call function(top, bottom) for strips of rows, one per core
+
+    NumPy releases the GIL inside its loops, so the strips run in parallel.
+    Small images use fewer strips, where thread overhead would dominate;
+    with ``max_rows`` large ones use more, queued on the pool.
+    """
+    count = max(1, min(os.cpu_count() or 1, height // MIN_STRIP_ROWS))
+    if max_rows:
+        count = max(count, -(-height // max_rows))
+    bounds = np.linspace(0, height, count + 1).astype(int)
+    if count == 1:
+        function(0, height)
+        return
+    for future in [strip_pool.submit(function, top, bottom)
+                   for top, bottom in zip(bounds[:-1], bounds[1:])]:
+        future.result()
+
+
+def curve(points, x):
+    """Monotone cubic (Fritsch-Carlson) interpolation of control points at x"""
+    xs, ys = np.asarray(points, np.float64).T
+    slopes = np.diff(ys) / np.diff(xs)
+    tangents = np.empty_like(ys)
+    tangents[0], tangents[-1] = slopes[0], slopes[-1]
+    tangents[1:-1] = (slopes[:-1] + slopes[1:]) / 2
+    tangents[1:-1][slopes[:-1] * slopes[1:] <= 0] = 0
+    for i, slope in enumerate(slopes):
+        if slope == 0:
+            tangents[i] = tangents[i + 1] = 0
+            continue
+        a, b = tangents[i] / slope, tangents[i + 1] / slope
+        if a * a + b * b > 9:
+            scale = 3 / np.sqrt(a * a + b * b)
+            tangents[i], tangents[i + 1] = scale * a * slope, scale * b * slope
+
+    index = np.clip(np.searchsorted(xs, x, side="right") - 1, 0, len(xs) - 2)
+    width = xs[index + 1] - xs[index]
+    t = (x - xs[index]) / width
+    t2, t3 = t * t, t * t * t
+    return ((2 * t3 - 3 * t2 + 1) * ys[index] + (t3 - 2 * t2 + t) * width * tangents[index]
+            + (-2 * t3 + 3 * t2) * ys[index + 1] + (t3 - t2) * width * tangents[index + 1])
+
+
+def tone_lut(adjustments):
+    """One 256 entry lookup table for levels, gamma, brightness, contrast and curve"""
+    values = np.arange(256, dtype=np.float64)
+    values = np.clip((values - adjustments.black) / max(1, adjustments.white - adjustments.black), 0, 1)
+    values = values ** (1 / max(0.01, adjustments.gamma))
+    values = (values - 0.5) * 2 ** (adjustments.contrast / 50) + 0.5 + adjustments.brightness / 200
+    values = curve([(0, 0), (64, adjustments.shadows), (128, adjustments.midtones),
+                    (192, adjustments.highlights), (255, 255)], np.clip(values, 0, 1) * 255)
+    return np.clip(np.rint(values), 0, 255).astype(np.uint8)
+
+
+def accumulate(window, kernel, out, temp):
+    """out = sum of kernel[i] * window(i), using temp as scratch
+
+    Symmetric kernels add each mirrored pair of windows before multiplying,
+    which saves a quarter of the passes over the data.
+    """
+    taps = len(kernel)
+    if np.allclose(kernel, kernel[::-1]):
+        centre = taps // 2
+        np.multiply(window(centre), kernel[centre], out=out)
+        for offset in range(centre):
+            np.add(window(offset), window(taps - 1 - offset), out=temp)
+            temp *= kernel[offset]
+            out += temp
+        return
+    np.multiply(window(0), kernel[0], out=out)
+    for offset in range(1, taps):
+        np.multiply(window(offset), kernel[offset], out=temp)
+        out += temp
+
+
+def gaussian_kernel(radius):
+    size = max(1, int(np.ceil(3 * radius)))
+    x = np.arange(-size, size + 1, dtype=np.float32)
+    kernel = np.exp(-x * x / (2 * radius * radius))
+    return kernel / kernel.sum()
+
+
+class AdjustmentEngine:
+    """Applies Adjustments with NumPy on buffers that are reused between calls
+
+    Not thread safe itself; each thread gets its own engine through
+    ``engine()``, and every stage splits its rows across the strip pool.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+
+    def buffer(self, name, shape, dtype=np.float32):
+        array = self.buffers.get(name)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = self.buffers[name] = np.empty(shape, dtype)
+        return array
+
+    def apply(self, image, adjustments):
+        source = np.asarray(image.convert("RGB"))
+        pixels = self.buffer("pixels", source.shape, np.uint8)
+        lut = tone_lut(adjustments)
+        run_strips(lambda top, bottom: np.take(lut, source[top:bottom], out=pixels[top:bottom]),
+                   len(pixels))
+        if adjustments.blur > 0:
+            kernel = gaussian_kernel(adjustments.blur)
+            self.convolve(pixels, kernel, kernel)
+        if adjustments.sharpen > 0 and adjustments.radius > 0:
+            self.unsharp_mask(pixels, adjustments.sharpen, adjustments.radius)
+        # RGB is stored as 4 bytes per pixel inside Pillow, so this copies and the buffer can be reused
+        result = Image.fromarray(pixels)
+        if pixels.nbytes > KEEP_BUFFER_BYTES:
+            self.buffers.clear()
+        return result
+
+    def separable_blur(self, pixels, row_kernel, column_kernel, finish):
+        """Convolve uint8 pixels with row_kernel along x and column_kernel along y
+
+        Strips of BLUR_STRIP_ROWS rows are convolved with a halo of the
+        column kernel's radius, in float32 buffers the size of a strip, and
+        finish(top, bottom, rows) receives each strip's result while its
+        buffer is valid. Edges are extended by repeating the border pixels.
+        """
+        height, width, channels = pixels.shape
+        rx, ry = len(row_kernel) // 2, len(column_kernel) // 2
+
+        def convolve_strip(top, bottom):
+            rows = bottom - top
+            padded = np.empty((rows + 2 * ry, width + 2 * rx, channels), np.float32)
+            padded[:, rx:rx + width] = pixels[np.clip(np.arange(top - ry, bottom + ry), 0, height - 1)]
+            padded[:, :rx] = padded[:, rx:rx + 1]
+            padded[:, rx + width:] = padded[:, rx + width - 1:rx + width]
+            horizontal = np.empty((rows + 2 * ry, width, channels), np.float32)
+            scratch = np.empty_like(horizontal)
+            accumulate(lambda offset: padded[:, offset:offset + width], row_kernel, horizontal, scratch)
+            # The padded rows are no longer read, so they hold the result
+            result = padded[:rows, :width]
+            accumulate(lambda offset: horizontal[offset:offset + rows], column_kernel,
+                       result, scratch[:rows])
+            finish(top, bottom, result)
+
+        run_strips(convolve_strip, height, BLUR_STRIP_ROWS)
+
+    def convolve(self, pixels, row_kernel, column_kernel):
+        """Separable convolution of uint8 pixels, in place"""
+        # Strips read their neighbours' rows, so results are stored apart until all are done
+        output = self.buffer("output", pixels.shape, np.uint8)
+
+        def store(top, bottom, rows):
+            np.clip(rows, 0, 255, out=rows)
+            np.rint(rows, out=rows)
+            output[top:bottom] = rows
+
+        self.separable_blur(pixels, row_kernel, column_kernel, store)
+        run_strips(lambda top, bottom: np.copyto(pixels[top:bottom], output[top:bottom]), len(pixels))
+
+    def unsharp_mask(self, pixels, amount, radius):
+        """pixels + amount * (pixels - gaussian blur), in place"""
+        kernel = gaussian_kernel(radius)
+        output = self.buffer("output", pixels.shape, np.uint8)
+
+        def sharpen(top, bottom, rows):
+            # rows = pixels + amount * (pixels - rows)
+            np.subtract(pixels[top:bottom], rows, out=rows)
+            rows *= amount
+            rows += pixels[top:bottom]
+            np.clip(rows, 0, 255, out=rows)
+            np.rint(rows, out=rows)
+            output[top:bottom] = rows
+
+        self.separable_blur(pixels, kernel, kernel, sharpen)
+        run_strips(lambda top, bottom: np.copyto(pixels[top:bottom], output[top:bottom]), len(pixels))
+
+
+local = threading.local()
+
+
+def engine():
+    if not hasattr(local, "engine"):
+        local.engine = AdjustmentEngine()
+    return local.engine
+
+
+def adjust(image, adjustments):
+    return engine().apply(image, adjustments)
+
+
+class AdjustDialog(tk.Toplevel):
+    """Sliders for the adjustments; on_change(adjustments) is called on every move"""
+
+    SLIDERS = [
+        ("black", "Black point", 0, 254, 1),
+        ("white", "White point", 1, 255, 1),
+        ("gamma", "Gamma", 0.2, 3.0, 0.05),
+        ("brightness", "Brightness", -100, 100, 1),
+        ("contrast", "Contrast", -100, 100, 1),
+        ("shadows", "Curve shadows", 0, 255, 1),
+        ("midtones", "Curve midtones", 0, 255, 1),
+        ("highlights", "Curve highlights", 0, 255, 1),
+        ("blur", "Blur radius", 0, 10, 0.1),
+        ("sharpen", "Sharpen amount", 0, 3, 0.05),
+        ("radius", "Sharpen radius", 0.3, 5, 0.1),
+    ]
+
+    def __init__(self, master, adjustments, on_change):
+        super().__init__(master)
+        self.title("Adjustments")
+        self.on_change = on_change
+        self.variables = {}
+        for row, (field, label, low, high, step) in enumerate(self.SLIDERS):
+            tk.Label(self, text=label).grid(row=row, column=0, sticky="w", padx=5)
+            variable = tk.DoubleVar(value=getattr(adjustments, field))
+            tk.Scale(self, variable=variable, from_=low, to=high, resolution=step, orient="horizontal",
+                     length=260, command=lambda value: self.changed()).grid(row=row, column=1, padx=5)
+            self.variables[field] = variable
+        tk.Button(self, text="Reset", command=self.reset).grid(row=len(self.SLIDERS), column=1,
+                                                             sticky="e", padx=5, pady=5)
+
+    def current(self):
+        values = {field: variable.get() for field, variable in self.variables.items()}
+        return Adjustments(**values)
+
+    def changed(self):
+        self.on_change(self.current())
+
+    def reset(self):
+        for field, variable in self.variables.items():
+            variable.set(getattr(NEUTRAL, field))
+        self.changed()
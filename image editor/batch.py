@@ -0,0 +1,277 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tkinter import filedialog, messagebox, ttk
+
+from PIL import Image
+
+from document import FILTERS, apply_chain, step_name
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+OUTPUT_FORMATS = {
+    "Same as input": None,
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "WEBP": ".webp",
+    "TIFF": ".tif",
+}
+
+
+def batch_jobs(input_dir, output_dir, extension=None):
+    """(source, target) pairs for the images in input_dir, sorted by name"""
+    jobs = []
+    for name in sorted(os.listdir(input_dir)):
+        stem, ext = os.path.splitext(name)
+        source = os.path.join(input_dir, name)
+        if ext.lower() in IMAGE_EXTENSIONS and os.path.isfile(source):
+            jobs.append((source, os.path.join(output_dir, stem + (extension or ext))))
+    return jobs
+
+
+def is_up_to_date(source, target):
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def process_image(source, target, chain, max_size=None, quality=90):
+    """Resize, filter and save one image; runs in a worker process
+
+    Images are shrunk before filtering, so filters work on the output
+    resolution. The result is written under a temporary name and moved into
+    place, so an interrupted batch never leaves a truncated output that
+    would look up to date next time.
+    """
+    with Image.open(source) as image:
+        if max_size:
+            # thumbnail lets JPEG decode at reduced size and never enlarges
+            image.thumbnail(max_size, Image.LANCZOS, reducing_gap=3.0)
+        image = apply_chain(image.convert("RGB"), chain)
+
+    ext = os.path.splitext(target)[1].lower()
+    image_format = Image.registered_extensions()[ext]
+    options = {"quality": quality} if image_format in ("JPEG", "WEBP") else {}
+    temp_path = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.partial")
+    try:
+        image.save(temp_path, image_format, **options)
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return target
+
+
+class BatchRunner(threading.Thread):
+    """Runs a batch on a process pool and reports per file events on ``events``
+
+    Events are ('skipped', source), ('done', source), ('failed', source,
+    message) and finally ('finished', cancelled).
+    """
+
+    def __init__(self, jobs, chain, max_size, quality, workers):
+        super().__init__(daemon=True)
+        self.jobs = jobs
+        self.chain = list(chain)
+        self.max_size = max_size
+        self.quality = quality
+        self.workers = workers
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        pending = []
+        for source, target in self.jobs:
+            if is_up_to_date(source, target):
+                self.events.put(("skipped", source))
+            else:
+                pending.append((source, target))
+
+        if pending:
+            os.makedirs(os.path.dirname(pending[0][1]), exist_ok=True)
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(process_image, source, target, self.chain,
+                                       self.max_size, self.quality): source
+                           for source, target in pending}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        self.events.put(("done", futures[future]))
+                    except Exception as e:
+                        self.events.put(("failed", futures[future], str(e)))
+                    if self.cancel_event.is_set():
+                        # Running images finish, queued ones are dropped
+                        for other in futures:
+                            other.cancel()
+                        break
+        self.events.put(("finished", self.cancel_event.is_set()))
+
+
+class BatchDialog(tk.Toplevel):
+    """Apply a filter chain, resize and format conversion to a folder of images"""
+
+    def __init__(self, master, chain=()):
+        super().__init__(master)
+        self.title("Batch Process Folder")
+        self.geometry("640x520")
+        self.chain = list(chain)
+        self.runner = None
+        self.rows = {}
+
+        form = tk.Frame(self)
+        form.pack(fill="x", padx=10, pady=10)
+        self.input_var = tk.StringVar()
+        self.output_var = tk.StringVar()
+        for row, (label, var) in enumerate((("Input folder", self.input_var),
+                                            ("Output folder", self.output_var))):
+            tk.Label(form, text=label).grid(row=row, column=0, sticky="w")
+            tk.Entry(form, textvariable=var, width=50).grid(row=row, column=1, sticky="we")
+            tk.Button(form, text="Browse...",
+                      command=lambda var=var: self.browse(var)).grid(row=row, column=2, padx=5)
+        form.columnconfigure(1, weight=1)
+
+        tk.Label(form, text="Filters").grid(row=2, column=0, sticky="w")
+        filter_frame = tk.Frame(form)
+        filter_frame.grid(row=2, column=1, columnspan=2, sticky="w")
+        self.chain_label = tk.Label(filter_frame, text="")
+        self.chain_label.pack(side="left")
+        self.filter_combobox = ttk.Combobox(filter_frame, values=sorted(FILTERS), width=16, state="readonly")
+        self.filter_combobox.pack(side="left", padx=5)
+        tk.Button(filter_frame, text="Add", command=self.add_filter).pack(side="left")
+        tk.Button(filter_frame, text="Clear", command=self.clear_filters).pack(side="left", padx=5)
+        self.update_chain_label()
+
+        tk.Label(form, text="Max size").grid(row=3, column=0, sticky="w")
+        size_frame = tk.Frame(form)
+        size_frame.grid(row=3, column=1, columnspan=2, sticky="w")
+        self.width_var = tk.IntVar(value=0)
+        self.height_var = tk.IntVar(value=0)
+        tk.Spinbox(size_frame, from_=0, to=20000, textvariable=self.width_var, width=7).pack(side="left")
+        tk.Label(size_frame, text=" x ").pack(side="left")
+        tk.Spinbox(size_frame, from_=0, to=20000, textvariable=self.height_var, width=7).pack(side="left")
+        tk.Label(size_frame, text=" (0 keeps the original size)").pack(side="left")
+
+        tk.Label(form, text="Format").grid(row=4, column=0, sticky="w")
+        format_frame = tk.Frame(form)
+        format_frame.grid(row=4, column=1, columnspan=2, sticky="w")
+        self.format_combobox = ttk.Combobox(format_frame, values=list(OUTPUT_FORMATS), state="readonly", width=14)
+        self.format_combobox.current(0)
+        self.format_combobox.pack(side="left")
+        tk.Label(format_frame, text="  Quality").pack(side="left")
+        self.quality_var = tk.IntVar(value=90)
+        tk.Spinbox(format_frame, from_=1, to=100, textvariable=self.quality_var, width=4).pack(side="left")
+        tk.Label(format_frame, text="  Workers").pack(side="left")
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        tk.Spinbox(format_frame, from_=1, to=64, textvariable=self.workers_var, width=4).pack(side="left")
+
+        self.files_tree = ttk.Treeview(self, columns=("status",), height=12)
+        self.files_tree.heading("#0", text="File")
+        self.files_tree.heading("status", text="Status")
+        self.files_tree.column("status", width=160, stretch=False)
+        self.files_tree.pack(fill="both", expand=True, padx=10)
+
+        self.progress = ttk.Progressbar(self, mode="determinate")
+        self.progress.pack(fill="x", padx=10, pady=5)
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill="x", padx=10, pady=(0, 10))
+        self.summary_label = tk.Label(buttons, text="")
+        self.summary_label.pack(side="left")
+        self.cancel_button = tk.Button(buttons, text="Cancel", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side="right")
+        self.start_button = tk.Button(buttons, text="Start", command=self.start)
+        self.start_button.pack(side="right", padx=5)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def browse(self, var):
+        folder = filedialog.askdirectory(parent=self)
+        if folder:
+            var.set(folder)
+
+    def add_filter(self):
+        if self.filter_combobox.get():
+            self.chain.append(self.filter_combobox.get())
+            self.update_chain_label()
+
+    def clear_filters(self):
+        self.chain = []
+        self.update_chain_label()
+
+    def update_chain_label(self):
+        self.chain_label.config(text=" > ".join(step_name(step) for step in self.chain) or "None")
+
+    def start(self):
+        input_dir, output_dir = self.input_var.get(), self.output_var.get()
+        if not os.path.isdir(input_dir) or not output_dir:
+            messagebox.showerror("Batch", "Choose an input folder and an output folder.", parent=self)
+            return
+        if os.path.abspath(input_dir) == os.path.abspath(output_dir):
+            messagebox.showerror("Batch", "The output folder must differ from the input folder.", parent=self)
+            return
+        try:
+            max_size = (self.width_var.get(), self.height_var.get())
+            quality, workers = self.quality_var.get(), self.workers_var.get()
+        except tk.TclError:
+            messagebox.showerror("Batch", "Sizes, quality and workers must be numbers.", parent=self)
+            return
+        if max_size[0] <= 0 and max_size[1] <= 0:
+            max_size = None
+        else:
+            # A zero side is unconstrained
+            max_size = (max_size[0] or 10 ** 6, max_size[1] or 10 ** 6)
+
+        jobs = batch_jobs(input_dir, output_dir, OUTPUT_FORMATS[self.format_combobox.get()])
+        if not jobs:
+            messagebox.showinfo("Batch", "No images found in the input folder.", parent=self)
+            return
+
+        self.files_tree.delete(*self.files_tree.get_children())
+        self.rows = {source: self.files_tree.insert("", "end", text=os.path.basename(source),
+                                                    values=("Queued",))
+                     for source, _ in jobs}
+        self.progress.config(maximum=len(jobs), value=0)
+        self.counts = {"done": 0, "skipped": 0, "failed": 0}
+        self.runner = BatchRunner(jobs, self.chain, max_size, quality, max(1, workers))
+        self.runner.start()
+        self.start_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.poll()
+
+    def cancel(self):
+        if self.runner is not None:
+            self.runner.cancel()
+            self.cancel_button.config(state="disabled")
+
+    def poll(self):
+        if not self.winfo_exists():
+            return
+        while not self.runner.events.empty():
+            event = self.runner.events.get()
+            kind, source = event[0], event[1]
+            if kind == "finished":
+                self.finished(cancelled=source)
+                return
+            self.counts[kind] += 1
+            status = {"done": "Done", "skipped": "Up to date"}.get(kind) or f"Failed: {event[2]}"
+            self.files_tree.item(self.rows[source], values=(status,))
+            self.files_tree.see(self.rows[source])
+            self.progress.step(1)
+        self.summary_label.config(text=self.summary())
+        self.after(100, self.poll)
+
+    def summary(self):
+        return "{done} done, {skipped} up to date, {failed} failed".format(**self.counts)
+
+    def finished(self, cancelled):
+        self.runner = None
+        self.summary_label.config(text=self.summary() + (" (cancelled)" if cancelled else ""))
+        self.start_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+    def close(self):
+        self.cancel()
+        self.destroy()
@@ -0,0 +1,167 @@
+import hashlib
+import io
+import queue
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageFilter, ImageOps
+
+from adjustments import Adjustments, adjust
+
+# Scans of a few hundred megapixels are expected, above Pillow's decompression bomb limit
+Image.MAX_IMAGE_PIXELS = 500_000_000
+
+PROXY_SIZE = (750, 600)
+CACHE_BYTES = 768 * 1024 * 1024
+
+FILTERS = {
+    "Black and White": lambda image: ImageOps.grayscale(image).convert("RGB"),
+    "Blur": lambda image: image.filter(ImageFilter.BLUR),
+    "Sharpen": lambda image: image.filter(ImageFilter.SHARPEN),
+    "Smooth": lambda image: image.filter(ImageFilter.SMOOTH),
+    "Emboss": lambda image: image.filter(ImageFilter.EMBOSS),
+}
+
+
+def apply_step(image, step):
+    # A chain step is a filter name or an Adjustments tuple
+    if isinstance(step, Adjustments):
+        return adjust(image, step)
+    return FILTERS[step](image)
+
+
+def step_name(step):
+    return "Adjust" if isinstance(step, Adjustments) else step
+
+
+def apply_chain(image, chain):
+    for step in chain:
+        image = apply_step(image, step)
+    return image
+
+
+def image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+class ResultCache:
+    """Byte-bounded LRU of filtered images keyed by (source hash, level, filter chain)
+
+    Shared by the UI and the full resolution worker, so it is locked.
+    """
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            image = self.items.get(key)
+            if image is not None:
+                self.items.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        size = image_bytes(image)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.used -= image_bytes(old)
+            self.items[key] = image
+            self.used += size
+            while self.used > self.max_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.used -= image_bytes(evicted)
+
+
+class ImageDocument:
+    """An image decoded once, with a display proxy and cached filter results
+
+    Filters are previewed on the proxy and rendered at full resolution for
+    export. Every prefix of a chain is cached, so stacking one more filter
+    only runs that filter.
+    """
+
+    def __init__(self, path, proxy_size=PROXY_SIZE, cache=None):
+        self.path = path
+        with open(path, "rb") as file:
+            data = file.read()
+        self.source_hash = hashlib.sha1(data).hexdigest()
+        self.full = Image.open(io.BytesIO(data)).convert("RGB")
+
+        scale = min(1.0, proxy_size[0] / self.full.width, proxy_size[1] / self.full.height)
+        size = (max(1, round(self.full.width * scale)), max(1, round(self.full.height * scale)))
+        if size == self.full.size:
+            self.proxy = self.full
+        else:
+            # reducing_gap shrinks by whole factors first, which is far faster on huge photos
+            self.proxy = self.full.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        self.scale = self.proxy.width / self.full.width
+
+        self.cache = cache if cache is not None else ResultCache()
+        self.chain = []
+
+    def render(self, chain, level="proxy"):
+        """The source at ``level`` ('proxy' or 'full') with the filters of chain applied"""
+        chain = tuple(chain)
+        image = self.proxy if level == "proxy" else self.full
+        start = 0
+        for length in range(len(chain), 0, -1):
+            cached = self.cache.get((self.source_hash, level, chain[:length]))
+            if cached is not None:
+                image, start = cached, length
+                break
+        for length in range(start + 1, len(chain) + 1):
+            image = apply_step(image, chain[length - 1])
+            self.cache.put((self.source_hash, level, chain[:length]), image)
+        return image
+
+    def preview(self):
+        return self.render(self.chain, "proxy")
+
+    def full_resolution(self, wait=True):
+        """Full resolution result of the current chain, or None if not rendered yet and not waiting"""
+        chain = tuple(self.chain)
+        if not chain:
+            return self.full
+        cached = self.cache.get((self.source_hash, "full", chain))
+        if cached is not None or not wait:
+            return cached
+        return self.render(chain, "full")
+
+
+class FullResolutionWorker(threading.Thread):
+    """Renders the latest requested filter chain at full resolution in the background
+
+    Requests made while busy replace each other, so only the newest chain
+    is rendered next. Finished (document, chain) pairs are put on ``done``
+    for the Tk loop to poll.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.condition = threading.Condition()
+        self.pending = None
+        self.done = queue.Queue()
+
+    def request(self, document, chain):
+        with self.condition:
+            self.pending = (document, tuple(chain))
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                document, chain = self.pending
+                self.pending = None
+            try:
+                document.render(chain, "full")
+                self.done.put((document, chain, None))
+            except Exception as e:
+                self.done.put((document, chain, e))
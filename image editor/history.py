@@ -0,0 +1,115 @@
+import pickle
+import tempfile
+import zlib
+
+HISTORY_BYTES = 32 * 1024 * 1024
+
+
+class SpillStack:
+    """Entries moved out of memory, kept oldest first in a temporary file"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.file = None
+        self.entries = []  # (group, offset, length), oldest first
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def push(self, group, blob):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile(prefix=self.prefix)
+        offset = self.entries[-1][1] + self.entries[-1][2] if self.entries else 0
+        self.file.seek(offset)
+        self.file.write(blob)
+        self.entries.append((group, offset, len(blob)))
+
+    def pop(self):
+        """The newest spilled (group, blob)"""
+        group, offset, length = self.entries.pop()
+        self.file.seek(offset)
+        # Later spills overwrite from here on, the file never grows past the deepest history
+        return group, self.file.read(length)
+
+    def clear(self):
+        self.entries = []
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class History:
+    """Undo/redo stack of edits with a memory cap
+
+    Entries are deltas (a stroke, a chain change), never copies of the
+    image. They are pickled and zlib compressed; once the compressed
+    entries exceed ``max_bytes``, the oldest undo entries and then the
+    redo entries furthest from being redone move to temporary files and
+    are read back when undo or redo reaches them.
+    """
+
+    def __init__(self, max_bytes=HISTORY_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_entries = []  # (group, blob), oldest first
+        self.redo_entries = []  # next to redo last
+        self.used = 0
+        self.undo_spill = SpillStack("editor-history-")
+        self.redo_spill = SpillStack("editor-history-")
+
+    def push(self, entry, group=None):
+        """Record a new edit; an edit of the same non-None group as the last one replaces it"""
+        if group is not None and self.undo_entries and self.undo_entries[-1][0] == group:
+            self.used -= len(self.undo_entries.pop()[1])
+        blob = zlib.compress(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        self.undo_entries.append((group, blob))
+        self.used += len(blob)
+        self.used -= sum(len(blob) for _, blob in self.redo_entries)
+        self.redo_entries = []
+        self.redo_spill.clear()
+        self.spill()
+
+    def last_group(self):
+        return self.undo_entries[-1][0] if self.undo_entries else None
+
+    def undo(self):
+        """The entry to revert, or None"""
+        if not self.undo_entries and self.undo_spill:
+            self.unspill(self.undo_spill, self.undo_entries)
+        if not self.undo_entries:
+            return None
+        group, blob = self.undo_entries.pop()
+        self.redo_entries.append((None, blob))
+        self.spill()
+        return pickle.loads(zlib.decompress(blob))
+
+    def redo(self):
+        """The entry to apply again, or None"""
+        if not self.redo_entries and self.redo_spill:
+            self.unspill(self.redo_spill, self.redo_entries)
+        if not self.redo_entries:
+            return None
+        _, blob = self.redo_entries.pop()
+        self.undo_entries.append((None, blob))
+        self.spill()
+        return pickle.loads(zlib.decompress(blob))
+
+    def clear(self):
+        self.undo_entries = []
+        self.redo_entries = []
+        self.used = 0
+        self.undo_spill.clear()
+        self.redo_spill.clear()
+
+    def spill(self):
+        # Keep the newest entry of each stack in memory, it is the likeliest to be used next
+        for entries, spilled in ((self.undo_entries, self.undo_spill), (self.redo_entries, self.redo_spill)):
+            while self.used > self.max_bytes and len(entries) > 1:
+                group, blob = entries.pop(0)
+                spilled.push(group, blob)
+                self.used -= len(blob)
+
+    def unspill(self, spilled, entries):
+        """Read the newest spilled entry of a stack back into memory"""
+        group, blob = spilled.pop()
+        entries.append((group, blob))
+        self.used += len(blob)
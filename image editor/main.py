@@ -1,31 +1,66 @@
+import multiprocessing
 import tkinter as tk
+from collections import OrderedDict
 from tkinter import filedialog
 from tkinter import colorchooser
-from PIL import Image, ImageOps, ImageTk, ImageFilter
+from PIL import Image
 from tkinter import ttk
+from tkinter import messagebox
+from adjustments import NEUTRAL, AdjustDialog, Adjustments
+from batch import BatchDialog
+from document import FILTERS, FullResolutionWorker, ImageDocument, ResultCache
+from history import History
+from strokes import StrokeLayer
+from viewport import ImagePyramid, TiledViewport
 
 
-root = tk.Tk()
-root.geometry("1000x600")
-root.title("Image Drawing Tool")
-root.config(bg="white")
-
 pen_color = "black"
 pen_size = 5
 file_path = ""
+document = None
+filter_cache = ResultCache()
+full_worker = FullResolutionWorker()
+
+# Strokes are kept in image coordinates and rasterized per visible tile
+stroke_layer = StrokeLayer()
+# Recent pyramids of the current document, so going back to a filter chain reuses its cached tiles
+pyramids = OrderedDict()
+# Edits as deltas: ("stroke", stroke), ("clear", strokes) and ("chain", before, after)
+history = History()
+chain_group_before = []
+adjust_sessions = 0
+
+
+def pyramid_for(document):
+    # The full resolution result once rendered, until then the filtered proxy stands in
+    full = document.full_resolution(wait=False)
+    key = (tuple(document.chain), full is not None)
+    pyramid = pyramids.get(key)
+    if pyramid is None:
+        if full is not None:
+            pyramid = ImagePyramid(full, 1.0, document.preview())
+        else:
+            pyramid = ImagePyramid(document.preview(), document.scale)
+        pyramids[key] = pyramid
+        while len(pyramids) > 4:
+            pyramids.popitem(last=False)
+    pyramids.move_to_end(key)
+    return pyramid
 
 
 def add_image():
-    global file_path
-    file_path = filedialog.askopenfilename(
+    global file_path, document
+    path = filedialog.askopenfilename(
         initialdir="D:/codefirst.io/Tkinter Image Editor/Pictures")
-    image = Image.open(file_path)
-    width, height = int(image.width / 2), int(image.height / 2)
-    image = image.resize((width, height))
-    canvas.config(width=image.width, height=image.height)
-    image = ImageTk.PhotoImage(image)
-    canvas.image = image
-    canvas.create_image(0, 0, image=image, anchor="nw")
+    if not path:
+        return
+    file_path = path
+    document = ImageDocument(file_path, cache=filter_cache)
+    pyramids.clear()
+    stroke_layer.clear()
+    history.clear()
+    viewport.set_source(pyramid_for(document), fit=True)
+    status_label.config(text="")
 
 
 def change_color():
@@ -38,81 +73,260 @@ def change_size(size):
     pen_size = size
 
 
+def start_stroke(event):
+    # Pen sizes are in screen pixels, whatever the zoom
+    x, y = viewport.to_image(event.x, event.y)
+    dirty = stroke_layer.begin(x, y, pen_color, pen_size / viewport.zoom)
+    viewport.stroke_extended(stroke_layer.current, dirty)
+
+
 def draw(event):
-    x1, y1 = (event.x - pen_size), (event.y - pen_size)
-    x2, y2 = (event.x + pen_size), (event.y + pen_size)
-    canvas.create_oval(x1, y1, x2, y2, fill=pen_color, outline='')
+    x, y = viewport.to_image(event.x, event.y)
+    dirty = stroke_layer.extend(x, y)
+    viewport.stroke_extended(stroke_layer.current, dirty)
+
+
+def end_stroke(event):
+    stroke = stroke_layer.end()
+    if stroke is not None:
+        history.push(("stroke", stroke))
     
 
 def clear_canvas():
-    canvas.delete("all")
-    canvas.create_image(0, 0, image=canvas.image, anchor="nw")
+    if stroke_layer.strokes:
+        history.push(("clear", stroke_layer.strokes))
+    stroke_layer.clear()
+    viewport.redraw_strokes()
+
+
+def change_chain(chain, group=None):
+    # Consecutive changes of one group, like the moves of one slider session, undo as one step
+    global chain_group_before
+    if group is None or history.last_group() != group:
+        chain_group_before = list(document.chain)
+    document.chain = list(chain)
+    history.push(("chain", chain_group_before, list(chain)), group)
+    update_filters()
 
 
 def apply_filter(filter):
-    image = Image.open(file_path)
-    width, height = int(image.width / 2), int(image.height / 2)
-    image = image.resize((width, height))
-    if filter == "Black and White":
-        image = ImageOps.grayscale(image)
-    elif filter == "Blur":
-        image = image.filter(ImageFilter.BLUR)
-    elif filter == "Sharpen":
-        image = image.filter(ImageFilter.SHARPEN)
-    elif filter == "Smooth":
-        image = image.filter(ImageFilter.SMOOTH)
-    elif filter == "Emboss":
-        image = image.filter(ImageFilter.EMBOSS)
-    image = ImageTk.PhotoImage(image)
-    canvas.image = image
-    canvas.create_image(0, 0, image=image, anchor="nw")
+    if document is None:
+        return
+    if stack_filters.get():
+        change_chain(document.chain + [filter])
+    else:
+        change_chain([filter])
+
+
+def open_adjustments():
+    global adjust_sessions
+    if document is None:
+        return
+    adjust_sessions += 1
+    session = adjust_sessions
+    last = document.chain[-1] if document.chain else None
+    AdjustDialog(root, last if isinstance(last, Adjustments) else NEUTRAL,
+                 lambda adjustments: set_adjustments(adjustments, session))
+
+
+def set_adjustments(adjustments, session):
+    # Slider moves edit the adjustment step at the end of the chain instead of stacking new ones
+    if document is None:
+        return
+    chain = list(document.chain)
+    if chain and isinstance(chain[-1], Adjustments):
+        chain.pop()
+    if adjustments != NEUTRAL:
+        chain.append(adjustments)
+    change_chain(chain, group=("adjust", session))
+
+
+def reset_filters():
+    if document is None:
+        return
+    change_chain([])
+
+
+def undo(event=None):
+    if stroke_layer.current is not None:
+        return
+    entry = history.undo()
+    if entry is None:
+        return
+    if entry[0] == "stroke":
+        stroke = stroke_layer.pop()
+        viewport.redraw_strokes(stroke.bounds())
+    elif entry[0] == "clear":
+        stroke_layer.restore(entry[1])
+        viewport.redraw_strokes()
+    elif entry[0] == "chain":
+        document.chain = list(entry[1])
+        update_filters()
+
+
+def redo(event=None):
+    if stroke_layer.current is not None:
+        return
+    entry = history.redo()
+    if entry is None:
+        return
+    if entry[0] == "stroke":
+        stroke_layer.add(entry[1])
+        viewport.redraw_strokes(entry[1].bounds())
+    elif entry[0] == "clear":
+        stroke_layer.clear()
+        viewport.redraw_strokes()
+    elif entry[0] == "chain":
+        document.chain = list(entry[2])
+        update_filters()
+
+
+def update_filters():
+    # Preview on the proxy now, render full resolution for export in the background
+    viewport.set_source(pyramid_for(document))
+    if document.full_resolution(wait=False) is None:
+        status_label.config(text="Rendering full resolution...")
+        full_worker.request(document, document.chain)
+    else:
+        status_label.config(text="")
+
+
+def poll_full_resolution():
+    while not full_worker.done.empty():
+        rendered, chain, error = full_worker.done.get()
+        if rendered is document and chain == tuple(document.chain):
+            status_label.config(text=f"Render failed: {error}" if error else "")
+            if not error:
+                viewport.set_source(pyramid_for(document))
+    root.after(200, poll_full_resolution)
+
+
+def export_image():
+    if document is None:
+        return
+    path = filedialog.asksaveasfilename(
+        defaultextension=".png",
+        filetypes=[("PNG", "*.png"), ("JPEG", "*.jpg *.jpeg"), ("All files", "*.*")])
+    if not path:
+        return
+    image = document.full_resolution().convert("RGBA")
+    image.alpha_composite(stroke_layer.render(image.size, 1.0))
+    try:
+        image.convert("RGB").save(path)
+    except (OSError, ValueError) as e:
+        messagebox.showerror("Export", f"Could not save image: {e}")
+
+
+
+def batch_process():
+    # Starts from the filters applied in the editor
+    BatchDialog(root, chain=document.chain if document is not None else [])
+
+
+if __name__ == "__main__":
+    # Worker processes of the batch processor import this module, they need no UI
+    multiprocessing.freeze_support()
+
+    root = tk.Tk()
+    root.geometry("1000x600")
+    root.title("Image Drawing Tool")
+    root.config(bg="white")
+
+    full_worker.start()
+
+    left_frame = tk.Frame(root, width=200, height=600, bg="white")
+    left_frame.pack(side="left", fill="y")
+
+    canvas = tk.Canvas(root, width=750, height=600, highlightthickness=0)
+    canvas.pack(fill="both", expand=True)
+    viewport = TiledViewport(canvas, stroke_layer)
+    viewport.set_source(ImagePyramid(Image.new("RGB", (750, 600), "white")), fit=True)
+
+    image_button = tk.Button(left_frame, text="Add Image",
+                             command=add_image, bg="white")
+    image_button.pack(pady=15)
+
+    color_button = tk.Button(
+        left_frame, text="Change Pen Color", command=change_color, bg="white")
+    color_button.pack(pady=5)
+
+    pen_size_frame = tk.Frame(left_frame, bg="white")
+    pen_size_frame.pack(pady=5)
+
+    pen_size_1 = tk.Radiobutton(
+        pen_size_frame, text="Small", value=3, command=lambda: change_size(3), bg="white")
+    pen_size_1.pack(side="left")
+
+    pen_size_2 = tk.Radiobutton(
+        pen_size_frame, text="Medium", value=5, command=lambda: change_size(5), bg="white")
+    pen_size_2.pack(side="left")
+    pen_size_2.select()
 
+    pen_size_3 = tk.Radiobutton(
+        pen_size_frame, text="Large", value=7, command=lambda: change_size(7), bg="white")
+    pen_size_3.pack(side="left")
 
-left_frame = tk.Frame(root, width=200, height=600, bg="white")
-left_frame.pack(side="left", fill="y")
+    clear_button = tk.Button(left_frame, text="Clear",
+                             command=clear_canvas, bg="#FF9797")
+    clear_button.pack(pady=10)
 
-canvas = tk.Canvas(root, width=750, height=600)
-canvas.pack()
+    history_frame = tk.Frame(left_frame, bg="white")
+    history_frame.pack(pady=5)
+    undo_button = tk.Button(history_frame, text="Undo", command=undo, bg="white")
+    undo_button.pack(side="left", padx=2)
+    redo_button = tk.Button(history_frame, text="Redo", command=redo, bg="white")
+    redo_button.pack(side="left", padx=2)
 
-image_button = tk.Button(left_frame, text="Add Image",
-                         command=add_image, bg="white")
-image_button.pack(pady=15)
+    export_button = tk.Button(left_frame, text="Export Image",
+                              command=export_image, bg="white")
+    export_button.pack(pady=5)
 
-color_button = tk.Button(
-    left_frame, text="Change Pen Color", command=change_color, bg="white")
-color_button.pack(pady=5)
+    batch_button = tk.Button(left_frame, text="Batch Process...",
+                             command=batch_process, bg="white")
+    batch_button.pack(pady=5)
 
-pen_size_frame = tk.Frame(left_frame, bg="white")
-pen_size_frame.pack(pady=5)
+    fit_button = tk.Button(left_frame, text="Fit to Window",
+                           command=lambda: viewport.fit(), bg="white")
+    fit_button.pack(pady=5)
 
-pen_size_1 = tk.Radiobutton(
-    pen_size_frame, text="Small", value=3, command=lambda: change_size(3), bg="white")
-pen_size_1.pack(side="left")
+    filter_label = tk.Label(left_frame, text="Select Filter", bg="white")
+    filter_label.pack()
+    filter_combobox = ttk.Combobox(left_frame, values=sorted(FILTERS))
+    filter_combobox.pack()
 
-pen_size_2 = tk.Radiobutton(
-    pen_size_frame, text="Medium", value=5, command=lambda: change_size(5), bg="white")
-pen_size_2.pack(side="left")
-pen_size_2.select()
+    stack_filters = tk.BooleanVar(value=False)
+    stack_check = tk.Checkbutton(left_frame, text="Stack Filters",
+                                 variable=stack_filters, bg="white")
+    stack_check.pack(pady=5)
 
-pen_size_3 = tk.Radiobutton(
-    pen_size_frame, text="Large", value=7, command=lambda: change_size(7), bg="white")
-pen_size_3.pack(side="left")
+    reset_button = tk.Button(left_frame, text="Reset Filters",
+                             command=reset_filters, bg="white")
+    reset_button.pack(pady=5)
 
-clear_button = tk.Button(left_frame, text="Clear",
-                         command=clear_canvas, bg="#FF9797")
-clear_button.pack(pady=10)
+    adjust_button = tk.Button(left_frame, text="Adjust...",
+                              command=open_adjustments, bg="white")
+    adjust_button.pack(pady=5)
 
-filter_label = tk.Label(left_frame, text="Select Filter", bg="white")
-filter_label.pack()
-filter_combobox = ttk.Combobox(left_frame, values=["Black and White", "Blur",
-                                             "Emboss", "Sharpen", "Smooth"])
-filter_combobox.pack()
+    status_label = tk.Label(left_frame, text="", bg="white", wraplength=180)
+    status_label.pack(pady=5)
 
 
-filter_combobox.bind("<<ComboboxSelected>>",
-                     lambda event: apply_filter(filter_combobox.get()))
+    filter_combobox.bind("<<ComboboxSelected>>",
+                         lambda event: apply_filter(filter_combobox.get()))
 
 
-canvas.bind("<B1-Motion>", draw)
+    canvas.bind("<ButtonPress-1>", start_stroke)
+    canvas.bind("<B1-Motion>", draw)
+    canvas.bind("<ButtonRelease-1>", end_stroke)
+    # Mouse wheel zooms around the pointer, the right button pans
+    canvas.bind("<MouseWheel>", viewport.on_wheel)
+    canvas.bind("<Button-4>", viewport.on_wheel)
+    canvas.bind("<Button-5>", viewport.on_wheel)
+    canvas.bind("<ButtonPress-3>", viewport.start_pan)
+    canvas.bind("<B3-Motion>", viewport.pan)
+    root.bind("<Control-z>", undo)
+    root.bind("<Control-y>", redo)
+    root.bind("<Control-Z>", redo)
 
-root.mainloop()
+    poll_full_resolution()
+    root.mainloop()
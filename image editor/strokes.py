@@ -0,0 +1,150 @@
+from PIL import Image, ImageDraw
+
+INDEX_CELL = 512  # image pixels per side of a stroke index cell
+
+
+class Stroke:
+    """One pen stroke, kept in image coordinates so it can be redrawn at any scale"""
+
+    def __init__(self, color, size):
+        self.color = color
+        self.size = size
+        self.points = []
+        self.extent = None  # (min x, min y, max x, max y) of the points
+        self.order = 0  # position in the layer, strokes are drawn in this order
+
+    def add(self, x, y):
+        self.points.append((x, y))
+        if self.extent is None:
+            self.extent = (x, y, x, y)
+        else:
+            left, top, right, bottom = self.extent
+            self.extent = (min(left, x), min(top, y), max(right, x), max(bottom, y))
+
+    def bounds(self):
+        left, top, right, bottom = self.extent
+        return (left - self.size, top - self.size, right + self.size, bottom + self.size)
+
+
+def draw_segment(draw, start, end, color, radius):
+    """Draw a line segment with a round end cap
+
+    The start cap is the end cap of the previous segment.
+    """
+    x, y = end
+    if start != end:
+        draw.line([start, end], fill=color, width=max(1, round(2 * radius)))
+    draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+
+
+def draw_stroke(draw, stroke, scale, offset=(0, 0), first=0):
+    """Draw the segments of stroke ending at points[first:] at scale, shifted by -offset"""
+    ox, oy = offset
+    # Only the drawn points and the start of the first drawn segment are converted
+    start = max(0, first - 1)
+    points = [(x * scale - ox, y * scale - oy) for x, y in stroke.points[start:]]
+    radius = stroke.size * scale
+    for index in range(first - start, len(points)):
+        draw_segment(draw, points[max(0, index - 1)], points[index], stroke.color, radius)
+
+
+def intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def cells(box):
+    """Index cells covered by a box in image coordinates"""
+    left, top, right, bottom = (int(value // INDEX_CELL) for value in box)
+    return [(column, row) for column in range(left, right + 1) for row in range(top, bottom + 1)]
+
+
+class StrokeLayer:
+    """Pen strokes in image coordinates
+
+    Each mouse motion adds an interpolated segment from the previous point,
+    so strokes are continuous however fast the pointer moves. The layer only
+    records points; views rasterize the strokes they show at their own
+    scale, so drawing never allocates anything the size of the image.
+    Strokes are indexed by the grid cells their segments cover, so finding
+    the strokes of a tile does not depend on how many strokes there are.
+    """
+
+    def __init__(self):
+        self.strokes = []
+        self.current = None
+        self.index = {}  # cell -> strokes with a segment in it, in drawing order
+        self.next_order = 0
+
+    def begin(self, x, y, color, size):
+        """Start a stroke at image position (x, y); returns the dirty box in image coordinates"""
+        self.current = Stroke(color, size)
+        self.add(self.current)
+        return self.extend(x, y)
+
+    def add(self, stroke):
+        """Put a stroke on top of the others, e.g. again on redo"""
+        stroke.order = self.next_order
+        self.next_order += 1
+        self.strokes.append(stroke)
+        for start, end in zip(stroke.points[:1] + stroke.points, stroke.points):
+            self.index_segment(stroke, start, end)
+
+    def pop(self):
+        """Remove and return the top stroke"""
+        stroke = self.strokes.pop()
+        if stroke.points:
+            for cell in cells(stroke.bounds()):
+                entries = self.index.get(cell)
+                if entries and entries[-1] is stroke:
+                    entries.pop()
+        return stroke
+
+    def restore(self, strokes):
+        """Replace all strokes, e.g. on undoing a clear"""
+        self.clear()
+        for stroke in strokes:
+            self.add(stroke)
+
+    def index_segment(self, stroke, start, end):
+        radius = stroke.size
+        box = (min(start[0], end[0]) - radius, min(start[1], end[1]) - radius,
+               max(start[0], end[0]) + radius, max(start[1], end[1]) + radius)
+        for cell in cells(box):
+            entries = self.index.setdefault(cell, [])
+            if not entries or entries[-1] is not stroke:
+                entries.append(stroke)
+        return box
+
+    def extend(self, x, y):
+        """Continue the current stroke to image position (x, y); returns the dirty box"""
+        if self.current is None:
+            return None
+        points = self.current.points
+        previous = points[-1] if points else (x, y)
+        self.current.add(x, y)
+        return self.index_segment(self.current, previous, (x, y))
+
+    def end(self):
+        stroke, self.current = self.current, None
+        return stroke
+
+    def clear(self):
+        self.strokes = []
+        self.current = None
+        self.index = {}
+
+    def visible(self, box):
+        """Strokes whose bounds intersect box, in image coordinates, in drawing order"""
+        found = {}
+        for cell in cells(box):
+            for stroke in self.index.get(cell, ()):
+                found[stroke.order] = stroke
+        return [found[order] for order in sorted(found) if intersects(found[order].bounds(), box)]
+
+    def render(self, size, scale):
+        """Rasterize all strokes into a new RGBA image, e.g. for full resolution export"""
+        image = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        for stroke in self.strokes:
+            draw_stroke(draw, stroke, scale)
+        return image
@@ -0,0 +1,324 @@
+import itertools
+import math
+import queue
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageTk
+
+from strokes import draw_stroke, intersects
+
+TILE_SIZE = 256
+TILE_CACHE_BYTES = 192 * 1024 * 1024
+MAX_ZOOM = 32.0
+ZOOM_STEP = 1.25
+BACKGROUND = (64, 64, 64)
+
+
+class ImagePyramid:
+    """An image and its successively halved levels, built on demand
+
+    ``scale`` is the size of the image relative to the document, so a
+    filtered preview proxy can stand in for the full resolution image.
+    ``preview`` is a small version used for placeholder tiles.
+    """
+
+    _serials = itertools.count()
+
+    def __init__(self, image, scale=1.0, preview=None):
+        self.levels = [image]
+        self.scale = scale
+        self.size = (round(image.width / scale), round(image.height / scale))
+        self.preview = preview if preview is not None else image
+        self.preview_scale = self.preview.width / self.size[0]
+        self.serial = next(self._serials)
+        self.lock = threading.Lock()
+
+    def level_for(self, zoom):
+        """The coarsest level at least as detailed as zoom, and its scale"""
+        index = 0
+        while self.scale / 2 ** (index + 1) >= zoom:
+            width, height = self.levels[0].size
+            if min(width, height) >> (index + 1) < 1:
+                break
+            index += 1
+        with self.lock:
+            while len(self.levels) <= index:
+                self.levels.append(self.levels[-1].reduce(2))
+            level = self.levels[index]
+        return level, level.width / self.size[0]
+
+
+def resize_region(image, image_scale, zoom, left, top, size):
+    """The region of image covering a display tile at zoom"""
+    factor = zoom / image_scale
+    box = (left / factor, top / factor,
+           min(image.width, (left + size[0]) / factor), min(image.height, (top + size[1]) / factor))
+    resample = Image.BILINEAR if factor < 2 else Image.NEAREST
+    return image.resize(size, resample, box=box)
+
+
+def render_tile(pyramid, zoom, column, row, size):
+    level, level_scale = pyramid.level_for(zoom)
+    return resize_region(level, level_scale, zoom, column * TILE_SIZE, row * TILE_SIZE, size).convert("RGB")
+
+
+class TileCache:
+    """Byte-bounded LRU of rendered base tiles"""
+
+    def __init__(self, max_bytes=TILE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            tile = self.items.get(key)
+            if tile is not None:
+                self.items.move_to_end(key)
+            return tile
+
+    def put(self, key, tile):
+        with self.lock:
+            if key in self.items:
+                return
+            self.items[key] = tile
+            self.used += tile.width * tile.height * 3
+            while self.used > self.max_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.used -= evicted.width * evicted.height * 3
+
+
+class TileWorker(threading.Thread):
+    """Renders requested tiles in the background
+
+    Each request replaces the previous one, so tiles that scrolled out of
+    view before they were reached are never rendered.
+    """
+
+    def __init__(self, cache):
+        super().__init__(daemon=True)
+        self.cache = cache
+        self.condition = threading.Condition()
+        self.wanted = []
+        self.done = queue.Queue()
+
+    def request(self, jobs):
+        # jobs are (key, pyramid, zoom, column, row, size), most important first
+        with self.condition:
+            self.wanted = list(jobs)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.wanted:
+                    self.condition.wait()
+                key, pyramid, zoom, column, row, size = self.wanted.pop(0)
+            if self.cache.get(key) is None:
+                self.cache.put(key, render_tile(pyramid, zoom, column, row, size))
+            self.done.put(key)
+
+
+class Tile:
+    def __init__(self, key, size, photo, item):
+        self.key = key
+        self.size = size
+        self.photo = photo
+        self.item = item
+        self.base = None
+        self.overlay = None  # RGBA stroke raster, only for tiles with strokes
+
+
+class TiledViewport:
+    """Zoomable, pannable view of an image pyramid on a Tk canvas
+
+    The canvas holds one PhotoImage per visible tile. Base tiles come from
+    a shared LRU cache and are rendered by a background worker; until one
+    arrives, the tile shows an upscaled crop of the small preview. Strokes
+    are rasterized per tile at the current zoom.
+    """
+
+    def __init__(self, canvas, stroke_layer):
+        self.canvas = canvas
+        self.stroke_layer = stroke_layer
+        self.cache = TileCache()
+        self.worker = TileWorker(self.cache)
+        self.worker.start()
+        self.pyramid = None
+        self.zoom = 1.0
+        self.origin = (0.0, 0.0)  # display position of the canvas' top left corner
+        self.tiles = {}
+        self.pan_start = None
+        canvas.config(bg="#%02x%02x%02x" % BACKGROUND)
+        canvas.bind("<Configure>", lambda event: self.refresh())
+        self.poll()
+
+    # View
+
+    def view_size(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = int(self.canvas["width"]), int(self.canvas["height"])
+        return width, height
+
+    def set_source(self, pyramid, fit=False):
+        """Show a new image; the view is kept unless fit, since strokes are in image coordinates"""
+        self.pyramid = pyramid
+        if fit:
+            self.fit()
+        else:
+            self.rebuild()
+
+    def fit(self):
+        width, height = self.view_size()
+        image_width, image_height = self.pyramid.size
+        self.zoom = min(width / image_width, height / image_height)
+        self.origin = ((image_width * self.zoom - width) / 2, (image_height * self.zoom - height) / 2)
+        self.rebuild()
+
+    def zoom_at(self, x, y, factor):
+        """Zoom by factor keeping the image point under canvas position (x, y) in place"""
+        width, height = self.view_size()
+        fit = min(width / self.pyramid.size[0], height / self.pyramid.size[1])
+        zoom = min(MAX_ZOOM, max(fit / 4, self.zoom * factor))
+        image_x, image_y = self.to_image(x, y)
+        self.zoom = zoom
+        self.origin = (image_x * zoom - x, image_y * zoom - y)
+        self.rebuild()
+
+    def on_wheel(self, event):
+        up = event.delta > 0 if event.num not in (4, 5) else event.num == 4
+        self.zoom_at(event.x, event.y, ZOOM_STEP if up else 1 / ZOOM_STEP)
+
+    def start_pan(self, event):
+        self.pan_start = (event.x, event.y)
+
+    def pan(self, event):
+        if self.pan_start is None:
+            return
+        dx, dy = event.x - self.pan_start[0], event.y - self.pan_start[1]
+        self.pan_start = (event.x, event.y)
+        self.origin = (self.origin[0] - dx, self.origin[1] - dy)
+        self.canvas.move("tiles", dx, dy)
+        self.refresh()
+
+    def to_image(self, x, y):
+        return ((x + self.origin[0]) / self.zoom, (y + self.origin[1]) / self.zoom)
+
+    # Tiles
+
+    def rebuild(self):
+        """Drop all tiles, after the zoom or the source changed"""
+        self.canvas.delete("tiles")
+        self.tiles = {}
+        self.refresh()
+
+    def visible_tiles(self):
+        width, height = self.view_size()
+        image_width = math.ceil(self.pyramid.size[0] * self.zoom)
+        image_height = math.ceil(self.pyramid.size[1] * self.zoom)
+        ox, oy = self.origin
+        columns = range(max(0, int(ox // TILE_SIZE)),
+                        min(math.ceil(image_width / TILE_SIZE), math.ceil((ox + width) / TILE_SIZE)))
+        rows = range(max(0, int(oy // TILE_SIZE)),
+                     min(math.ceil(image_height / TILE_SIZE), math.ceil((oy + height) / TILE_SIZE)))
+        for row in rows:
+            for column in columns:
+                size = (min(TILE_SIZE, image_width - column * TILE_SIZE),
+                        min(TILE_SIZE, image_height - row * TILE_SIZE))
+                yield (column, row), size
+
+    def refresh(self):
+        """Create the tiles that came into view, drop the others and request missing base tiles"""
+        if self.pyramid is None:
+            return
+        visible = dict(self.visible_tiles())
+        for position in list(self.tiles):
+            if position not in visible:
+                self.canvas.delete(self.tiles.pop(position).item)
+
+        jobs = []
+        for (column, row), size in visible.items():
+            tile = self.tiles.get((column, row))
+            if tile is None:
+                key = (self.pyramid.serial, self.zoom, column, row)
+                photo = ImageTk.PhotoImage("RGB", size)
+                item = self.canvas.create_image(column * TILE_SIZE - self.origin[0],
+                                                row * TILE_SIZE - self.origin[1],
+                                                image=photo, anchor="nw", tags="tiles")
+                tile = self.tiles[(column, row)] = Tile(key, size, photo, item)
+                self.rasterize_strokes((column, row), tile)
+                tile.base = self.cache.get(key)
+                if tile.base is None:
+                    tile.base = resize_region(self.pyramid.preview, self.pyramid.preview_scale, self.zoom,
+                                              column * TILE_SIZE, row * TILE_SIZE, size).convert("RGB")
+                    jobs.append((key, self.pyramid, self.zoom, column, row, size))
+                self.show(tile)
+        self.canvas.tag_lower("tiles")
+
+        if jobs:
+            # Centre first, the way the eye looks at a view
+            width, height = self.view_size()
+            centre = ((self.origin[0] + width / 2) / TILE_SIZE, (self.origin[1] + height / 2) / TILE_SIZE)
+            jobs.sort(key=lambda job: (job[3] + 0.5 - centre[0]) ** 2 + (job[4] + 0.5 - centre[1]) ** 2)
+            self.worker.request(jobs)
+
+    def poll(self):
+        while not self.worker.done.empty():
+            key = self.worker.done.get()
+            tile = self.tiles.get(key[2:])
+            if tile is not None and tile.key == key:
+                base = self.cache.get(key)
+                if base is not None:
+                    tile.base = base
+                    self.show(tile)
+        self.canvas.after(30, self.poll)
+
+    def show(self, tile):
+        if tile.overlay is None:
+            tile.photo.paste(tile.base)
+            return
+        composite = tile.base.convert("RGBA")
+        composite.alpha_composite(tile.overlay)
+        tile.photo.paste(composite.convert("RGB"))
+
+    # Strokes
+
+    def tile_box(self, position, size):
+        """Image coordinate box covered by a tile"""
+        left, top = position[0] * TILE_SIZE, position[1] * TILE_SIZE
+        return (left / self.zoom, top / self.zoom, (left + size[0]) / self.zoom, (top + size[1]) / self.zoom)
+
+    def rasterize_strokes(self, position, tile):
+        strokes = self.stroke_layer.visible(self.tile_box(position, tile.size))
+        if not strokes:
+            tile.overlay = None
+            return
+        tile.overlay = Image.new("RGBA", tile.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(tile.overlay)
+        offset = (position[0] * TILE_SIZE, position[1] * TILE_SIZE)
+        for stroke in strokes:
+            draw_stroke(draw, stroke, self.zoom, offset)
+
+    def redraw_strokes(self, box=None):
+        """Re-rasterize the strokes of the visible tiles intersecting box (image coordinates), or all"""
+        for position, tile in self.tiles.items():
+            if box is None or intersects(self.tile_box(position, tile.size), box):
+                self.rasterize_strokes(position, tile)
+                self.show(tile)
+
+    def stroke_extended(self, stroke, dirty):
+        """Draw the newest segment of stroke into the tiles intersecting dirty (image coordinates)"""
+        if dirty is None:
+            return
+        for position, tile in self.tiles.items():
+            box = self.tile_box(position, tile.size)
+            if not intersects(box, dirty):
+                continue
+            if tile.overlay is None:
+                tile.overlay = Image.new("RGBA", tile.size, (0, 0, 0, 0))
+            offset = (position[0] * TILE_SIZE, position[1] * TILE_SIZE)
+            draw_stroke(ImageDraw.Draw(tile.overlay), stroke, self.zoom, offset, first=len(stroke.points) - 1)
+            self.show(tile)